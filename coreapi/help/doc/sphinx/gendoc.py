@@ -21,13 +21,13 @@
 import sys
 import os
 import argparse
-import pystache
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'tools'))
 import abstractapi
 import genapixml as capi
 import metaname
 import metadoc
+import cachedrenderer
 
 
 class RstTools:
@@ -162,19 +162,19 @@ class SphinxPage(object):
 		return self.lang.docTranslator
 	
 	def make_chapter(self):
-		return lambda text: RstTools.make_chapter(pystache.render(text, self))
+		return lambda text: RstTools.make_chapter(cachedrenderer.CachedRenderer().render(text, self))
 	
 	def make_section(self):
-		return lambda text: RstTools.make_section(pystache.render(text, self))
+		return lambda text: RstTools.make_section(cachedrenderer.CachedRenderer().render(text, self))
 	
 	def make_subsection(self):
-		return lambda text: RstTools.make_subsection(pystache.render(text, self.properties))
+		return lambda text: RstTools.make_subsection(cachedrenderer.CachedRenderer().render(text, self.properties))
 	
 	def write_declarator(self):
 		return lambda text: self.docTranslator.get_declarator(text)
 	
 	def write(self, directory):
-		r = pystache.Renderer()
+		r = cachedrenderer.CachedRenderer()
 		filepath = os.path.join(directory, self.filename)
 		with open(filepath, mode='w') as f:
 			f.write(r.render(self))
@@ -343,15 +343,15 @@ class DocGenerator:
 	def generate(self, outputdir):
 		for lang in self.languages:
 			subdirectory = lang.langCode.lower()
-			directory = os.path.join(args.outputdir, subdirectory)
+			directory = os.path.join(outputdir, subdirectory)
 			if not os.path.exists(directory):
 				os.mkdir(directory)
 			
-			enumsPage = EnumsPage(lang, self.languages, absApiParser.enums)
+			enumsPage = EnumsPage(lang, self.languages, self.api.enums)
 			enumsPage.write(directory)
 			
 			indexPage = IndexPage(lang, self.languages)
-			for _class in absApiParser.classes:
+			for _class in self.api.classes:
 				page = ClassPage(_class, lang, self.languages)
 				page.write(directory)
 				indexPage.add_class_entry(_class)
@@ -363,9 +363,15 @@ if __name__ == '__main__':
 	argparser = argparse.ArgumentParser(description='Generate a sphinx project to generate the documentation of Linphone Core API.')
 	argparser.add_argument('xmldir', type=str, help='directory holding the XML documentation of the C API generated by Doxygen')
 	argparser.add_argument('-o --output', type=str, help='directory into where Sphinx source files will be written', dest='outputdir', default='.')
+	argparser.add_argument('--cache-dir', type=str, help='directory where the parsed XML files are cached between runs', dest='cachedir', default=None)
+	argparser.add_argument('--template-cache-dir', type=str, help='directory where the parsed templates are cached between runs', dest='templatecachedir', default=None)
+	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
 	args = argparser.parse_args()
+	
+	cachedrenderer.defaultCache.directory = args.templatecachedir
 
 	cProject = capi.Project()
+	cProject.cacheDir = args.cachedir
 	cProject.initFromDir(args.xmldir)
 	cProject.check()
 
@@ -374,4 +380,6 @@ if __name__ == '__main__':
 	
 	docGenerator = DocGenerator(absApiParser)
 	docGenerator.generate(args.outputdir)
+	if args.verbose:
+		print(cachedrenderer.defaultCache.report())
 
@@ -0,0 +1,180 @@
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import hashlib
+import os
+import tempfile
+import time
+
+import pystache
+from pystache.parser import parse
+from pystache.renderengine import RenderEngine
+from six.moves import cPickle as pickle
+
+
+class TemplateCache(object):
+	"""Parsed mustache templates, shared by all the renderers of a process.
+
+	Templates are indexed by their source text. The ones read from template files are also stored in
+	'directory', if set, so that later runs do not have to parse them again."""
+	version = 1
+
+	def __init__(self, directory=None):
+		self.directory = directory
+		self.parseCount = 0
+		self.parseTime = 0.0
+		self.diskHits = 0
+		self.renderCount = 0
+		self.renderTime = 0.0
+		self._templates = {}
+		self._persistent = set()
+		self._renderDepth = 0
+		# Template sources looked up by class of view or by partial name
+		self.loadedTemplates = {}
+
+	def register(self, template):
+		"""Mark a template read from a file so that its parsed form is kept on disk."""
+		self._persistent.add(template)
+
+	def get(self, template, delimiters=None):
+		key = (template, delimiters)
+		try:
+			return self._templates[key]
+		except KeyError:
+			pass
+		start = time.time()
+		parsed = None
+		persistent = self.directory is not None and template in self._persistent
+		if persistent:
+			path = self._path(template, delimiters)
+			parsed = self._load(path)
+		if parsed is None:
+			parsed = parse(template, delimiters)
+			self.parseCount += 1
+			if persistent:
+				self._store(path, parsed)
+		else:
+			self.diskHits += 1
+		self.parseTime += time.time() - start
+		self._templates[key] = parsed
+		return parsed
+
+	def resetStats(self):
+		self.parseCount = 0
+		self.parseTime = 0.0
+		self.diskHits = 0
+		self.renderCount = 0
+		self.renderTime = 0.0
+
+	def report(self):
+		return 'Templates: {0} parsed and {1} loaded from cache in {2:.3f}s, {3} rendered in {4:.3f}s'.format(
+			self.parseCount, self.diskHits, self.parseTime, self.renderCount, self.renderTime)
+
+	def _path(self, template, delimiters):
+		h = hashlib.sha1()
+		h.update(str(TemplateCache.version).encode())
+		h.update(pystache.__version__.encode())
+		h.update(repr(delimiters).encode())
+		h.update(template.encode('utf-8'))
+		return os.path.join(self.directory, h.hexdigest() + '.pickle')
+
+	def _load(self, path):
+		try:
+			with open(path, 'rb') as f:
+				return pickle.load(f)
+		except Exception:
+			return None
+
+	def _store(self, path, parsed):
+		try:
+			if not os.path.isdir(self.directory):
+				os.makedirs(self.directory)
+		except OSError:
+			pass
+		try:
+			fd, tmppath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+			with os.fdopen(fd, 'wb') as f:
+				pickle.dump(parsed, f, pickle.HIGHEST_PROTOCOL)
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(tmppath, path)
+		except (IOError, OSError) as e:
+			print('Cannot write template cache entry: {0}'.format(e))
+
+
+# Cache used by default by all the renderers of the process
+defaultCache = TemplateCache()
+
+
+class CachingRenderEngine(RenderEngine):
+	def __init__(self, cache, **kwargs):
+		RenderEngine.__init__(self, **kwargs)
+		self.cache = cache
+
+	def render(self, template, context_stack, delimiters=None):
+		return self.cache.get(template, delimiters).render(self, context_stack)
+
+
+class CachedRenderer(pystache.Renderer):
+	"""pystache renderer that loads and parses each template only once.
+
+	The template of a view is looked up once per class of view, and partials once per name."""
+	def __init__(self, cache=None, **kwargs):
+		pystache.Renderer.__init__(self, **kwargs)
+		self.cache = cache if cache is not None else defaultCache
+
+	def _loadTemplate(self, key, load):
+		# Templates are looked up in the search directories, which may be relative to the current one
+		key = (key, tuple(os.path.abspath(d) for d in self.search_dirs), self.file_extension)
+		template = self.cache.loadedTemplates.get(key)
+		if template is None:
+			template = self._to_unicode_hard(load())
+			self.cache.register(template)
+			self.cache.loadedTemplates[key] = template
+		return template
+
+	def render(self, template, *context, **kwargs):
+		# Nested renderings, eg. from lambdas, are accounted in the outermost one
+		if self.cache._renderDepth > 0:
+			return pystache.Renderer.render(self, template, *context, **kwargs)
+		self.cache._renderDepth += 1
+		start = time.time()
+		parseTime = self.cache.parseTime
+		try:
+			return pystache.Renderer.render(self, template, *context, **kwargs)
+		finally:
+			self.cache._renderDepth -= 1
+			self.cache.renderCount += 1
+			self.cache.renderTime += time.time() - start - (self.cache.parseTime - parseTime)
+
+	def _render_object(self, obj, *context, **kwargs):
+		if isinstance(obj, pystache.TemplateSpec):
+			return pystache.Renderer._render_object(self, obj, *context, **kwargs)
+		template = self._loadTemplate(type(obj), lambda: self._make_loader().load_object(obj))
+		context = [obj] + list(context)
+		return self._render_string(template, *context, **kwargs)
+
+	def _make_resolve_partial(self):
+		resolvePartial = pystache.Renderer._make_resolve_partial(self)
+		return lambda name: self._loadTemplate(name, lambda: resolvePartial(name))
+
+	def _make_render_engine(self):
+		return CachingRenderEngine(self.cache,
+			literal=self._to_unicode_hard,
+			escape=self._escape_to_unicode,
+			resolve_context=self._make_resolve_context(),
+			resolve_partial=self._make_resolve_partial(),
+			to_str=self.str_coerce)
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+import genapixml as CApi
+import abstractapi as AbsApi
+import cachedrenderer
+
+
+topSrcDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Path of the module implementing each target. The 'xml' target is implemented by genapixml.
+targetModules = {
+	'cpp' : os.path.join(topSrcDir, 'wrappers', 'cpp', 'genwrapper.py'),
+	'csharp' : os.path.join(topSrcDir, 'wrappers', 'csharp', 'genwrapper.py'),
+	'sphinx' : os.path.join(topSrcDir, 'coreapi', 'help', 'doc', 'sphinx', 'gendoc.py')
+}
+
+# Targets are rendered in this order when they are not rendered concurrently. The C# wrapper comes after
+# the targets sharing the default abstract API because its own parser resolves the documentation references
+# again, and the XML target comes last because it sorts the enums and classes of the C project.
+allTargets = ['cpp', 'sphinx', 'csharp', 'xml']
+
+# State inherited by the forked rendering processes
+_state = {}
+
+
+def _loadModule(name, path):
+	try:
+		import importlib.util
+	except ImportError:
+		import imp
+		return imp.load_source(name, path)
+	spec = importlib.util.spec_from_file_location(name, path)
+	module = importlib.util.module_from_spec(spec)
+	# pystache looks the templates up next to the module file found through sys.modules
+	sys.modules[name] = module
+	spec.loader.exec_module(module)
+	return module
+
+def _forkContext():
+	if not hasattr(os, 'fork'):
+		return None
+	if hasattr(multiprocessing, 'get_context'):
+		if not 'fork' in multiprocessing.get_all_start_methods():
+			return None
+		return multiprocessing.get_context('fork')
+	return multiprocessing
+
+
+class ApiGenerator:
+	def __init__(self, xmldir):
+		self.xmldir = xmldir
+		self.targets = allTargets
+		self.jobs = 1
+		self.cacheDir = None
+		self.verbose = False
+		self.xmlOutput = 'api.xml'
+		self.cppOutputDir = '.'
+		self.csharpOutputDir = '.'
+		self.csharpOutputFile = 'LinphoneWrapper.cs'
+		self.sphinxOutputDir = '.'
+		self.project = None
+		self.parser = None
+
+	def parse(self):
+		self.project = CApi.Project()
+		self.project.verbose = self.verbose
+		self.project.jobs = self.jobs
+		self.project.cacheDir = self.cacheDir
+		self.project.initFromDir(self.xmldir)
+		self.project.check()
+		if 'cpp' in self.targets or 'sphinx' in self.targets:
+			self.parser = AbsApi.CParser(self.project)
+			self.parser.parse_all()
+
+	def render(self, target):
+		cachedrenderer.defaultCache.resetStats()
+		self._renderTarget(target)
+		if self.verbose and target != 'xml':
+			print(target + ': ' + cachedrenderer.defaultCache.report())
+
+	def _renderTarget(self, target):
+		if target == 'xml':
+			with open(self.xmlOutput, 'wb') as f:
+				CApi.Generator(f).generate(self.project)
+		elif target == 'cpp':
+			module = _loadModule('cpp_genwrapper', targetModules['cpp'])
+			module.generate(self.parser, self.cppOutputDir)
+		elif target == 'csharp':
+			module = _loadModule('csharp_genwrapper', targetModules['csharp'])
+			parser = AbsApi.CParser(self.project)
+			module.configure_parser(parser)
+			parser.parse_all()
+			module.generate(parser, self.csharpOutputDir, self.csharpOutputFile)
+		elif target == 'sphinx':
+			module = _loadModule('gendoc', targetModules['sphinx'])
+			module.DocGenerator(self.parser).generate(self.sphinxOutputDir)
+
+	def renderAll(self):
+		targets = [t for t in allTargets if t in self.targets]
+		jobs = len(targets) if self.jobs is None else min(self.jobs, len(targets))
+		context = _forkContext()
+		if jobs < 2 or context is None:
+			for target in targets:
+				self.render(target)
+			return
+		# The targets only read the parsed API, so each of them is rendered by a forked process
+		# that inherits it instead of receiving a pickled copy.
+		_state['generator'] = self
+		pool = context.Pool(jobs)
+		try:
+			pool.map(_renderInWorker, targets, chunksize=1)
+		finally:
+			pool.close()
+			pool.join()
+			del _state['generator']
+
+
+def _renderInWorker(target):
+	_state['generator'].render(target)
+
+
+def main(argv = None):
+	if argv is None:
+		argv = sys.argv
+	argparser = argparse.ArgumentParser(description="Parse the Doxygen XML documentation of the Linphone API once and generate several targets from it.")
+	argparser.add_argument('-t', '--targets', metavar='targets', default=','.join(allTargets), help="Comma-separated list of the targets to generate among " + ', '.join(allTargets) + " (all of them by default).")
+	argparser.add_argument('-j', '--jobs', metavar='jobs', type=int, default=1, help="Number of processes used to parse the XML files and to render the targets (0 means one per CPU).")
+	argparser.add_argument('--cache-dir', metavar='cachedir', help="Directory where the parsed XML files are cached between runs.")
+	argparser.add_argument('--template-cache-dir', metavar='templatecachedir', help="Directory where the parsed templates are cached between runs.")
+	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
+	argparser.add_argument('--xml-output', metavar='outputfile', default='api.xml', help="Output XML file describing the Linphone API.")
+	argparser.add_argument('--cpp-output', metavar='outputdir', default='.', help="Directory where to generate the source files of the C++ wrapper.")
+	argparser.add_argument('--csharp-output', metavar='outputdir', default='.', help="Directory where to generate the source file of the C# wrapper.")
+	argparser.add_argument('--csharp-name', metavar='outputfile', default='LinphoneWrapper.cs', help="Name of the generated source file of the C# wrapper.")
+	argparser.add_argument('--sphinx-output', metavar='outputdir', default='.', help="Directory where to write the Sphinx source files of the documentation.")
+	argparser.add_argument('xmldir', help="XML directory generated by doxygen.")
+	args = argparser.parse_args(argv[1:])
+	targets = [t.strip() for t in args.targets.split(',') if t.strip() != '']
+	for t in targets:
+		if not t in allTargets:
+			argparser.error("unknown target '" + t + "'")
+	generator = ApiGenerator(args.xmldir)
+	generator.targets = targets
+	generator.jobs = args.jobs if args.jobs > 0 else None
+	generator.cacheDir = args.cache_dir
+	generator.verbose = args.verbose
+	generator.xmlOutput = args.xml_output
+	generator.cppOutputDir = args.cpp_output
+	generator.csharpOutputDir = args.csharp_output
+	generator.csharpOutputFile = args.csharp_name
+	generator.sphinxOutputDir = args.sphinx_output
+	cachedrenderer.defaultCache.directory = args.template_cache_dir
+	generator.parse()
+	generator.renderAll()
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -17,10 +17,16 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import argparse
+import gc
+import hashlib
+import multiprocessing
 import os
+import shutil
 import six
+from six.moves import cPickle as pickle
 import string
 import sys
+import tempfile
 import xml.etree.ElementTree as ET
 import xml.dom.minidom as minidom
 import metadoc
@@ -237,10 +243,143 @@ class CClass(CObject):
 			self.__addClassMethod(f)
 
 
+class CPrefixTree:
+	"""Character trie mapping string keys to values, used to find every key that is a prefix of a given name."""
+	def __init__(self):
+		self.__root = {}
+
+	def add(self, key, value):
+		node = self.__root
+		for c in key:
+			node = node.setdefault(c, {})
+		node.setdefault(None, []).append(value)
+
+	def findPrefixesOf(self, name):
+		node = self.__root
+		values = list(node.get(None, []))
+		for c in name:
+			node = node.get(c)
+			if node is None:
+				break
+			values += node.get(None, [])
+		return values
+
+
+class CParsedFile:
+	def __init__(self, name):
+		self.name = name
+		self.enums = []
+		self.structs = []
+		self.typedefs = []
+		self.functions = []
+
+
+class CParseCache:
+	"""On-disk cache of parsed Doxygen XML files, indexed by a hash of the content of each file.
+
+	The key also covers the cache format version, the major version of Python and the source code
+	of the parser (genapixml, metadoc and metaname), so that entries are invalidated whenever one of them changes. It covers the name of
+	this module as well, since the pickled objects refer to their classes through it (genapixml when
+	imported by the wrapper generators, __main__ when run as a script).
+
+	Entries are stored in a subdirectory named after the hash of the parser, then after the name of
+	this module. prune() deletes the subdirectories of the other parsers and the entries of files
+	that were not parsed by the current run."""
+	version = 1
+
+	def __init__(self, directory):
+		self.directory = directory
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		h = hashlib.sha1()
+		h.update(str(CParseCache.version).encode())
+		h.update(str(sys.version_info[0]).encode())
+		for module in [sys.modules[__name__], metadoc, metadoc.metaname]:
+			with open(os.path.splitext(module.__file__)[0] + '.py', 'rb') as f:
+				h.update(f.read())
+		self.__parserDir = h.hexdigest()
+		self.path = os.path.join(directory, self.__parserDir, __name__)
+		h.update(__name__.encode())
+		self.__parserHash = h
+
+	def key(self, f):
+		h = self.__parserHash.copy()
+		with open(f, 'rb') as xmlfile:
+			h.update(xmlfile.read())
+		return h.hexdigest()
+
+	def load(self, key, f):
+		try:
+			with open(os.path.join(self.path, key + '.pickle'), 'rb') as cachefile:
+				version, parsedFile = pickle.load(cachefile)
+		except Exception:
+			self.misses += 1
+			return None
+		if version != CParseCache.version:
+			self.misses += 1
+			return None
+		self.hits += 1
+		parsedFile.name = f
+		return parsedFile
+
+	def store(self, key, parsedFile):
+		try:
+			if not os.path.isdir(self.path):
+				os.makedirs(self.path)
+		except OSError:
+			pass
+		# Write to a temporary file first so that concurrent generators never read a partial entry
+		try:
+			fd, tmppath = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+			with os.fdopen(fd, 'wb') as cachefile:
+				pickle.dump((CParseCache.version, parsedFile), cachefile, pickle.HIGHEST_PROTOCOL)
+			path = os.path.join(self.path, key + '.pickle')
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(tmppath, path)
+		except (IOError, OSError) as e:
+			print("Cannot write parse cache entry for '" + parsedFile.name + "': " + str(e))
+
+	def prune(self, keys):
+		# Entries of files that are no longer parsed, or that have changed since they were cached
+		used = set(key + '.pickle' for key in keys)
+		for name in CParseCache.__listdir(self.path):
+			if name.endswith('.pickle') and name not in used:
+				try:
+					os.remove(os.path.join(self.path, name))
+					self.evictions += 1
+				except OSError:
+					pass
+		# Entries of the other versions of the parser, and of the former flat layout of the cache
+		for name in CParseCache.__listdir(self.directory):
+			path = os.path.join(self.directory, name)
+			if name == self.__parserDir:
+				continue
+			if len(name) == 40 and all(c in string.hexdigits for c in name) and os.path.isdir(path):
+				shutil.rmtree(path, ignore_errors=True)
+				self.evictions += 1
+			elif name.endswith('.pickle'):
+				try:
+					os.remove(path)
+					self.evictions += 1
+				except OSError:
+					pass
+
+	@staticmethod
+	def __listdir(directory):
+		try:
+			return os.listdir(directory)
+		except OSError:
+			return []
+
+
 class Project:
 	def __init__(self):
 		self.verbose = False
 		self.prettyPrint = False
+		self.jobs = 1
+		self.cacheDir = None
 		self.enums = []
 		self.__structs = []
 		self.__typedefs = []
@@ -315,34 +454,40 @@ class Project:
 		return node.find('./detaileddescription//donotwrap') is None
 
 	def __discoverClasses(self):
+		pendingEnums = {}
+		for e in self.enums:
+			if e.associatedTypedef is None:
+				pendingEnums.setdefault(e.name, []).append(e)
+		pendingStructs = {}
+		for st in self.__structs:
+			if st.associatedTypedef is None:
+				pendingStructs.setdefault(st.name, []).append(st)
 		for td in self.__typedefs:
 			if td.definition.startswith('enum '):
-				for e in self.enums:
-					if (e.associatedTypedef is None) and td.definition[5:] == e.name:
-						e.associatedTypedef = td
-						break
+				candidates = pendingEnums.get(td.definition[5:])
+				if candidates:
+					candidates.pop(0).associatedTypedef = td
 			elif td.definition.startswith('struct '):
-				structFound = False
-				for st in self.__structs:
-					if (st.associatedTypedef is None) and td.definition[7:] == st.name:
-						st.associatedTypedef = td
-						structFound = True
-						break
-				if not structFound:
+				candidates = pendingStructs.get(td.definition[7:])
+				if candidates:
+					candidates.pop(0).associatedTypedef = td
+				else:
 					name = td.definition[7:]
 					print("Structure with no associated typedef: " + name)
 					st = CStruct(name)
 					st.associatedTypedef = td
 					self.add(st)
+		structsByTypedef = {}
+		for st in self.__structs:
+			if st.associatedTypedef is not None and not st.associatedTypedef in structsByTypedef:
+				structsByTypedef[st.associatedTypedef] = st
 		for td in self.__typedefs:
 			if td.definition.startswith('struct '):
-				for st in self.__structs:
-					if st.associatedTypedef == td:
-						cclass = CClass(st)
-						cclass.briefDoc = td.briefDoc
-						cclass.detailedDoc = td.detailedDoc
-						self.add(cclass)
-						break
+				if td in structsByTypedef:
+					cclass = CClass(structsByTypedef[td])
+					cclass.briefDoc = td.briefDoc
+					cclass.detailedDoc = td.detailedDoc
+					self.add(cclass)
 			elif ('Linphone' + td.definition) == td.name:
 				st = CStruct(td.name)
 				st.associatedTypedef = td
@@ -351,26 +496,25 @@ class Project:
 				cclass.detailedDoc = td.detailedDoc
 				self.add(st)
 				self.add(cclass)
-		# Sort classes by length of name (longest first), so that methods are put in the right class
+		# Sort classes by length of name (longest first), so that methods are put in the right class.
+		# When several classes match, the one coming first in this order wins.
 		self.classes.sort(key = lambda c: len(c.name), reverse = True)
+		classesByName = CPrefixTree()
+		classesByFunctionPrefix = CPrefixTree()
+		for i, c in enumerate(self.classes):
+			classesByName.add(c.name, i)
+			classesByFunctionPrefix.add(c.cFunctionPrefix, i)
 		for e in self.__events:
-			eventAdded = False
-			for c in self.classes:
-				if c.name.endswith('Cbs') and e.name.startswith(c.name):
-					c.addEvent(e)
-					eventAdded = True
-					break
-			if not eventAdded:
-				for c in self.classes:
-					if e.name.startswith(c.name):
-						c.addEvent(e)
-						eventAdded = True
-						break
+			matches = classesByName.findPrefixesOf(e.name)
+			cbsMatches = [i for i in matches if self.classes[i].name.endswith('Cbs')]
+			if len(cbsMatches) > 0:
+				self.classes[min(cbsMatches)].addEvent(e)
+			elif len(matches) > 0:
+				self.classes[min(matches)].addEvent(e)
 		for f in self.__functions:
-			for c in self.classes:
-				if c.cFunctionPrefix == f.name[0 : len(c.cFunctionPrefix)]:
-					c.addMethod(f)
-					break
+			matches = classesByFunctionPrefix.findPrefixesOf(f.name)
+			if len(matches) > 0:
+				self.classes[min(matches)].addMethod(f)
 
 	def __parseCEnumValueInitializer(self, initializer):
 		initializer = initializer.strip()
@@ -413,12 +557,6 @@ class Project:
 			e.addValue(ev)
 		return e
 
-	def __findCEnum(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='enum']/memberdef[@kind='enum'][@prot='public']")
-		for m in memberdefs:
-			e = self.__parseCEnumMemberdef(m)
-			self.add(e)
-
 	def __parseCStructMember(self, node, structname):
 		name = node.find('./name').text
 		definition = node.find('./definition').text
@@ -448,12 +586,6 @@ class Project:
 			s.addMember(sm)
 		return s
 
-	def __findCStruct(self, tree):
-		compounddefs = tree.findall("./compounddef[@kind='struct'][@prot='public']")
-		for c in compounddefs:
-			s = self.__parseCStructCompounddef(c)
-			self.add(s)
-
 	def __parseCTypedefMemberdef(self, node):
 		if not Project.__canBeWrapped(self, node):
 			return None
@@ -528,12 +660,6 @@ class Project:
 			return td
 		return None
 
-	def __findCTypedef(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='typedef']/memberdef[@kind='typedef'][@prot='public']")
-		for m in memberdefs:
-			td = self.__parseCTypedefMemberdef(m)
-			self.add(td)
-
 	def __parseCFunctionMemberdef(self, node):
 		if not Project.__canBeWrapped(self, node):
 			return None
@@ -602,33 +728,92 @@ class Project:
 			print(name + ":\n" + missingDocWarning)
 		return f
 
-	def __findCFunction(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='func']/memberdef[@kind='function'][@prot='public'][@static='no']")
-		for m in memberdefs:
-			f = self.__parseCFunctionMemberdef(m)
+	def __parseGroupMemberdef(self, node, sectionKind, parsedFile):
+		if node.get('prot') != 'public':
+			return
+		kind = node.get('kind')
+		if sectionKind == 'enum' and kind == 'enum':
+			parsedFile.enums.append(self.__parseCEnumMemberdef(node))
+		elif sectionKind == 'typedef' and kind == 'typedef':
+			parsedFile.typedefs.append(self.__parseCTypedefMemberdef(node))
+		elif sectionKind == 'func' and kind == 'function' and node.get('static') == 'no':
+			f = self.__parseCFunctionMemberdef(node)
 			if f is not None:
-				self.add(f)
+				parsedFile.functions.append(f)
+
+	def parseFile(self, f):
+		if self.verbose:
+			print("Parsing XML file: " + f)
+		parsedFile = CParsedFile(f)
+		# The file is streamed: each group member is parsed as soon as its closing tag is read and is then
+		# released, so that the memory usage does not depend on the size of the file.
+		ancestors = []
+		try:
+			for event, node in ET.iterparse(f, events=('start', 'end')):
+				if event == 'start':
+					ancestors.append(node)
+					continue
+				ancestors.pop()
+				if node.tag == 'memberdef' and len(ancestors) == 3 and ancestors[1].get('kind') == 'group':
+					self.__parseGroupMemberdef(node, ancestors[2].get('kind'), parsedFile)
+					ancestors[2].remove(node)
+				elif node.tag == 'compounddef' and len(ancestors) == 1:
+					if node.get('kind') == 'struct' and node.get('prot') == 'public':
+						parsedFile.structs.append(self.__parseCStructCompounddef(node))
+					ancestors[0].remove(node)
+		except ET.ParseError as e:
+			print(e)
+			return None
+		return parsedFile
+
+	def __parseFiles(self, xmlfiles):
+		if self.cacheDir is None:
+			return self.__parseUncachedFiles(xmlfiles)
+		cache = CParseCache(self.cacheDir)
+		keys = [cache.key(f) for f in xmlfiles]
+		# Unpickling creates lots of objects at once, which would otherwise trigger many useless garbage collections
+		gcWasEnabled = gc.isenabled()
+		gc.disable()
+		try:
+			parsedFiles = [cache.load(key, f) for key, f in zip(keys, xmlfiles)]
+		finally:
+			if gcWasEnabled:
+				gc.enable()
+		missing = [i for i, pf in enumerate(parsedFiles) if pf is None]
+		for i, pf in zip(missing, self.__parseUncachedFiles([xmlfiles[i] for i in missing])):
+			parsedFiles[i] = pf
+			if pf is not None:
+				cache.store(keys[i], pf)
+		cache.prune(keys)
+		if self.verbose:
+			print("Parse cache: " + str(cache.hits) + " hit(s), " + str(cache.misses) + " miss(es), " + str(cache.evictions) + " eviction(s)")
+		return parsedFiles
+
+	def __parseUncachedFiles(self, xmlfiles):
+		if self.jobs == 1 or len(xmlfiles) < 2:
+			return [self.parseFile(f) for f in xmlfiles]
+		pool = multiprocessing.Pool(self.jobs)
+		try:
+			return pool.map(_parseFileInWorker, [(f, self.verbose) for f in xmlfiles], chunksize=1)
+		finally:
+			pool.close()
+			pool.join()
 
 	def initFromFiles(self, xmlfiles):
-		trees = []
-		for f in xmlfiles:
-			tree = None
-			try:
-				if self.verbose:
-					print("Parsing XML file: " + f.name)
-				tree = ET.parse(f)
-			except ET.ParseError as e:
-				print(e)
-			if tree is not None:
-				trees.append(tree)
-		for tree in trees:
-			self.__findCEnum(tree)
-		for tree in trees:
-			self.__findCStruct(tree)
-		for tree in trees:
-			self.__findCTypedef(tree)
-		for tree in trees:
-			self.__findCFunction(tree)
+		parsedFiles = [pf for pf in self.__parseFiles(xmlfiles) if pf is not None]
+		# Merge the results in the same order as if all the files were walked once per kind of object
+		for pf in parsedFiles:
+			for e in pf.enums:
+				self.add(e)
+		for pf in parsedFiles:
+			for s in pf.structs:
+				self.add(s)
+		for pf in parsedFiles:
+			for td in pf.typedefs:
+				self.add(td)
+		for pf in parsedFiles:
+			for f in pf.functions:
+				self.add(f)
 		self.__discoverClasses()
 
 	def initFromDir(self, xmldir):
@@ -642,6 +827,13 @@ class Project:
 					print("Property '" + name + "' of class '" + c.name + "' has a setter but no getter")
 
 
+def _parseFileInWorker(args):
+	f, verbose = args
+	project = Project()
+	project.verbose = verbose
+	return project.parseFile(f)
+
+
 class Generator:
 	def __init__(self, outputfile):
 		self.__outputfile = outputfile
@@ -791,6 +983,8 @@ def main(argv = None):
 	argparser.add_argument('-o', '--outputfile', metavar='outputfile', type=argparse.FileType('w'), help="Output XML file describing the Linphone API.")
 	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
 	argparser.add_argument('--pretty', help="XML pretty print", action='store_true')
+	argparser.add_argument('-j', '--jobs', metavar='jobs', type=int, default=1, help="Number of processes used to parse the XML files (0 means one per CPU).")
+	argparser.add_argument('--cache-dir', metavar='cachedir', help="Directory where the parsed XML files are cached between runs.")
 	argparser.add_argument('xmldir', help="XML directory generated by doxygen.")
 	args = argparser.parse_args()
 	if args.outputfile == None:
@@ -800,6 +994,9 @@ def main(argv = None):
 		project.verbose = True
 	if args.pretty:
 		project.prettyPrint = True
+	if args.jobs != 1:
+		project.jobs = args.jobs if args.jobs > 0 else None
+	project.cacheDir = args.cache_dir
 	project.initFromDir(args.xmldir)
 	project.check()
 	gen = Generator(args.outputfile)
@@ -18,11 +18,14 @@
 
 import argparse
 import os
-import pystache
 import sys
+import time
+import timeit
 import xml.etree.ElementTree as ET
 
 sys.path.append(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+import cachedrenderer
 from apixml2python.linphone import LinphoneModule, HandWrittenClassMethod, HandWrittenInstanceMethod, HandWrittenDeallocMethod, HandWrittenProperty
 
 
@@ -93,9 +96,9 @@ blacklisted_functions = [
 	''
 ]
 hand_written_functions = [
-	HandWrittenClassMethod('Buffer', 'new_from_data', 'linphone_buffer_new_from_data', "Create a new LinphoneBuffer object from existing data.\n\n:param data: The initial data to store in the LinphoneBuffer.\n:type data: ByteArray\n:returns: A new LinphoneBuffer object.\n:rtype: linphone.Buffer"),
-	HandWrittenProperty('Buffer', 'content', 'linphone_buffer_get_content', 'linphone_buffer_set_content', "[ByteArray] Set the content of the data buffer."),
-	HandWrittenProperty('Content', 'buffer', 'linphone_content_get_buffer', 'linphone_content_set_buffer', "[ByteArray] Set the content data buffer."),
+	HandWrittenClassMethod('Buffer', 'new_from_data', 'linphone_buffer_new_from_data', "Create a new LinphoneBuffer object from existing data.\n\n:param data: The initial data to store in the LinphoneBuffer.\n:type data: bytes-like object\n:returns: A new LinphoneBuffer object.\n:rtype: linphone.Buffer"),
+	HandWrittenProperty('Buffer', 'content', 'linphone_buffer_get_content', 'linphone_buffer_set_content', "[ByteArray] Set the content of the data buffer. Any bytes-like object can be assigned. The content can also be read without copy through the buffer protocol, for example with memoryview(buffer)."),
+	HandWrittenProperty('Content', 'buffer', 'linphone_content_get_buffer', 'linphone_content_set_buffer', "[ByteArray] Set the content data buffer. Any bytes-like object can be assigned."),
 	HandWrittenProperty('Call', 'native_video_window_id', 'linphone_call_get_native_video_window_id', 'linphone_call_set_native_video_window_id', "[int] Set the native video window id where the video is to be displayed."),
 	HandWrittenProperty('Core', 'native_preview_window_id', 'linphone_core_get_native_preview_window_id', 'linphone_core_set_native_preview_window_id', "[int] Set the native window id where the preview video (local camera) is to be displayed. This has to be used in conjonction with :py:meth:`linphone.Core.use_preview_window` . MacOS, Linux, Windows: if not set or zero the core will create its own window, unless the special id -1 is given."),
 	HandWrittenProperty('Core', 'native_video_window_id', 'linphone_core_get_native_video_window_id', 'linphone_core_set_native_video_window_id', "[int] Set the native video window id where the video is to be displayed. For MacOS, Linux, Windows: if not set or LINPHONE_VIDEO_DISPLAY_AUTO the core will create its own window, unless the special id LINPHONE_VIDEO_DISPLAY_NONE is given."),
@@ -104,14 +107,29 @@ hand_written_functions = [
 	HandWrittenProperty('Core', 'sound_devices', 'linphone_core_get_sound_devices', None, "[list of string] Get the available sound devices."),
 	HandWrittenProperty('Core', 'video_devices', 'linphone_core_get_video_devices', None, "[list of string] Get the available video capture devices."),
 	HandWrittenProperty('Config', 'sections_names', 'linphone_config_get_sections_names', None, "[list of string] Get the sections' names in the lp config."),
+	HandWrittenInstanceMethod('ChatMessage', 'attach_file_mmap', 'linphone_chat_message_attach_file_mmap', "Send the content of a file with a file transfer message. The file is mapped in memory and its chunks are given to liblinphone without calling Python. This replaces the file_transfer_send callback of the message, and must be called before sending the message. The file stays mapped until its last chunk has been sent, even if the message is not referenced anymore from Python. An empty file is sent as an empty content.\n\n:param path: the path of the file to send\n:type path: string"),
+	HandWrittenInstanceMethod('Core', 'poll_events', 'linphone_core_poll_events', "Remove the events of this core and of its objects queued by the callbacks when linphone.set_event_queueing() has been called. The callbacks of the events are not called, it is up to the caller to call them with their arguments.\n\n:returns: the queued events, in the order in which they happened, as a list of (callback, arguments) tuples\n:rtype: list"),
 	HandWrittenInstanceMethod('Factory', 'create_core', 'linphone_factory_create_core', "Instanciate a LinphoneCore object.\n\nThe LinphoneCore object is the primary handle for doing all phone actions. It should be unique within your application.\n\n:param cbs: a LinphoneCoreCbs object holding your application callbacks. A reference will be taken on it until the destruciton of the core or the unregistration with linphone_core_remove_cbs().\n:type cbs: linphone.CoreCbs\n:param config_path: a path to a config file. If it does not exists it will be created. The config file is used to store all settings, call logs, friends, proxies... so that all these settings become persistent over the life of the LinphoneCore object. It is allowed to set a None config file. In that case LinphoneCore will not store any settings.\n:type config_path: string\n:param factory_config_path: a path to a read-only config file that can be used to to store hard-coded preference such as proxy settings or internal preferences. The settings in this factory file always override the one in the normal config file. It is OPTIONAL, use None if unneeded.\n:type factory_config_path: string\n:returns: \n:rtype: linphone.Core"),
 	HandWrittenInstanceMethod('Factory', 'create_core_with_config', 'linphone_factory_create_core_with_config', "Instantiates a LinphoneCore object with a given LpConfig.\n\n:param cbs: a LinphoneCoreCbs object holding your application callbacks. A reference will be taken on it until the destruciton of the core or the unregistration with linphone_core_remove_cbs().\n:type cbs: linphone.CoreCbs\n:param config: a pointer to an LpConfig object holding the configuration of the LinphoneCore to be instantiated.\n:type config: linphone.Config\n:returns: \n:rtype: linphone.Core"),
 ]
+# Getters returning a linphone.LazyList instead of a list: a read-only sequence that can be indexed, sliced, compared
+# and printed like a list. Its objects are only created when they are accessed, and the same sequence is returned as
+# long as the list does not change
+lazy_list_getters = [
+	'linphone_core_get_call_logs',
+	'linphone_core_get_proxy_config_list',
+	'linphone_friend_list_get_friends'
+]
+# Functions called without holding the GIL, so that the other Python threads can run while they are blocking.
+# liblinphone is not thread-safe: the other Python threads must not call it while one of these functions is running.
+gil_releasing_functions = [
+	'linphone_core_iterate'
+]
 
-def generate(apixmlfile, outputfile):
+def generate(apixmlfile, outputfile, use_varargs = False, strip_traces = False, verbose = False):
 	tree = ET.parse(apixmlfile)
-	renderer = pystache.Renderer()
-	m = LinphoneModule(tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_functions)
+	renderer = cachedrenderer.CachedRenderer()
+	m = LinphoneModule(tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_functions, use_varargs, strip_traces, lazy_list_getters, gil_releasing_functions)
 	os.chdir('apixml2python')
 	tmpfilename = outputfile.name + '.tmp'
 	with open(tmpfilename, mode='w') as f:
@@ -121,6 +139,23 @@ def generate(apixmlfile, outputfile):
 			if not line.isspace():
 				outputfile.write(line)
 	os.unlink(tmpfilename)
+	if verbose:
+		print(cachedrenderer.defaultCache.report())
+
+def benchmark(apixmlfile, count):
+	tree = ET.parse(apixmlfile)
+	timings = []
+	for i in range(count):
+		start = time.time()
+		m = LinphoneModule(tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_functions, lazy_list_functions=lazy_list_getters, gil_releasing_functions=gil_releasing_functions)
+		timings.append(time.time() - start)
+	print("Module description built {0} times: best {1:.3f}s, mean {2:.3f}s, {3} argument types".format(count, min(timings), sum(timings) / count, len(m.argument_types)))
+	# Resolve all the types used by the API through the type registry, and through a scan of the list of known types for comparison
+	names = [node.get('type') for node in tree.iter() if node.tag in ('argument', 'return')]
+	known_types = list(m.types.categories)
+	registry_time = min(timeit.repeat(lambda: [m.types.lookup(name) for name in names], number=10, repeat=3))
+	scan_time = min(timeit.repeat(lambda: [name in known_types for name in names], number=10, repeat=3))
+	print("{0} lookups among {1} known types: {2:.6f}s with the registry, {3:.6f}s with a list scan".format(len(names) * 10, len(known_types), registry_time, scan_time))
 
 
 def main(argv = None):
@@ -128,11 +163,22 @@ def main(argv = None):
 		argv = sys.argv
 	argparser = argparse.ArgumentParser(description="Generate a Python wrapper of the Linphone API.")
 	argparser.add_argument('-o', '--outputfile', metavar='outputfile', type=argparse.FileType('w'), help="Output C file containing the code of the Python wrapper.")
+	argparser.add_argument('--template-cache-dir', metavar='templatecachedir', help="Directory where the parsed templates are cached between runs.")
+	argparser.add_argument('--varargs', help="Generate methods receiving their arguments as a tuple (METH_VARARGS) instead of using METH_NOARGS and METH_O when they take no or one argument.", action='store_true')
+	argparser.add_argument('--strip-traces', help="Do not generate the code tracing the calls to the wrapper, even when a log handler is set.", action='store_true')
+	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
+	argparser.add_argument('--benchmark', metavar='count', type=int, help="Only build the description of the module count times and print how long it took.")
 	argparser.add_argument('apixmlfile', help="XML file of the Linphone API generated by genapixml.py.")
 	args = argparser.parse_args()
+	if args.template_cache_dir is not None:
+		# The templates are rendered from the apixml2python directory
+		cachedrenderer.defaultCache.directory = os.path.abspath(args.template_cache_dir)
+	if args.benchmark is not None:
+		benchmark(args.apixmlfile, args.benchmark)
+		return
 	if args.outputfile == None:
 		args.outputfile = open('linphone.c', 'w')
-	generate(args.apixmlfile, args.outputfile)
+	generate(args.apixmlfile, args.outputfile, args.varargs, args.strip_traces, args.verbose)
 
 if __name__ == "__main__":
 	sys.exit(main())
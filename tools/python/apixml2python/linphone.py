@@ -91,6 +91,161 @@ class HandWrittenProperty(HandWrittenCode):
 		self.setter_cfunction = setter_cfunction
 
 
+# Records describing the module to the mustache templates. pystache looks their fields up as attributes, and the
+# fields that a template may render while they do not apply default to an empty string.
+class EnumValueRecord(object):
+	__slots__ = ('enum_value_cname', 'enum_value_name', 'enum_value_doc')
+
+	def __init__(self, cname, name, doc):
+		self.enum_value_cname = cname
+		self.enum_value_name = name
+		self.enum_value_doc = doc
+
+class EnumRecord(object):
+	__slots__ = ('enum_cname', 'enum_name', 'enum_doc', 'enum_values', 'enum_deprecated_values')
+
+	def __init__(self, cname):
+		self.enum_cname = cname
+		self.enum_name = strip_leading_linphone(cname)
+		self.enum_doc = ''
+		self.enum_values = []
+		self.enum_deprecated_values = []
+
+class EventRecord(object):
+	__slots__ = ('event_class', 'event_xml_node', 'event_cname', 'event_name', 'event_doc', 'event_callback_definition')
+
+	def __init__(self, class_name, xml_node):
+		self.event_class = class_name
+		self.event_xml_node = xml_node
+		self.event_cname = xml_node.get('name')
+		self.event_name = compute_event_name(self.event_cname, class_name)
+		self.event_doc = ''
+		self.event_callback_definition = ''
+
+class MethodRecord(object):
+	__slots__ = ('method_name', 'method_xml_node', 'method_doc', 'method_body', 'method_flags', 'blacklisted')
+
+	def __init__(self, name, xml_node = None, doc = ''):
+		self.method_name = name
+		self.method_xml_node = xml_node
+		self.method_doc = doc
+		self.method_body = ''
+		self.method_flags = 'METH_VARARGS'
+		self.blacklisted = False
+
+class PropertyRecord(object):
+	__slots__ = ('property_name', 'property_doc',
+		'getter_name', 'getter_xml_node', 'getter_reference', 'getter_definition_begin', 'getter_definition_end', 'getter_body',
+		'setter_name', 'setter_xml_node', 'setter_reference', 'setter_definition_begin', 'setter_definition_end', 'setter_body',
+		'blacklisted')
+
+	def __init__(self, name, doc = ''):
+		self.property_name = name
+		self.property_doc = doc
+		self.getter_name = None
+		self.getter_xml_node = None
+		self.getter_reference = 'NULL'
+		self.getter_definition_begin = ''
+		self.getter_definition_end = ''
+		self.getter_body = ''
+		self.setter_name = None
+		self.setter_xml_node = None
+		self.setter_reference = 'NULL'
+		self.setter_definition_begin = ''
+		self.setter_definition_end = ''
+		self.setter_body = ''
+		self.blacklisted = False
+
+class ClassRecord(object):
+	__slots__ = ('class_xml_node', 'class_cname', 'class_name', 'class_c_function_prefix', 'class_doc',
+		'class_refcountable', 'class_destroyable', 'class_has_user_data', 'class_has_hand_written_dealloc', 'class_has_identity_map', 'class_has_buffer_procs',
+		'class_type_methods', 'class_type_hand_written_methods', 'class_instance_methods', 'class_instance_hand_written_methods',
+		'class_properties', 'class_hand_written_properties', 'class_object_members', 'class_object_members_code', 'class_events',
+		'new_body', 'init_body', 'from_native_pointer_body', 'dealloc_definition', 'blacklisted')
+
+	def __init__(self, xml_node):
+		self.class_xml_node = xml_node
+		self.class_cname = xml_node.get('name')
+		self.class_name = strip_leading_linphone(self.class_cname)
+		self.class_c_function_prefix = xml_node.get('cfunctionprefix')
+		self.class_doc = ''
+		self.class_refcountable = (xml_node.get('refcountable') == 'true')
+		self.class_destroyable = (xml_node.get('destroyable') == 'true')
+		self.class_has_user_data = False
+		self.class_has_hand_written_dealloc = False
+		self.class_has_identity_map = False
+		self.class_has_buffer_procs = False
+		self.class_type_methods = []
+		self.class_type_hand_written_methods = []
+		self.class_instance_methods = []
+		self.class_instance_hand_written_methods = []
+		self.class_properties = []
+		self.class_hand_written_properties = []
+		self.class_object_members = []
+		self.class_object_members_code = ''
+		self.class_events = []
+		self.new_body = ''
+		self.init_body = ''
+		self.from_native_pointer_body = ''
+		self.dealloc_definition = ''
+		self.blacklisted = False
+
+class BctbxListTypeRecord(object):
+	__slots__ = ('c_contained_type', 'python_contained_type')
+
+	def __init__(self, c_contained_type):
+		self.c_contained_type = c_contained_type
+		self.python_contained_type = strip_leading_linphone(c_contained_type)
+
+class LazyListTypeRecord(object):
+	__slots__ = ('c_contained_type', 'python_contained_type', 'c_function_prefix')
+
+	def __init__(self, class_):
+		self.c_contained_type = class_.class_cname
+		self.python_contained_type = class_.class_name
+		self.c_function_prefix = class_.class_c_function_prefix
+
+
+class TypeRegistry(object):
+	"""Types known by the generator, indexed by their C name."""
+	BASE = 'base'
+	ENUM = 'enum'
+	CALLBACK = 'callback'
+	CLASS = 'class'
+
+	def __init__(self, base_types):
+		self.categories = {}
+		# Enums and classes are also referred to without their leading 'Linphone'
+		self.enum_names = set()
+		self.classes = {}
+		for base_type in base_types:
+			self.add(base_type, TypeRegistry.BASE)
+
+	def add(self, cname, category):
+		self.categories.setdefault(cname, category)
+
+	def add_enum(self, enum):
+		self.add(enum.enum_cname, TypeRegistry.ENUM)
+		self.enum_names.add(enum.enum_name)
+
+	def add_class(self, class_):
+		self.add(class_.class_cname, TypeRegistry.CLASS)
+		self.classes.setdefault(class_.class_name, class_)
+
+	def lookup(self, cname):
+		"""Return the category of a type, or None if it is unknown."""
+		return self.categories.get(cname)
+
+	def is_enum(self, name):
+		return strip_leading_linphone(name) in self.enum_names
+
+	def find_class(self, name):
+		return self.classes.get(strip_leading_linphone(name))
+
+	def __contains__(self, cname):
+		return cname in self.categories
+
+
 class UnknownTypeException(Exception):
 	def __init__(self, typename):
 		self.typename = typename
@@ -99,7 +254,8 @@ class UnknownTypeException(Exception):
 
 class ArgumentType:
 	def __init__(self, basic_type, complete_type, contained_type, linphone_module):
-		if not basic_type in linphone_module.known_types:
+		self.category = linphone_module.types.lookup(basic_type)
+		if self.category is None:
 			raise UnknownTypeException(basic_type)
 		self.basic_type = basic_type
 		self.complete_type = complete_type
@@ -261,7 +417,7 @@ class ArgumentType:
 			self.cfmt_str = '%p'
 			self.cast_convert_func_result = False
 		else:
-			if strip_leading_linphone(self.basic_type) in self.linphone_module.enum_names:
+			if self.linphone_module.types.is_enum(self.basic_type):
 				self.type_str = 'int'
 				self.check_condition = "!PyInt_Check({arg_name})"
 				self.convert_code = "{result_name}{result_suffix} = {cast}PyInt_AsLong({arg_name});\n"
@@ -307,7 +463,7 @@ class MethodDefinition:
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			self.parse_tuple_format += argument_type.fmt_str
 			if is_callback(arg_complete_type):
 				body += "\tPyObject * {arg_name};\n".format(arg_name=arg_name)
@@ -317,7 +473,7 @@ class MethodDefinition:
 			elif argument_type.fmt_str == 'O' and argument_type.convert_code is not None:
 				body += "\tPyObject * " + arg_name + ";\n"
 				body += "\t" + arg_complete_type + " " + arg_name + "_native_obj;\n"
-			elif strip_leading_linphone(arg_complete_type) in self.linphone_module.enum_names:
+			elif self.linphone_module.types.is_enum(arg_complete_type):
 				body += "\tint " + arg_name + ";\n"
 			else:
 				body += "\t" + arg_complete_type + " " + arg_name + ";\n"
@@ -326,8 +482,8 @@ class MethodDefinition:
 
 	def format_deprecation_warning(self):
 		if self.method_node is not None and self.method_node.get('deprecated') == 'true':
-			print(self.class_['class_name'] + "." + self.method_name + " is deprecated")
-			return "\tPyErr_WarnEx(PyExc_DeprecationWarning, \"{msg}\", 1);\n".format(msg="{class_name}.{method_name} is deprecated".format(class_name=self.class_['class_name'], method_name=self.method_name))
+			print(self.class_.class_name + "." + self.method_name + " is deprecated")
+			return "\tPyErr_WarnEx(PyExc_DeprecationWarning, \"{msg}\", 1);\n".format(msg="{class_name}.{method_name} is deprecated".format(class_name=self.class_.class_name, method_name=self.method_name))
 		return ""
 
 	def format_arguments_parsing(self):
@@ -335,7 +491,9 @@ class MethodDefinition:
 		if self.self_arg is not None:
 			class_native_ptr_check_code = self.format_class_native_pointer_check(False)
 		parse_tuple_code = ''
-		if len(self.arg_names) > 0:
+		if self.calling_convention() == 'METH_O':
+			parse_tuple_code = self.format_single_argument_conversion()
+		elif len(self.arg_names) > 0:
 			parse_tuple_code = \
 """if (!PyArg_ParseTuple(args, "{fmt}", {args})) {{
 		return NULL;
@@ -347,7 +505,7 @@ class MethodDefinition:
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			if argument_type.fmt_str == 'O' and argument_type.convert_code is not None:
 				args_conversion_code += argument_type.convert_code.format(result_name=arg_name, result_suffix='_native_obj', cast='', arg_name=arg_name)
 		return \
@@ -362,6 +520,30 @@ class MethodDefinition:
 		args_native_ptr_check_code=self.format_args_native_pointer_check(),
 		args_conversion_code=args_conversion_code)
 
+	def calling_convention(self):
+		if self.linphone_module.use_varargs:
+			return 'METH_VARARGS'
+		if len(self.xml_method_args) == 0:
+			return 'METH_NOARGS'
+		if len(self.xml_method_args) == 1:
+			return 'METH_O'
+		return 'METH_VARARGS'
+
+	def format_single_argument_conversion(self):
+		# With METH_O, args is the argument itself instead of a tuple of arguments
+		xml_method_arg = self.xml_method_args[0]
+		arg_name = "_" + xml_method_arg.get('name')
+		argument_type = self.linphone_module.argument_type(xml_method_arg.get('type'), xml_method_arg.get('completetype'), xml_method_arg.get('containedtype'))
+		if argument_type.fmt_str == 'O':
+			return "{arg_name} = args;\n".format(arg_name=arg_name)
+		# Scalar conversions keep the semantics of PyArg_ParseTuple: range checks and OverflowError for ints and enums,
+		# longs accepted for ints with Python 2, unicode strings, ints given for floats...
+		return \
+"""if (!PyArg_Parse(args, "{fmt}", &{arg_name})) {{
+		return NULL;
+	}}
+""".format(fmt=argument_type.fmt_str, arg_name=arg_name)
+
 	def format_enter_trace(self):
 		fmt = ''
 		args = []
@@ -375,7 +557,7 @@ class MethodDefinition:
 			arg_contained_type = xml_method_arg.get('containedtype')
 			if fmt != '':
 				fmt += ', '
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			fmt += argument_type.cfmt_str
 			args.append(arg_name)
 			if argument_type.fmt_str == 'O' and argument_type.cnativefmt_str is not None:
@@ -399,7 +581,7 @@ class MethodDefinition:
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			if argument_type.fmt_str == 'O' and argument_type.use_native_pointer:
 				arg_names.append(arg_name + "_native_ptr")
 			elif argument_type.fmt_str == 'O' and argument_type.convert_code is not None:
@@ -411,7 +593,7 @@ class MethodDefinition:
 			else:
 				arg_names.append(arg_name)
 		if is_callback(self.return_complete_type):
-			c_function_call_code = "pyresult = ((pylinphone_{class_name}Object *)self)->{callback_name};".format(class_name=self.class_['class_name'], callback_name=compute_event_name(self.return_complete_type, self.class_['class_name']))
+			c_function_call_code = "pyresult = ((pylinphone_{class_name}Object *)self)->{callback_name};".format(class_name=self.class_.class_name, callback_name=compute_event_name(self.return_complete_type, self.class_.class_name))
 		else:
 			if self.return_complete_type != 'void':
 				c_function_call_code += "cresult = "
@@ -421,6 +603,7 @@ class MethodDefinition:
 				if len(arg_names) > 0:
 					c_function_call_code += ', '
 			c_function_call_code += ', '.join(arg_names) + ");"
+			c_function_call_code = self.format_native_call(c_function_call_code)
 		if self.method_name == 'add_callbacks':
 			python_ref_code = "Py_INCREF(_cbs);"
 		elif self.method_name == 'remove_callbacks':
@@ -440,8 +623,15 @@ class MethodDefinition:
 						take_native_ref = 'FALSE'
 					from_native_pointer_code = "pyresult = pylinphone_{return_type}_from_native_ptr(&pylinphone_{return_type}Type, cresult, {take_native_ref});\n".format(return_type=stripped_return_type, take_native_ref=take_native_ref)
 				else:
-					return_argument_type = ArgumentType(self.return_type, self.return_complete_type, self.return_contained_type, self.linphone_module)
-					if return_argument_type.convert_from_func is not None:
+					return_argument_type = self.linphone_module.argument_type(self.return_type, self.return_complete_type, self.return_contained_type)
+					lazy_list_member = None
+					if self.method_node is not None:
+						lazy_list_member = self.linphone_module.lazy_list_getters.get(self.method_node.get('name'))
+					if lazy_list_member is not None:
+						convert_from_code = \
+"""pyresult = pylinphone_lazy_list_get(&((pylinphone_{class_name}Object *)self)->{member}, cresult, &pylinphone_{contained_type}_lazy_list_item_type);
+""".format(class_name=self.class_.class_name, member=lazy_list_member, contained_type=strip_leading_linphone(self.return_contained_type))
+					elif return_argument_type.convert_from_func is not None:
 						convert_from_code = \
 """pyresult = {convert_func}(cresult);
 """.format(convert_func=return_argument_type.convert_from_func)
@@ -459,11 +649,16 @@ class MethodDefinition:
 	Py_XDECREF(pyresult);"""
 		if self.return_complete_type == 'char *':
 			cfree_code = 'ms_free(cresult);';
+		dispatch_events_code = ''
+		if self.method_node is not None and self.method_node.get('name') == 'linphone_core_iterate':
+			# The events queued by the callbacks are delivered in one batch at the end of each iteration, unless they are polled
+			dispatch_events_code = "if (!pylinphone_events_polled) pylinphone_dispatch_queued_events(self);"
 		body = \
 """	{c_function_call_code}
 	{cfree_argument_code}
 	{python_ref_code}
 	pylinphone_dispatch_messages();
+	{dispatch_events_code}
 	{from_native_pointer_code}
 	{convert_from_code}
 	{build_value_code}
@@ -471,6 +666,7 @@ class MethodDefinition:
 """.format(c_function_call_code=c_function_call_code,
 		cfree_argument_code=cfree_argument_code,
 		python_ref_code=python_ref_code,
+		dispatch_events_code=dispatch_events_code,
 		from_native_pointer_code=from_native_pointer_code,
 		convert_from_code=convert_from_code,
 		build_value_code=build_value_code,
@@ -489,6 +685,8 @@ class MethodDefinition:
 		return "\tPy_RETURN_NONE;"
 
 	def format_return_none_trace(self):
+		if self.linphone_module.strip_traces:
+			return ''
 		return "\tpylinphone_trace(-1, \"[PYLINPHONE] <<< %s -> None\", __FUNCTION__);\n"
 
 	def format_class_native_pointer_check(self, return_int):
@@ -501,7 +699,7 @@ class MethodDefinition:
 		PyErr_SetString(PyExc_TypeError, "Invalid linphone.{class_name} instance");
 		return {return_value};
 	}}
-""".format(class_name=self.class_['class_name'], return_value=return_value)
+""".format(class_name=self.class_.class_name, return_value=return_value)
 
 	def format_args_type_check(self):
 		body = ''
@@ -510,7 +708,7 @@ class MethodDefinition:
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			if argument_type.fmt_str == 'O':
 				if argument_type.use_native_pointer:
 					body += \
@@ -537,7 +735,7 @@ class MethodDefinition:
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			if argument_type.fmt_str == 'O' and argument_type.use_native_pointer:
 				body += \
 """	if (({arg_name} != NULL) && ({arg_name} != Py_None)) {{
@@ -559,11 +757,11 @@ class MethodDefinition:
 		if is_callback(self.return_complete_type):
 			body += "\tPyObject * pyresult;\n"
 			body += "\tPyObject * pyret;\n"
-			argument_type = ArgumentType(self.return_type, self.return_complete_type, self.return_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(self.return_type, self.return_complete_type, self.return_contained_type)
 			self.build_value_format = argument_type.fmt_str
 		elif self.return_complete_type != 'void':
 			body += "\t" + self.return_complete_type + " cresult;\n"
-			argument_type = ArgumentType(self.return_type, self.return_complete_type, self.return_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(self.return_type, self.return_complete_type, self.return_contained_type)
 			self.build_value_format = argument_type.fmt_str
 			if self.build_value_format == 'O':
 				body += "\tPyObject * pyresult;\n"
@@ -580,18 +778,25 @@ class MethodDefinition:
 			self.xml_method_args = self.xml_method_args[1:]
 
 	def find_class_definition(self, basic_type):
-		basic_type = strip_leading_linphone(basic_type)
-		for c in self.linphone_module.classes:
-			if c['class_name'] == basic_type:
-				return c
-		return None
+		return self.linphone_module.types.find_class(basic_type)
+
+	def format_native_call(self, call_code):
+		if self.method_node is None or self.method_node.get('name') not in self.linphone_module.gil_releasing_functions:
+			return call_code
+		# The callbacks called meanwhile take the GIL back with PyGILState_Ensure()
+		return \
+"""Py_BEGIN_ALLOW_THREADS
+	pylinphone_gil_released++;
+	{call_code}
+	pylinphone_gil_released--;
+	Py_END_ALLOW_THREADS""".format(call_code=call_code)
 
 	def find_property_definition(self, basic_type, property_name):
 		class_definition = self.find_class_definition(basic_type)
 		if class_definition is None:
 			return None
-		for p in class_definition['class_properties']:
-			if p['property_name'] == property_name:
+		for p in class_definition.class_properties:
+			if p.property_name == property_name:
 				return p
 		return None
 
@@ -600,9 +805,11 @@ class MethodDefinition:
 		body = self.format_local_variables_definition()
 		body += self.format_deprecation_warning()
 		body += self.format_arguments_parsing()
-		body += self.format_enter_trace()
+		if not self.linphone_module.strip_traces:
+			body += self.format_enter_trace()
 		body += self.format_c_function_call()
-		body += self.format_return_trace()
+		if not self.linphone_module.strip_traces:
+			body += self.format_return_trace()
 		body += self.format_return_result()
 		return body
 
@@ -611,7 +818,7 @@ class NewMethodDefinition(MethodDefinition):
 		MethodDefinition.__init__(self, linphone_module, class_, "new", method_node)
 
 	def format_local_variables_definition(self):
-		return "\tpylinphone_{class_name}Object *self = (pylinphone_{class_name}Object *)type->tp_alloc(type, 0);\n".format(class_name=self.class_['class_name'])
+		return "\tpylinphone_{class_name}Object *self = (pylinphone_{class_name}Object *)type->tp_alloc(type, 0);\n".format(class_name=self.class_.class_name)
 
 	def format_arguments_parsing(self):
 		return ''
@@ -633,7 +840,7 @@ class InitMethodDefinition(MethodDefinition):
 		MethodDefinition.__init__(self, linphone_module, class_, "init", method_node)
 
 	def format_local_variables_definition(self):
-		return "\tpylinphone_{class_name}Object *self_obj = (pylinphone_{class_name}Object *)self;\n".format(class_name=self.class_['class_name'])
+		return "\tpylinphone_{class_name}Object *self_obj = (pylinphone_{class_name}Object *)self;\n".format(class_name=self.class_.class_name)
 
 	def format_arguments_parsing(self):
 		return ''
@@ -643,7 +850,7 @@ class InitMethodDefinition(MethodDefinition):
 
 	def format_c_function_call(self):
 		specific_member_initialization_code = ''
-		for member in self.class_['class_object_members']:
+		for member in self.class_.class_object_members:
 			specific_member_initialization_code += "\tself_obj->{member} = NULL;\n".format(member=member)
 		return \
 """	self_obj->native_ptr = NULL;
@@ -662,7 +869,7 @@ class FromNativePointerMethodDefinition(MethodDefinition):
 		MethodDefinition.__init__(self, linphone_module, class_, "from_native_pointer", None)
 
 	def format_local_variables_definition(self):
-		return "\tpylinphone_{class_name}Object *self = NULL;\n".format(class_name=self.class_['class_name'])
+		return "\tpylinphone_{class_name}Object *self = NULL;\n".format(class_name=self.class_.class_name)
 
 	def format_arguments_parsing(self):
 		return ''
@@ -673,12 +880,15 @@ class FromNativePointerMethodDefinition(MethodDefinition):
 	def format_c_function_call(self):
 		get_user_data_func_call = ''
 		set_user_data_func_call = ''
-		if self.class_['class_has_user_data']:
-			get_user_data_func_call = "self = (pylinphone_{class_name}Object *){function_prefix}get_user_data(native_ptr);".format(class_name=self.class_['class_name'], function_prefix=self.class_['class_c_function_prefix'])
-			set_user_data_func_call = "{function_prefix}set_user_data(self->native_ptr, self);".format(function_prefix=self.class_['class_c_function_prefix'])
+		if self.class_.class_has_user_data:
+			get_user_data_func_call = "self = (pylinphone_{class_name}Object *){function_prefix}get_user_data(native_ptr);".format(class_name=self.class_.class_name, function_prefix=self.class_.class_c_function_prefix)
+			set_user_data_func_call = "{function_prefix}set_user_data(self->native_ptr, self);".format(function_prefix=self.class_.class_c_function_prefix)
+		elif self.class_.class_has_identity_map:
+			get_user_data_func_call = "self = (pylinphone_{class_name}Object *)pylinphone_identity_map_lookup(&pylinphone_{class_name}_identity_map, native_ptr);".format(class_name=self.class_.class_name)
+			set_user_data_func_call = "pylinphone_identity_map_insert(&pylinphone_{class_name}_identity_map, self->native_ptr, (PyObject *)self);".format(class_name=self.class_.class_name)
 		ref_native_pointer_code = ''
-		if self.class_['class_refcountable']:
-			ref_native_pointer_code = "if (take_native_ref == TRUE) {func}(self->native_ptr);".format(func=self.class_['class_c_function_prefix'] + "ref")
+		if self.class_.class_refcountable:
+			ref_native_pointer_code = "if (take_native_ref == TRUE) {func}(self->native_ptr);".format(func=self.class_.class_c_function_prefix + "ref")
 		return \
 """	if (native_ptr == NULL) {{
 	{none_trace}
@@ -695,7 +905,7 @@ class FromNativePointerMethodDefinition(MethodDefinition):
 		{set_user_data_func_call}
 		{ref_native_pointer_code}
 	}}
-""".format(class_name=self.class_['class_name'], class_cname=self.class_['class_cname'],
+""".format(class_name=self.class_.class_name, class_cname=self.class_.class_cname,
 		none_trace=self.format_return_none_trace(),
 		get_user_data_func_call=get_user_data_func_call, set_user_data_func_call=set_user_data_func_call,
 		ref_native_pointer_code=ref_native_pointer_code)
@@ -711,10 +921,10 @@ class DeallocMethodDefinition(MethodDefinition):
 		MethodDefinition.__init__(self, linphone_module, class_, "dealloc", method_node)
 
 	def format_local_variables_definition(self):
-		func = "pylinphone_{class_name}_get_native_ptr".format(class_name=self.class_['class_name'])
+		func = "pylinphone_{class_name}_get_native_ptr".format(class_name=self.class_.class_name)
 		return \
 """	{arg_type} * native_ptr = {func}(self);
-""".format(arg_type=self.class_['class_cname'], func=func)
+""".format(arg_type=self.class_.class_cname, func=func)
 
 	def format_arguments_parsing(self):
 		# Check that the dealloc is not called a second time because of reentrancy
@@ -725,28 +935,39 @@ class DeallocMethodDefinition(MethodDefinition):
 
 	def format_c_function_call(self):
 		reset_user_data_code = ''
-		if self.class_['class_name'] != 'Core' and self.class_['class_has_user_data']:
+		if self.class_.class_name != 'Core' and self.class_.class_has_user_data:
 			reset_user_data_code += \
 """if (native_ptr != NULL) {{
 		{function_prefix}set_user_data(native_ptr, NULL);
 	}}
-""".format(function_prefix=self.class_['class_c_function_prefix'])
+""".format(function_prefix=self.class_.class_c_function_prefix)
+		elif self.class_.class_has_identity_map:
+			reset_user_data_code += \
+"""if (native_ptr != NULL) {{
+		pylinphone_identity_map_remove(&pylinphone_{class_name}_identity_map, native_ptr, self);
+	}}
+""".format(class_name=self.class_.class_name)
+		if self.class_.class_name == 'Core':
+			# The queued events keep references on the core, drop them before releasing it
+			if reset_user_data_code != '':
+				reset_user_data_code += "\t"
+			reset_user_data_code += "pylinphone_event_queue_clear(self);\n"
 		native_ptr_dealloc_code = ''
 		specific_member_decref_code = ''
-		if self.class_['class_refcountable']:
+		if self.class_.class_refcountable:
 			native_ptr_dealloc_code += \
 """	if (native_ptr != NULL) {{
 		{function_prefix}unref(native_ptr);
 	}}
-""".format(function_prefix=self.class_['class_c_function_prefix'])
-		elif self.class_['class_destroyable']:
+""".format(function_prefix=self.class_.class_c_function_prefix)
+		elif self.class_.class_destroyable:
 			native_ptr_dealloc_code += \
 """	if (native_ptr != NULL) {{
 		{function_prefix}destroy(native_ptr);
 	}}
-""".format(function_prefix=self.class_['class_c_function_prefix'])
-		for member in self.class_['class_object_members']:
-			specific_member_decref_code += "\tPy_XDECREF(((pylinphone_{class_name}Object *)self)->{member});\n".format(class_name=self.class_['class_name'], member=member)
+""".format(function_prefix=self.class_.class_c_function_prefix)
+		for member in self.class_.class_object_members:
+			specific_member_decref_code += "\tPy_XDECREF(((pylinphone_{class_name}Object *)self)->{member});\n".format(class_name=self.class_.class_name, member=member)
 		return \
 """	{reset_user_data_code}
 	{native_ptr_dealloc_code}
@@ -754,7 +975,7 @@ class DeallocMethodDefinition(MethodDefinition):
 	Py_XDECREF(((pylinphone_{class_name}Object *)self)->user_data);
 {specific_member_decref_code}
 	self->ob_type->tp_free(self);
-""".format(class_name=self.class_['class_name'], reset_user_data_code=reset_user_data_code, native_ptr_dealloc_code=native_ptr_dealloc_code, specific_member_decref_code=specific_member_decref_code)
+""".format(class_name=self.class_.class_name, reset_user_data_code=reset_user_data_code, native_ptr_dealloc_code=native_ptr_dealloc_code, specific_member_decref_code=specific_member_decref_code)
 
 	def format_return_trace(self):
 		return "\tpylinphone_trace(-1, \"[PYLINPHONE] <<< %s\", __FUNCTION__);"
@@ -766,7 +987,7 @@ class DeallocMethodDefinition(MethodDefinition):
 		return \
 """static void pylinphone_{class_name}_dealloc(PyObject *self) {{
 {method_body}
-}}""".format(class_name=self.class_['class_name'], method_body=MethodDefinition.format(self))
+}}""".format(class_name=self.class_.class_name, method_body=MethodDefinition.format(self))
 
 class GetterMethodDefinition(MethodDefinition):
 	def __init__(self, linphone_module, class_, method_name = "", method_node = None):
@@ -801,7 +1022,7 @@ class SetterMethodDefinition(MethodDefinition):
 """Py_XDECREF(((pylinphone_{class_name}Object *)self)->{callback_name});
 	Py_INCREF(value);
 	((pylinphone_{class_name}Object *)self)->{callback_name} = value;
-""".format(class_name=self.class_['class_name'], callback_name=compute_event_name(self.first_arg_complete_type, self.class_['class_name']))
+""".format(class_name=self.class_.class_name, callback_name=compute_event_name(self.first_arg_complete_type, self.class_.class_name))
 		if (self.first_argument_type.convert_code is None) or \
 			(self.first_argument_type.fmt_str == 'O' and self.first_argument_type.convert_code is not None):
 			attribute_conversion_code += "{arg_name} = value;\n".format(arg_name="_" + self.first_arg_name)
@@ -845,7 +1066,7 @@ class SetterMethodDefinition(MethodDefinition):
 			return \
 """	{method_name}(native_ptr, pylinphone_{class_name}_callback_{callback_name});
 	pylinphone_dispatch_messages();
-""".format(method_name=self.method_node.get('name'), class_name=self.class_['class_name'], callback_name=compute_event_name(self.first_argument_type.complete_type, self.class_['class_name']))
+""".format(method_name=self.method_node.get('name'), class_name=self.class_.class_name, callback_name=compute_event_name(self.first_argument_type.complete_type, self.class_.class_name))
 		cfree_argument_code = ''
 		suffix = ''
 		if self.first_argument_type.fmt_str == 'O' and self.first_argument_type.use_native_pointer:
@@ -856,11 +1077,12 @@ class SetterMethodDefinition(MethodDefinition):
 					cfree_argument_code = \
 """{free_func}({arg_name}_native_obj);
 """.format(free_func=self.first_argument_type.free_convert_result_func, arg_name="_" + self.first_arg_name)
+		c_function_call_code = "{method_name}(native_ptr, {arg_name}{suffix});".format(arg_name="_" + self.first_arg_name, method_name=self.method_node.get('name'), suffix=suffix)
 		return \
-"""	{method_name}(native_ptr, {arg_name}{suffix});
+"""	{c_function_call_code}
 	{cfree_argument_code}
 	pylinphone_dispatch_messages();
-""".format(arg_name="_" + self.first_arg_name, method_name=self.method_node.get('name'), suffix=suffix, cfree_argument_code=cfree_argument_code)
+""".format(c_function_call_code=self.format_native_call(c_function_call_code), cfree_argument_code=cfree_argument_code)
 
 	def format_return_trace(self):
 		return "\tpylinphone_trace(-1, \"[PYLINPHONE] <<< %s -> 0\", __FUNCTION__);\n"
@@ -878,44 +1100,182 @@ class SetterMethodDefinition(MethodDefinition):
 		self.first_arg_complete_type = self.xml_method_args[0].get('completetype')
 		self.first_arg_contained_type = self.xml_method_args[0].get('containedtype')
 		self.first_arg_name = self.xml_method_args[0].get('name')
-		self.first_argument_type = ArgumentType(self.first_arg_type, self.first_arg_complete_type, self.first_arg_contained_type, self.linphone_module)
+		self.first_argument_type = self.linphone_module.argument_type(self.first_arg_type, self.first_arg_complete_type, self.first_arg_contained_type)
 		self.first_arg_class = strip_leading_linphone(self.first_arg_type)
 
 class EventCallbackMethodDefinition(MethodDefinition):
+	# Py_BuildValue() formats of the arguments that are copied as they are in the record of a queued event
+	queued_scalar_formats = ['b', 'c', 'd', 'f', 'h', 'i', 'k', 'l', 'n', 'H', 'I', 'K', 'L']
+
 	def __init__(self, linphone_module, class_, method_name = "", method_node = None):
 		MethodDefinition.__init__(self, linphone_module, class_, method_name, method_node)
 
+	def get_callbacks_funcname(self, nocallbacks_class_name):
+		if self.find_property_definition(nocallbacks_class_name, 'current_callbacks') is not None:
+			return 'get_current_callbacks'
+		return 'get_callbacks'
+
 	def format_local_variables_definition(self):
-		class_name = self.class_['event_class']
+		class_name = self.class_.event_class
 		nocallbacks_class_name = class_name
 		if class_name.endswith('Cbs'):
 			nocallbacks_class_name = class_name[:-3]
-		has_current_callbacks = self.find_property_definition(nocallbacks_class_name, 'current_callbacks')
-		if has_current_callbacks is not None:
-			get_callbacks_funcname = 'get_current_callbacks'
-		else:
-			get_callbacks_funcname = 'get_callbacks'
+		get_callbacks_funcname = self.get_callbacks_funcname(nocallbacks_class_name)
 		returnvars = self.format_local_return_variables_definition()
 		common = \
 """	pylinphone_{class_name}Object *pyself = (pylinphone_{class_name}Object *){function_prefix}get_user_data(self);
 	PyObject *func;
 	PyObject *args;
-	PyGILState_STATE pygil_state;""".format(class_name=nocallbacks_class_name, function_prefix=self.find_class_definition(nocallbacks_class_name)['class_c_function_prefix'])
+	PyGILState_STATE pygil_state;""".format(class_name=nocallbacks_class_name, function_prefix=self.find_class_definition(nocallbacks_class_name).class_c_function_prefix)
 		if class_name.endswith('Cbs'):
 			common += """
 	pylinphone_{class_name}Object *pycbs = (pylinphone_{class_name}Object *){cbs_function_prefix}get_user_data({function_prefix}{get_callbacks_funcname}(self));
-""".format(class_name=class_name, cbs_function_prefix=self.find_class_definition(class_name)['class_c_function_prefix'], function_prefix=self.find_class_definition(nocallbacks_class_name)['class_c_function_prefix'], get_callbacks_funcname=get_callbacks_funcname)
+""".format(class_name=class_name, cbs_function_prefix=self.find_class_definition(class_name).class_c_function_prefix, function_prefix=self.find_class_definition(nocallbacks_class_name).class_c_function_prefix, get_callbacks_funcname=get_callbacks_funcname)
 		specific = ''
 		for xml_method_arg in self.xml_method_args:
 			arg_name = xml_method_arg.get('name')
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			if argument_type.fmt_str == 'O':
 				specific += "\tPyObject * py" + arg_name + " = NULL;\n"
 		return "{returnvars}\n{common}\n{specific}".format(returnvars=returnvars, common=common, specific=specific)
 
+	def queued_event_arguments(self):
+		# Return the arguments stored in the record of the event when it is queued, as (name, kind, C type, class) tuples,
+		# or None if the event must always be delivered at once
+		class_name = self.class_.event_class
+		if self.return_complete_type != 'void' or not class_name.endswith('Cbs'):
+			return None
+		self_class = self.find_class_definition(class_name[:-3])
+		cbs_class = self.find_class_definition(class_name)
+		if self_class is None or cbs_class is None or not self_class.class_refcountable or not cbs_class.class_refcountable:
+			return None
+		if self.queued_event_core() is None:
+			return None
+		arguments = []
+		for xml_method_arg in self.xml_method_args:
+			arg_name = xml_method_arg.get('name')
+			arg_type = xml_method_arg.get('type')
+			arg_complete_type = xml_method_arg.get('completetype')
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, xml_method_arg.get('containedtype'))
+			if argument_type.fmt_str in self.queued_scalar_formats:
+				arguments.append((arg_name, argument_type.fmt_str, arg_complete_type.replace('const ', ''), None))
+			elif argument_type.fmt_str == 'z':
+				arguments.append((arg_name, 'z', 'char *', None))
+			elif argument_type.fmt_str == 'O' and argument_type.type_str == 'bool':
+				arguments.append((arg_name, 'N', arg_complete_type, None))
+			elif argument_type.fmt_str == 'O' and argument_type.use_native_pointer:
+				arg_class = self.find_class_definition(arg_type)
+				if arg_class is None or not arg_class.class_refcountable:
+					return None
+				arguments.append((arg_name, 'O', arg_class.class_cname + ' *', arg_class))
+			else:
+				return None
+		return arguments
+
+	def queued_event_core(self):
+		# Return the expression giving the core whose queue receives the event, or None if it can not be found
+		self_class = self.find_class_definition(self.class_.event_class[:-3])
+		if self_class.class_name == 'Core':
+			return 'self'
+		get_core_funcname = self_class.class_c_function_prefix + 'get_core'
+		if self_class.class_xml_node.find("./instancemethods/instancemethod[@name='" + get_core_funcname + "']") is None:
+			return None
+		return get_core_funcname + '(self)'
+
+	def format_queued_event(self, arguments):
+		# Return the definitions of the record of the event and of its functions, and the code queuing it in the callback
+		class_name = self.class_.event_class
+		event_name = self.class_.event_name
+		self_class = self.find_class_definition(class_name[:-3])
+		cbs_class = self.find_class_definition(class_name)
+		record_type = "pylinphone_{class_name}_{event_name}_Event".format(class_name=class_name, event_name=event_name)
+		members = ''
+		copy_code = ''
+		build_variables = ''
+		release_code = ''
+		fmt = 'O'
+		build_args = ['pyself']
+		build_objects = []
+		for (arg_name, kind, ctype, arg_class) in arguments:
+			members += "\t{ctype} {name};\n".format(ctype=ctype, name=arg_name)
+			if kind == 'z':
+				copy_code += "\t\t\tev->{name} = ({name} != NULL) ? bctbx_strdup({name}) : NULL;\n".format(name=arg_name)
+				release_code += "\tbctbx_free(ev->{name});\n".format(name=arg_name)
+				build_args.append('ev->' + arg_name)
+			elif kind == 'O':
+				copy_code += "\t\t\tev->{name} = ({ctype}){name};\n\t\t\tif ({name} != NULL) {prefix}ref(ev->{name});\n".format(name=arg_name, ctype=ctype, prefix=arg_class.class_c_function_prefix)
+				release_code += "\tif (ev->{name} != NULL) {prefix}unref(ev->{name});\n".format(name=arg_name, prefix=arg_class.class_c_function_prefix)
+				build_variables += "\t\tPyObject *py{name} = pylinphone_{arg_class}_from_native_ptr(&pylinphone_{arg_class}Type, ev->{name}, TRUE);\n".format(name=arg_name, arg_class=arg_class.class_name)
+				build_objects.append('py' + arg_name)
+				build_args.append('py' + arg_name)
+				kind = 'N'
+			elif kind == 'N':
+				copy_code += "\t\t\tev->{name} = {name};\n".format(name=arg_name)
+				build_args.append("PyBool_FromLong(ev->{name})".format(name=arg_name))
+			else:
+				copy_code += "\t\t\tev->{name} = {name};\n".format(name=arg_name)
+				build_args.append('ev->' + arg_name)
+			fmt += kind
+		if len(build_objects) > 0:
+			# from_native_ptr() returns a borrowed reference, take the one Py_BuildValue() steals with the "N" format
+			build_variables += "\t\tif ({condition}) return NULL;\n".format(condition=' || '.join(("({name} == NULL)" if len(build_objects) > 1 else "{name} == NULL").format(name=name) for name in build_objects))
+			for name in build_objects:
+				build_variables += "\t\tPy_INCREF({name});\n".format(name=name)
+		definitions = \
+"""typedef struct {{
+	pylinphone_Event base;
+	{self_cname} *self;
+	{cbs_cname} *cbs;
+{members}}} {record_type};
+
+static PyObject * pylinphone_{class_name}_event_build_{event_name}(pylinphone_Event *event) {{
+	{record_type} *ev = ({record_type} *)event;
+	pylinphone_{self_class_name}Object *pyself = (pylinphone_{self_class_name}Object *){self_prefix}get_user_data(ev->self);
+	pylinphone_{class_name}Object *pycbs = (pylinphone_{class_name}Object *){cbs_prefix}get_user_data(ev->cbs);
+	PyObject *func;
+	if ((pyself == NULL) || (pycbs == NULL)) return NULL;
+	func = pycbs->{event_name};
+	if ((func == NULL) || !PyCallable_Check(func)) return NULL;
+	{{
+{build_variables}		return Py_BuildValue("O({fmt})", func, {build_args});
+	}}
+}}
+
+static void pylinphone_{class_name}_event_release_{event_name}(pylinphone_Event *event) {{
+	{record_type} *ev = ({record_type} *)event;
+	{self_prefix}unref(ev->self);
+	{cbs_prefix}unref(ev->cbs);
+{release_code}}}
+
+""".format(self_cname=self_class.class_cname, cbs_cname=cbs_class.class_cname, members=members, record_type=record_type,
+		class_name=class_name, event_name=event_name, self_class_name=self_class.class_name,
+		self_prefix=self_class.class_c_function_prefix, cbs_prefix=cbs_class.class_c_function_prefix,
+		build_variables=build_variables, fmt=fmt, build_args=', '.join(build_args), release_code=release_code)
+		# Only the events that would be delivered are queued, and never while the wrappers are being destroyed
+		queue_code = \
+"""	if (pylinphone_events_queued && (func != NULL) && PyCallable_Check(func)) {{
+		PyObject *pycore = pylinphone_event_queue_owner({core});
+		if (pycore != NULL) {{
+			{record_type} *ev = ({record_type} *)bctbx_malloc0(sizeof({record_type}));
+			ev->base.build = pylinphone_{class_name}_event_build_{event_name};
+			ev->base.release = pylinphone_{class_name}_event_release_{event_name};
+			ev->self = self;
+			{self_prefix}ref(ev->self);
+			ev->cbs = {self_prefix}{get_callbacks_funcname}(self);
+			{cbs_prefix}ref(ev->cbs);
+{copy_code}			pylinphone_event_queue_push(pycore, &ev->base);
+			PyGILState_Release(pygil_state);
+			return;
+		}}
+	}}
+""".format(record_type=record_type, class_name=class_name, event_name=event_name, core=self.queued_event_core(),
+		self_prefix=self_class.class_c_function_prefix, cbs_prefix=cbs_class.class_c_function_prefix,
+		get_callbacks_funcname=self.get_callbacks_funcname(self_class.class_name), copy_code=copy_code)
+		return (definitions, queue_code)
+
 	def format_arguments_parsing(self):
 		return_str = ''
 		if self.return_complete_type == 'int':
@@ -923,14 +1283,19 @@ class EventCallbackMethodDefinition(MethodDefinition):
 		elif self.return_complete_type == 'bool_t':
 			return_str = 'FALSE'
 		elif self.return_complete_type != 'void':
-			argument_type = ArgumentType(self.return_type, self.return_complete_type, self.return_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(self.return_type, self.return_complete_type, self.return_contained_type)
 			if argument_type.fmt_str == 'O':
 				return_str = 'NULL'
+		# The GIL may not be held when liblinphone is called by a function listed in gil_releasing_functions,
+		# so take it before accessing the Python objects
 		return \
-"""	if (Py_REFCNT(pyself) <= 0) return {return_str};
+"""	pygil_state = PyGILState_Ensure();
+	if ((pyself == NULL) || (Py_REFCNT(pyself) <= 0) || (pycbs == NULL)) {{
+		PyGILState_Release(pygil_state);
+		return {return_str};
+	}}
 	func = pycbs->{event_name};
-	pygil_state = PyGILState_Ensure();
-""".format(event_name=self.class_['event_name'], return_str=return_str)
+""".format(event_name=self.class_.event_name, return_str=return_str)
 
 	def format_enter_trace(self):
 		fmt = '%p'
@@ -942,7 +1307,7 @@ class EventCallbackMethodDefinition(MethodDefinition):
 			arg_contained_type = xml_method_arg.get('containedtype')
 			if fmt != '':
 				fmt += ', '
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			fmt += argument_type.cfmt_str
 			args.append(arg_name)
 		args=', '.join(args)
@@ -960,7 +1325,7 @@ class EventCallbackMethodDefinition(MethodDefinition):
 			arg_type = xml_method_arg.get('type')
 			arg_complete_type = xml_method_arg.get('completetype')
 			arg_contained_type = xml_method_arg.get('containedtype')
-			argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(arg_type, arg_complete_type, arg_contained_type)
 			fmt += argument_type.fmt_str
 			if argument_type.fmt_str == 'O':
 				args.append('py' + arg_name)
@@ -974,7 +1339,7 @@ class EventCallbackMethodDefinition(MethodDefinition):
 					create_python_objects_code += "\t\tpy{name} = pylinphone_{arg_type}_from_native_ptr(&pylinphone_{arg_type}Type, {name}, TRUE);\n".format(name=arg_name, arg_type=strip_leading_linphone(arg_type))
 		args=', '.join(args)
 		if self.return_complete_type != 'void':
-			argument_type = ArgumentType(self.return_type, self.return_complete_type, self.return_contained_type, self.linphone_module)
+			argument_type = self.linphone_module.argument_type(self.return_type, self.return_complete_type, self.return_contained_type)
 			if argument_type.is_linphone_object:
 				convert_python_result_code = \
 """		if ((pyresult != Py_None) && !PyObject_IsInstance(pyresult, (PyObject *)&pylinphone_{class_name}Type)) {{
@@ -1022,7 +1387,14 @@ class EventCallbackMethodDefinition(MethodDefinition):
 
 	def format(self):
 		body = MethodDefinition.format(self)
-		class_name = self.class_['event_class']
+		queued_event_definitions = ''
+		queued_event_arguments = self.queued_event_arguments()
+		if queued_event_arguments is not None:
+			# Events without result and whose arguments can be kept can be queued instead of being delivered at once
+			(queued_event_definitions, queue_code) = self.format_queued_event(queued_event_arguments)
+			func_code = "\tfunc = pycbs->{event_name};\n".format(event_name=self.class_.event_name)
+			body = body.replace(func_code, func_code + queue_code, 1)
+		class_name = self.class_.event_class
 		nocallbacks_class_name = class_name
 		if class_name.endswith('Cbs'):
 			nocallbacks_class_name = class_name[:-3]
@@ -1033,33 +1405,34 @@ class EventCallbackMethodDefinition(MethodDefinition):
 			arg_complete_type = xml_method_arg.get('completetype')
 			arguments.append(arg_complete_type + ' ' + arg_name)
 		definition = \
-"""static {returntype} pylinphone_{class_name}_callback_{event_name}({arguments}) {{
+"""{queued_event_definitions}static {returntype} pylinphone_{class_name}_callback_{event_name}({arguments}) {{
 {body}
 }}
-""".format(returntype=self.return_complete_type, class_name=class_name, event_name=self.class_['event_name'], arguments=', '.join(arguments), body=body)
+""".format(queued_event_definitions=queued_event_definitions, returntype=self.return_complete_type, class_name=class_name, event_name=self.class_.event_name, arguments=', '.join(arguments), body=body)
 		return definition
 
 
 class LinphoneModule(object):
-	def __init__(self, tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_codes):
-		self.known_types = ['char', 'int', 'int8_t', 'int16_t', 'int32_t', 'int64_t', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t', 'bool_t', 'float', 'double', 'size_t', 'time_t', 'MSList', 'bctbx_list_t', 'MSVideoSize', 'LCSipTransports', 'LinphoneStatus']
+	def __init__(self, tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_codes, use_varargs = False, strip_traces = False, lazy_list_functions = [], gil_releasing_functions = []):
+		self.use_varargs = use_varargs
+		self.strip_traces = strip_traces
+		self.gil_releasing_functions = set(gil_releasing_functions)
+		self.types = TypeRegistry(['char', 'int', 'int8_t', 'int16_t', 'int32_t', 'int64_t', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t', 'bool_t', 'float', 'double', 'size_t', 'time_t', 'MSList', 'bctbx_list_t', 'MSVideoSize', 'LCSipTransports', 'LinphoneStatus'])
 		self.internal_instance_method_names = ['destroy', 'ref', 'unref']
 		self.internal_property_names = ['user_data']
 		self.bctbxlist_types = set([])
+		self.argument_types = {}
 		self.enums = []
-		self.enum_names = []
 		self.cfunction2methodmap = {}
 		hand_written_functions = []
 		for hand_written_code in hand_written_codes:
 			hand_written_functions += hand_written_code.func_list
 		xml_enums = tree.findall("./enums/enum")
 		for xml_enum in xml_enums:
-			e = {}
-			e['enum_cname'] = xml_enum.get('name')
-			e['enum_name'] = strip_leading_linphone(e['enum_cname'])
-			e['enum_doc'] = self.__format_doc_content(xml_enum.find('briefdescription'), xml_enum.find('detaileddescription'))
-			e['enum_doc'] = self.__replace_doc_special_chars(e['enum_doc'])
-			e['enum_doc'] += """
+			e = EnumRecord(xml_enum.get('name'))
+			e.enum_doc = self.__format_doc_content(xml_enum.find('briefdescription'), xml_enum.find('detaileddescription'))
+			e.enum_doc = self.__replace_doc_special_chars(e.enum_doc)
+			e.enum_doc += """
 
 .. csv-table::
    :delim: |
@@ -1067,132 +1440,87 @@ class LinphoneModule(object):
    :header: Value,Description
 
 """
-			e['enum_values'] = []
-			e['enum_deprecated_values'] = []
 			xml_enum_values = xml_enum.findall("./values/value")
 			for xml_enum_value in xml_enum_values:
-				v = {}
-				v['enum_value_cname'] = xml_enum_value.get('name')
-				valname = strip_leading_linphone(v['enum_value_cname'])
-				v['enum_value_name'] = remove_useless_enum_prefix(e['enum_name'], valname)
-				v['enum_value_doc'] = self.__format_doc(xml_enum_value.find('briefdescription'), xml_enum_value.find('detaileddescription'))
-				e['enum_doc'] += '   ' + v['enum_value_name'] + '|' + v['enum_value_doc'] + '\n'
-				e['enum_values'].append(v)
-				if v['enum_value_name'] != valname:
+				valname = strip_leading_linphone(xml_enum_value.get('name'))
+				v = EnumValueRecord(xml_enum_value.get('name'), remove_useless_enum_prefix(e.enum_name, valname),
+					self.__format_doc(xml_enum_value.find('briefdescription'), xml_enum_value.find('detaileddescription')))
+				e.enum_doc += '   ' + v.enum_value_name + '|' + v.enum_value_doc + '\n'
+				e.enum_values.append(v)
+				if v.enum_value_name != valname:
 					# TODO: To remove. Add deprecated value name.
-					v = {}
-					v['enum_value_cname'] = xml_enum_value.get('name')
-					v['enum_value_name'] = strip_leading_linphone(v['enum_value_cname'])
-					v['enum_value_doc'] = self.__format_doc(xml_enum_value.find('briefdescription'), xml_enum_value.find('detaileddescription'))
-					e['enum_deprecated_values'].append(v)
-			e['enum_doc'] = self.__replace_doc_special_chars(e['enum_doc'])
-			e['enum_doc'] = e['enum_doc'].encode('unicode_escape')
+					v = EnumValueRecord(xml_enum_value.get('name'), valname,
+						self.__format_doc(xml_enum_value.find('briefdescription'), xml_enum_value.find('detaileddescription')))
+					e.enum_deprecated_values.append(v)
+			e.enum_doc = self.__replace_doc_special_chars(e.enum_doc)
+			e.enum_doc = e.enum_doc.encode('unicode_escape')
 			self.enums.append(e)
-			self.enum_names.append(e['enum_name'])
-			self.known_types.append(e['enum_cname'])
+			self.types.add_enum(e)
 		self.core_events = []
 		self.classes = []
 		xml_classes = tree.findall("./classes/class")
 		for xml_class in xml_classes:
 			if xml_class.get('name') in blacklisted_classes:
 				continue
-			c = {}
-			c['class_xml_node'] = xml_class
-			c['class_cname'] = xml_class.get('name')
-			c['class_name'] = strip_leading_linphone(c['class_cname'])
-			c['class_c_function_prefix'] = xml_class.get('cfunctionprefix')
-			c['class_doc'] = self.__format_doc(xml_class.find('briefdescription'), xml_class.find('detaileddescription'))
-			c['class_doc'] = c['class_doc'].encode('unicode_escape')
-			c['class_refcountable'] = (xml_class.get('refcountable') == 'true')
-			c['class_destroyable'] = (xml_class.get('destroyable') == 'true')
-			c['class_has_user_data'] = False
-			c['class_type_methods'] = []
-			c['class_type_hand_written_methods'] = []
-			c['class_instance_hand_written_methods'] = []
-			c['class_hand_written_properties'] = []
-			c['class_object_members'] = []
-			c['class_object_members_code'] = ''
-			c['class_events'] = []
+			c = ClassRecord(xml_class)
+			c.class_doc = self.__format_doc(xml_class.find('briefdescription'), xml_class.find('detaileddescription'))
+			c.class_doc = c.class_doc.encode('unicode_escape')
 			xml_events = xml_class.findall("./events/event")
 			for xml_event in xml_events:
 				if xml_event.get('name') in blacklisted_events:
 						continue
-				ev = {}
-				ev['event_class'] = c['class_name']
-				ev['event_xml_node'] = xml_event
-				ev['event_cname'] = xml_event.get('name')
-				ev['event_name'] = compute_event_name(ev['event_cname'], c['class_name'])
-				ev['event_doc'] = self.__format_doc(xml_event.find('briefdescription'), xml_event.find('detaileddescription'))
-				ev['event_doc'] = ev['event_doc'].encode('unicode_escape')
-				c['class_events'].append(ev)
-				self.known_types.append(ev['event_cname'])
-				c['class_object_members'].append(ev['event_name'])
-				c['class_object_members_code'] += "\tPyObject *" + ev['event_name'] + ";\n"
+				ev = EventRecord(c.class_name, xml_event)
+				ev.event_doc = self.__format_doc(xml_event.find('briefdescription'), xml_event.find('detaileddescription'))
+				ev.event_doc = ev.event_doc.encode('unicode_escape')
+				c.class_events.append(ev)
+				self.types.add(ev.event_cname, TypeRegistry.CALLBACK)
+				c.class_object_members.append(ev.event_name)
+				c.class_object_members_code += "\tPyObject *" + ev.event_name + ";\n"
 			for hand_written_code in hand_written_codes:
-				if hand_written_code._class == c['class_name']:
+				if hand_written_code._class == c.class_name:
 					if isinstance(hand_written_code, HandWrittenClassMethod):
-						m = {}
-						m['method_name'] = hand_written_code.name
-						m['method_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						m['method_doc'] = m['method_doc'].encode('unicode_escape')
-						c['class_type_hand_written_methods'].append(m)
+						m = MethodRecord(hand_written_code.name, doc=self.__replace_doc_special_chars(hand_written_code.doc).encode('unicode_escape'))
+						c.class_type_hand_written_methods.append(m)
 					elif isinstance(hand_written_code, HandWrittenInstanceMethod):
-						m = {}
-						m['method_name'] = hand_written_code.name
-						m['method_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						m['method_doc'] = m['method_doc'].encode('unicode_escape')
-						c['class_instance_hand_written_methods'].append(m)
+						m = MethodRecord(hand_written_code.name, doc=self.__replace_doc_special_chars(hand_written_code.doc).encode('unicode_escape'))
+						c.class_instance_hand_written_methods.append(m)
 					elif isinstance(hand_written_code, HandWrittenDeallocMethod):
-						c['class_has_hand_written_dealloc'] = True
+						c.class_has_hand_written_dealloc = True
 					elif isinstance(hand_written_code, HandWrittenProperty):
-						p = {}
-						p['property_name'] = hand_written_code.name
-						if hand_written_code.getter_cfunction is None:
-							p['getter_reference'] = 'NULL'
-						else:
-							p['getter_reference'] = '(getter)pylinphone_' + c['class_name'] + '_get_' + p['property_name']
-						if hand_written_code.setter_cfunction is None:
-							p['setter_reference'] = 'NULL'
-						else:
-							p['setter_reference'] = '(setter)pylinphone_' + c['class_name'] + '_set_' + p['property_name']
-						p['property_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						p['property_doc'] = p['property_doc'].encode('unicode_escape')
-						c['class_hand_written_properties'].append(p)
+						p = PropertyRecord(hand_written_code.name, self.__replace_doc_special_chars(hand_written_code.doc).encode('unicode_escape'))
+						if hand_written_code.getter_cfunction is not None:
+							p.getter_reference = '(getter)pylinphone_' + c.class_name + '_get_' + p.property_name
+						if hand_written_code.setter_cfunction is not None:
+							p.setter_reference = '(setter)pylinphone_' + c.class_name + '_set_' + p.property_name
+						c.class_hand_written_properties.append(p)
 			xml_type_methods = xml_class.findall("./classmethods/classmethod")
 			for xml_type_method in xml_type_methods:
 				method_name = xml_type_method.get('name')
 				if method_name in blacklisted_functions:
 					continue
-				m = {}
-				m['method_name'] = method_name.replace(c['class_c_function_prefix'], '')
+				m = MethodRecord(method_name.replace(c.class_c_function_prefix, ''), xml_type_method)
 				if method_name not in hand_written_functions:
-					m['method_xml_node'] = xml_type_method
-					self.cfunction2methodmap[method_name] = ':py:meth:`linphone.' + c['class_name'] + '.' + m['method_name'] + '`'
-					c['class_type_methods'].append(m)
-			c['class_instance_methods'] = []
+					self.cfunction2methodmap[method_name] = ':py:meth:`linphone.' + c.class_name + '.' + m.method_name + '`'
+					c.class_type_methods.append(m)
 			xml_instance_methods = xml_class.findall("./instancemethods/instancemethod")
 			for xml_instance_method in xml_instance_methods:
 				method_name = xml_instance_method.get('name')
 				if method_name in blacklisted_functions:
 					continue
-				if method_name.replace(c['class_c_function_prefix'], '') in self.internal_instance_method_names:
+				if method_name.replace(c.class_c_function_prefix, '') in self.internal_instance_method_names:
 					continue
-				m = {}
-				m['method_name'] = method_name.replace(c['class_c_function_prefix'], '')
+				m = MethodRecord(method_name.replace(c.class_c_function_prefix, ''), xml_instance_method)
 				if method_name not in hand_written_functions:
-					m['method_xml_node'] = xml_instance_method
-					self.cfunction2methodmap[method_name] = ':py:meth:`linphone.' + c['class_name'] + '.' + m['method_name'] + '`'
-					c['class_instance_methods'].append(m)
-			c['class_properties'] = []
+					self.cfunction2methodmap[method_name] = ':py:meth:`linphone.' + c.class_name + '.' + m.method_name + '`'
+					c.class_instance_methods.append(m)
 			xml_properties = xml_class.findall("./properties/property")
 			for xml_property in xml_properties:
 				property_name = xml_property.get('name')
 				if property_name == 'user_data':
-					c['class_has_user_data'] = True
+					c.class_has_user_data = True
 				if property_name in self.internal_property_names:
 					continue
-				p = {}
-				p['property_name'] = property_name
+				p = PropertyRecord(property_name)
 				xml_property_getter = xml_property.find("./getter")
 				xml_property_setter = xml_property.find("./setter")
 				if xml_property_getter is not None:
@@ -1203,134 +1531,174 @@ class LinphoneModule(object):
 						continue
 				if xml_property_getter is not None:
 					xml_property_getter.set('property_name', property_name)
-					p['getter_name'] = xml_property_getter.get('name').replace(c['class_c_function_prefix'], '')
-					p['getter_xml_node'] = xml_property_getter
-					p['getter_reference'] = "(getter)pylinphone_" + c['class_name'] + "_" + p['getter_name']
-					p['getter_definition_begin'] = "static PyObject * pylinphone_" + c['class_name'] + "_" + p['getter_name'] + "(PyObject *self, void *closure) {"
-					p['getter_definition_end'] = "}"
-					self.cfunction2methodmap[xml_property_getter.get('name')] = ':py:attr:`linphone.' + c['class_name'] + '.' + property_name + '`'
-				else:
-					p['getter_reference'] = "NULL"
+					p.getter_name = xml_property_getter.get('name').replace(c.class_c_function_prefix, '')
+					p.getter_xml_node = xml_property_getter
+					p.getter_reference = "(getter)pylinphone_" + c.class_name + "_" + p.getter_name
+					p.getter_definition_begin = "static PyObject * pylinphone_" + c.class_name + "_" + p.getter_name + "(PyObject *self, void *closure) {"
+					p.getter_definition_end = "}"
+					self.cfunction2methodmap[xml_property_getter.get('name')] = ':py:attr:`linphone.' + c.class_name + '.' + property_name + '`'
 				if xml_property_setter is not None:
 					xml_property_setter.set('property_name', property_name)
-					p['setter_name'] = xml_property_setter.get('name').replace(c['class_c_function_prefix'], '')
-					p['setter_xml_node'] = xml_property_setter
-					p['setter_reference'] = "(setter)pylinphone_" + c['class_name'] + "_" + p['setter_name']
-					p['setter_definition_begin'] = "static int pylinphone_" + c['class_name'] + "_" + p['setter_name'] + "(PyObject *self, PyObject *value, void *closure) {"
-					p['setter_definition_end'] = "}"
-					self.cfunction2methodmap[xml_property_setter.get('name')] = ':py:attr:`linphone.' + c['class_name'] + '.' + property_name + '`'
-				else:
-					p['setter_reference'] = "NULL"
-				c['class_properties'].append(p)
+					p.setter_name = xml_property_setter.get('name').replace(c.class_c_function_prefix, '')
+					p.setter_xml_node = xml_property_setter
+					p.setter_reference = "(setter)pylinphone_" + c.class_name + "_" + p.setter_name
+					p.setter_definition_begin = "static int pylinphone_" + c.class_name + "_" + p.setter_name + "(PyObject *self, PyObject *value, void *closure) {"
+					p.setter_definition_end = "}"
+					self.cfunction2methodmap[xml_property_setter.get('name')] = ':py:attr:`linphone.' + c.class_name + '.' + property_name + '`'
+				c.class_properties.append(p)
 			self.classes.append(c)
-			self.known_types.append(c['class_cname'])
+			self.types.add_class(c)
+		self.__set_lazy_list_getters(lazy_list_functions)
 		# Format events definitions
 		for c in self.classes:
-			for ev in c['class_events']:
-				ev['event_callback_definition'] = EventCallbackMethodDefinition(self, ev, ev['event_name'], ev['event_xml_node']).format()
+			for ev in c.class_events:
+				ev.event_callback_definition = EventCallbackMethodDefinition(self, ev, ev.event_name, ev.event_xml_node).format()
 		# Format methods' bodies
 		for c in self.classes:
-			xml_new_method = c['class_xml_node'].find("./classmethods/classmethod[@name='" + c['class_c_function_prefix'] + "new']")
+			# The wrappers of the classes without user data are found back through an identity map. The native
+			# object must stay alive as long as its wrapper, and the map must be updated by the generated dealloc.
+			c.class_has_identity_map = c.class_refcountable and not c.class_has_user_data and not c.class_has_hand_written_dealloc
+			# The content of a linphone.Buffer can be accessed without copy through the buffer protocol. The number of
+			# exported views is counted so that the content is not replaced while it is being accessed.
+			if c.class_name == 'Buffer':
+				c.class_has_buffer_procs = True
+				c.class_object_members_code += "\tPy_ssize_t exports;\n"
+			# The events queued by the callbacks of the objects of a core, see linphone.set_event_queueing()
+			if c.class_name == 'Core':
+				c.class_object_members_code += "\tpylinphone_Event *event_queue_head;\n\tpylinphone_Event *event_queue_tail;\n"
+			xml_new_method = c.class_xml_node.find("./classmethods/classmethod[@name='" + c.class_c_function_prefix + "new']")
 			try:
-				c['new_body'] = NewMethodDefinition(self, c, xml_new_method).format()
+				c.new_body = NewMethodDefinition(self, c, xml_new_method).format()
 			except (UnknownTypeException) as e:
 				print(e)
-				c['blacklisted'] = True
+				c.blacklisted = True
 			except (Exception) as e:
-				e.args += (c['class_name'], 'new_body')
+				e.args += (c.class_name, 'new_body')
 				raise
 			try:
-				c['init_body'] = InitMethodDefinition(self, c, xml_new_method).format()
+				c.init_body = InitMethodDefinition(self, c, xml_new_method).format()
 			except (UnknownTypeException) as e:
 				print(e)
-				c['blacklisted'] = True
+				c.blacklisted = True
 			except (Exception) as e:
-				e.args += (c['class_name'], 'init_body')
+				e.args += (c.class_name, 'init_body')
 				raise
 			try:
-				c['from_native_pointer_body'] = FromNativePointerMethodDefinition(self, c).format()
+				c.from_native_pointer_body = FromNativePointerMethodDefinition(self, c).format()
 			except (UnknownTypeException) as e:
 				print(e)
-				c['blacklisted'] = True
+				c.blacklisted = True
 			except (Exception) as e:
-				e.args += (c['class_name'], 'from_native_pointer_body')
+				e.args += (c.class_name, 'from_native_pointer_body')
 				raise
-			for m in c['class_type_methods']:
+			for m in c.class_type_methods:
 				try:
-					m['method_body'] = MethodDefinition(self, c, m['method_name'], m['method_xml_node']).format()
-					m['method_doc'] = self.__format_method_doc(m['method_xml_node'])
-					m['method_doc'] = m['method_doc'].encode('unicode_escape')
+					method_definition = MethodDefinition(self, c, m.method_name, m.method_xml_node)
+					m.method_body = method_definition.format()
+					m.method_flags = method_definition.calling_convention()
+					m.method_doc = self.__format_method_doc(m.method_xml_node)
+					m.method_doc = m.method_doc.encode('unicode_escape')
 				except (UnknownTypeException) as e:
 					print(e)
-					m['blacklisted'] = True
+					m.blacklisted = True
 				except (Exception) as e:
-					e.args += (c['class_name'], m['method_name'])
+					e.args += (c.class_name, m.method_name)
 					raise
-			for m in c['class_instance_methods']:
+			for m in c.class_instance_methods:
 				try:
-					m['method_body'] = MethodDefinition(self, c, m['method_name'], m['method_xml_node']).format()
-					m['method_doc'] = self.__format_method_doc(m['method_xml_node'])
-					m['method_doc'] = m['method_doc'].encode('unicode_escape')
+					method_definition = MethodDefinition(self, c, m.method_name, m.method_xml_node)
+					m.method_body = method_definition.format()
+					m.method_flags = method_definition.calling_convention()
+					m.method_doc = self.__format_method_doc(m.method_xml_node)
+					m.method_doc = m.method_doc.encode('unicode_escape')
 				except (UnknownTypeException) as e:
 					print(e)
-					m['blacklisted'] = True
+					m.blacklisted = True
 				except (Exception) as e:
-					e.args += (c['class_name'], m['method_name'])
+					e.args += (c.class_name, m.method_name)
 					raise
-			for p in c['class_properties']:
-				p['property_doc'] = ''
-				if 'setter_xml_node' in p:
+			for p in c.class_properties:
+				p.property_doc = ''
+				if p.setter_xml_node is not None:
 					try:
-						p['setter_body'] = SetterMethodDefinition(self, c, p['property_name'], p['setter_xml_node']).format()
-						p['property_doc'] = self.__format_setter_doc(p['setter_xml_node'])
+						p.setter_body = SetterMethodDefinition(self, c, p.property_name, p.setter_xml_node).format()
+						p.property_doc = self.__format_setter_doc(p.setter_xml_node)
 					except (UnknownTypeException) as e:
 						print(e)
-						p['blacklisted'] = True
+						p.blacklisted = True
 					except (Exception) as e:
-						e.args += (c['class_name'], p['property_name'])
+						e.args += (c.class_name, p.property_name)
 						raise
-				if 'getter_xml_node' in p:
+				if p.getter_xml_node is not None:
 					try:
-						p['getter_body'] = GetterMethodDefinition(self, c, p['property_name'], p['getter_xml_node']).format()
-						if p['property_doc'] == '':
-							p['property_doc'] = self.__format_getter_doc(p['getter_xml_node'])
+						p.getter_body = GetterMethodDefinition(self, c, p.property_name, p.getter_xml_node).format()
+						if p.property_doc == '':
+							p.property_doc = self.__format_getter_doc(p.getter_xml_node)
 					except (UnknownTypeException) as e:
 						print(e)
-						p['blacklisted'] = True
+						p.blacklisted = True
 					except (Exception) as e:
-						e.args += (c['class_name'], p['property_name'])
+						e.args += (c.class_name, p.property_name)
 						raise
-				p['property_doc'] = p['property_doc'].encode('unicode_escape')
-			if not 'class_has_hand_written_dealloc' in c:
+				p.property_doc = p.property_doc.encode('unicode_escape')
+			if not c.class_has_hand_written_dealloc:
 				try:
-					if c['class_refcountable']:
-						xml_instance_method = c['class_xml_node'].find("./instancemethods/instancemethod[@name='" + c['class_c_function_prefix'] + "unref']")
-						c['dealloc_definition'] = DeallocMethodDefinition(self, c, xml_instance_method).format()
-					elif c['class_destroyable']:
-						xml_instance_method = c['class_xml_node'].find("./instancemethods/instancemethod[@name='" + c['class_c_function_prefix'] + "destroy']")
-						c['dealloc_definition'] = DeallocMethodDefinition(self, c, xml_instance_method).format()
+					if c.class_refcountable:
+						xml_instance_method = c.class_xml_node.find("./instancemethods/instancemethod[@name='" + c.class_c_function_prefix + "unref']")
+						c.dealloc_definition = DeallocMethodDefinition(self, c, xml_instance_method).format()
+					elif c.class_destroyable:
+						xml_instance_method = c.class_xml_node.find("./instancemethods/instancemethod[@name='" + c.class_c_function_prefix + "destroy']")
+						c.dealloc_definition = DeallocMethodDefinition(self, c, xml_instance_method).format()
 					else:
-						c['dealloc_definition'] = DeallocMethodDefinition(self, c).format()
+						c.dealloc_definition = DeallocMethodDefinition(self, c).format()
 				except (UnknownTypeException) as e:
 					print(e)
-					c['blacklisted'] = True
+					c.blacklisted = True
 				except (Exception) as e:
-					e.args += (c['class_name'], 'dealloc_body')
+					e.args += (c.class_name, 'dealloc_body')
 					raise
 		# Remove blacklisted classes and methods
-		self.classes = [c for c in self.classes if not 'blacklisted' in c]
+		self.classes = [c for c in self.classes if not c.blacklisted]
+		for c in self.classes:
+			c.class_type_methods = [m for m in c.class_type_methods if not m.blacklisted]
+			c.class_instance_methods = [m for m in c.class_instance_methods if not m.blacklisted]
+			c.class_properties = [m for m in c.class_properties if not m.blacklisted]
+		# Convert bctbxlist_types to a list of records for the template
+		self.bctbxlist_types = [BctbxListTypeRecord(t) for t in self.bctbxlist_types]
+
+	def __set_lazy_list_getters(self, lazy_list_functions):
+		# Map the getters returning a lazily converted list to the member of the object caching it
+		self.lazy_list_getters = {}
+		lazy_list_types = {}
 		for c in self.classes:
-			c['class_type_methods'] = [m for m in c['class_type_methods'] if not 'blacklisted' in m]
-			c['class_instance_methods'] = [m for m in c['class_instance_methods'] if not 'blacklisted' in m]
-			c['class_properties'] = [m for m in c['class_properties'] if not 'blacklisted' in m]
-		# Convert bctbxlist_types to a list of dictionaries for the template
-		d = []
-		for bctbxlist_type in self.bctbxlist_types:
-			t = {}
-			t['c_contained_type'] = bctbxlist_type
-			t['python_contained_type'] = strip_leading_linphone(bctbxlist_type)
-			d.append(t)
-		self.bctbxlist_types = d
+			for p in c.class_properties:
+				if p.getter_xml_node is None or p.getter_xml_node.get('name') not in lazy_list_functions:
+					continue
+				getter_name = p.getter_xml_node.get('name')
+				xml_return = p.getter_xml_node.find('./return')
+				contained_class = self.types.find_class(xml_return.get('containedtype') or '')
+				if xml_return.get('type') not in ['MSList', 'bctbx_list_t'] or not is_const_from_complete_type(xml_return.get('completetype')):
+					print("Cannot return the result of " + getter_name + " as a lazy list: it does not return a const list")
+				elif contained_class is None or not contained_class.class_refcountable:
+					print("Cannot return the result of " + getter_name + " as a lazy list: its elements are not refcountable objects")
+				elif p.setter_xml_node is not None:
+					print("Cannot return the result of " + getter_name + " as a lazy list: the property can be set with a list")
+				else:
+					member = p.property_name + '_lazy_list'
+					c.class_object_members.append(member)
+					c.class_object_members_code += "\tPyObject *" + member + ";\n"
+					self.lazy_list_getters[getter_name] = member
+					lazy_list_types[contained_class.class_name] = LazyListTypeRecord(contained_class)
+		self.lazy_list_types = [lazy_list_types[name] for name in sorted(lazy_list_types)]
+
+	def argument_type(self, basic_type, complete_type, contained_type):
+		# The ArgumentType of a given type is always the same, so compute it only once
+		key = (basic_type, complete_type, contained_type)
+		argument_type = self.argument_types.get(key)
+		if argument_type is None:
+			argument_type = ArgumentType(basic_type, complete_type, contained_type, self)
+			self.argument_types[key] = argument_type
+		return argument_type
 
 	def __format_doc_node(self, node):
 		desc = ''
@@ -1412,7 +1780,7 @@ class LinphoneModule(object):
 				arg_type = xml_method_arg.get('type')
 				arg_complete_type = xml_method_arg.get('completetype')
 				arg_contained_type = xml_method_arg.get('containedtype')
-				argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self)
+				argument_type = self.argument_type(arg_type, arg_complete_type, arg_contained_type)
 				arg_doc = self.__format_doc_content(None, xml_method_arg.find('description'))
 				doc += '\n:param ' + arg_name + ':'
 				if arg_doc != '':
@@ -1424,7 +1792,7 @@ class LinphoneModule(object):
 			return_contained_type = xml_method_return.get('containedtype')
 			if return_complete_type != 'void':
 				return_doc = self.__format_doc_content(None, xml_method_return.find('description'))
-				return_argument_type = ArgumentType(return_type, return_complete_type, return_contained_type, self)
+				return_argument_type = self.argument_type(return_type, return_complete_type, return_contained_type)
 				doc += '\n:returns: ' + return_doc
 				doc += '\n:rtype: ' + return_argument_type.type_str
 		doc = self.__replace_doc_cfunction_by_method(doc)
@@ -1437,7 +1805,7 @@ class LinphoneModule(object):
 		arg_type = xml_method_arg.get('type')
 		arg_complete_type = xml_method_arg.get('completetype')
 		arg_contained_type = xml_method_arg.get('containedtype')
-		argument_type = ArgumentType(arg_type, arg_complete_type, arg_contained_type, self)
+		argument_type = self.argument_type(arg_type, arg_complete_type, arg_contained_type)
 		doc = self.__format_doc_content(xml_node.find('briefdescription'), xml_node.find('detaileddescription'))
 		doc = '[' + argument_type.type_str + '] ' + doc
 		doc = self.__replace_doc_cfunction_by_method(doc)
@@ -1450,7 +1818,7 @@ class LinphoneModule(object):
 		return_type = xml_method_return.get('type')
 		return_complete_type = xml_method_return.get('completetype')
 		return_contained_type = xml_method_return.get('containedtype')
-		return_argument_type = ArgumentType(return_type, return_complete_type, return_contained_type, self)
+		return_argument_type = self.argument_type(return_type, return_complete_type, return_contained_type)
 		doc = self.__format_doc_content(xml_node.find('briefdescription'), xml_node.find('detaileddescription'))
 		doc = '[' + return_argument_type.type_str + '] ' + doc
 		doc = self.__replace_doc_cfunction_by_method(doc)
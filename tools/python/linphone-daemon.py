@@ -1,9 +1,12 @@
 import argparse
+import asyncio
+import collections
 import logging
+import os
+import stat
 import sys
-import threading
-import time
 import linphone
+import linphone_asyncio
 
 
 class Response:
@@ -12,6 +15,7 @@ class Response:
 
 	def __init__(self, status, msg = ''):
 		self.status = status
+		self.request_id = None
 		if status == Response.Ok:
 			self.body = msg
 			self.reason = None
@@ -22,6 +26,8 @@ class Response:
 	def __str__(self):
 		status_str = ["Ok", "Error"][self.status]
 		body = ''
+		if self.request_id is not None:
+			body += "Request-Id: {request_id}\n".format(request_id=self.request_id)
 		if self.reason:
 			body += "Reason: {reason}\n".format(reason=self.reason)
 		if self.body:
@@ -39,6 +45,24 @@ class RegisterStatusResponse(Response):
 """Id: {id}
 State: {state}
 """.format(id=id, state=str(linphone.RegistrationState.string(proxy_cfg.state)))
+		return self
+
+class Event:
+	"""Unsolicited notification sent to the clients that have subscribed to its kind of events."""
+	Call = 'call'
+	Registration = 'registration'
+	Kinds = [Call, Registration]
+
+	def __init__(self, kind, name, body):
+		self.kind = kind
+		self.name = name
+		self.body = body
+
+	def __str__(self):
+		return \
+"""Event: {name}
+{body}
+""".format(name=self.name, body=self.body)
 
 class CommandExample:
 	def __init__(self, command, output):
@@ -98,7 +122,7 @@ class CallCommand(Command):
 			if call is None:
 				app.send_response(Response(Response.Error, "Call creation failed."))
 			else:
-				id = app.update_call_id(call)
+				id = app.get_call_id(call)
 				app.send_response(Response(Response.Ok, "Id: " + str(id)))
 		else:
 			app.send_response(Response(Response.Error, "Missing parameter."))
@@ -329,6 +353,56 @@ class RegisterStatusCommand(Command):
 				else:
 					app.send_response(RegisterStatusResponse().append(id, proxy_cfg))
 
+class SubscribeCommand(Command):
+	"""Receive the events of the given kind (or of all kinds) on this connection until unsubscribing."""
+	def __init__(self):
+		Command.__init__(self, "subscribe", "subscribe <call|registration|ALL>")
+		self.add_example(CommandExample(
+			"subscribe call",
+			"Status: Ok\n\nSubscriptions: call"
+		))
+		self.add_example(CommandExample(
+			"subscribe presence",
+			"Status: Error\nReason: Unknown event kind."
+		))
+
+	def exec_command(self, app, args):
+		if len(args) == 0:
+			app.send_response(Response(Response.Error, "Missing parameter."))
+			return
+		if args[0] == "ALL":
+			kinds = Event.Kinds
+		elif args[0] in Event.Kinds:
+			kinds = [args[0]]
+		else:
+			app.send_response(Response(Response.Error, "Unknown event kind."))
+			return
+		app.current_client.subscriptions.update(kinds)
+		app.send_response(Response(Response.Ok, "Subscriptions: " + ' '.join(sorted(app.current_client.subscriptions))))
+
+class UnsubscribeCommand(Command):
+	"""Stop receiving the events of the given kind (or of all kinds) on this connection."""
+	def __init__(self):
+		Command.__init__(self, "unsubscribe", "unsubscribe <call|registration|ALL>")
+		self.add_example(CommandExample(
+			"unsubscribe ALL",
+			"Status: Ok\n\nSubscriptions: "
+		))
+
+	def exec_command(self, app, args):
+		if len(args) == 0:
+			app.send_response(Response(Response.Error, "Missing parameter."))
+			return
+		if args[0] == "ALL":
+			kinds = Event.Kinds
+		elif args[0] in Event.Kinds:
+			kinds = [args[0]]
+		else:
+			app.send_response(Response(Response.Error, "Unknown event kind."))
+			return
+		app.current_client.subscriptions.difference_update(kinds)
+		app.send_response(Response(Response.Ok, "Subscriptions: " + ' '.join(sorted(app.current_client.subscriptions))))
+
 class TerminateCommand(Command):
 	"""Terminate the specified call or the current call if no id is given."""
 	def __init__(self):
@@ -365,6 +439,92 @@ class TerminateCommand(Command):
 		app.send_response(Response(Response.Ok))
 
 
+class CommandProtocol(asyncio.Protocol):
+	"""Session of a client of the daemon: read the command lines it sends, send the responses back to it and push it
+	the events it has subscribed to.
+
+	A command line may start with a request id of the form #<id>, that is then given back in the response. The client
+	does not need to wait for a response before sending the next command, the responses are sent in order."""
+	# The longer command lines are rejected without being buffered
+	max_line_length = 65536
+
+	def __init__(self, daemon):
+		self.daemon = daemon
+		self.transport = None
+		self.subscriptions = set()
+		self._data = b''
+		self._line_too_long = False
+
+	def connection_made(self, transport):
+		self.transport = transport
+		self.daemon.clients.add(self)
+
+	def data_received(self, data):
+		lines = (self._data + data).split(b'\n')
+		self._data = lines.pop()
+		for line in lines:
+			if self._line_too_long or (len(line) > self.max_line_length):
+				self._line_too_long = False
+				self.daemon.queue_command(self, None)
+				continue
+			command_line = line.decode('utf-8', 'replace').strip()
+			if command_line != '':
+				self.daemon.queue_command(self, command_line)
+		if len(self._data) > self.max_line_length:
+			# Drop the beginning of the line, it is rejected when its end is received
+			self._data = b''
+			self._line_too_long = True
+
+	def eof_received(self):
+		self.data_received(b'\n')
+
+	def connection_lost(self, exc):
+		self.daemon.clients.discard(self)
+
+	def send_response(self, response):
+		if not self.transport.is_closing():
+			self.transport.write((str(response) + '\n').encode('utf-8'))
+
+	def send_event(self, event):
+		if event.kind in self.subscriptions:
+			self.send_response(event)
+
+class StdinCommandProtocol(CommandProtocol):
+	"""Read the command lines from the standard input and print the responses on the standard output."""
+	def __init__(self, daemon):
+		CommandProtocol.__init__(self, daemon)
+		self.interactive = sys.stdin.isatty()
+
+	def connection_made(self, transport):
+		CommandProtocol.connection_made(self, transport)
+		self.prompt()
+
+	def connection_lost(self, exc):
+		CommandProtocol.connection_lost(self, exc)
+		if not self.daemon.servers:
+			self.daemon.quit()
+
+	def prompt(self):
+		if self.interactive:
+			sys.stdout.write('> ')
+			sys.stdout.flush()
+
+	def send_response(self, response):
+		print(response)
+		self.prompt()
+
+class StdinReaderTransport(asyncio.ReadTransport):
+	"""Transport of the standard input when it is read by a thread, because it is neither a pipe nor a terminal."""
+	def __init__(self):
+		asyncio.ReadTransport.__init__(self)
+		self._closing = False
+
+	def close(self):
+		self._closing = True
+
+	def is_closing(self):
+		return self._closing
+
 class Daemon:
 	def __init__(self):
 		self.quitting = False
@@ -372,9 +532,17 @@ class Daemon:
 		self.proxy_ids_map = {}
 		self._next_call_id = 1
 		self.call_ids_map = {}
-		self.command_mutex = threading.Lock()
-		self.command_executed_event = threading.Event()
-		self.command_to_execute = None
+		self.loop = None
+		self.core = None
+		self.scheduler = None
+		self.servers = []
+		self.clients = set()
+		self.current_client = None
+		self.current_request_id = None
+		self.pending_commands = collections.deque()
+		self._execute_handle = None
+		self._stdin_task = None
+		self._quit_future = None
 		self.commands = [
 			CallCommand(),
 			CallPauseCommand(),
@@ -384,7 +552,9 @@ class Daemon:
 			QuitCommand(),
 			RegisterCommand(),
 			RegisterStatusCommand(),
-			TerminateCommand()
+			SubscribeCommand(),
+			TerminateCommand(),
+			UnsubscribeCommand()
 		]
 
 	def global_state_changed(self, core, state, message):
@@ -394,12 +564,28 @@ class Daemon:
 
 	def registration_state_changed(self, core, proxy_cfg, state, message):
 		logging.warning("[PYTHON] registration_state_changed: " + str(state) + ", " + message)
+		id = self.find_proxy_id(proxy_cfg)
+		if id is not None:
+			self.push_event(Event(Event.Registration, "registration-state-changed", "Id: {id}\nState: {state}\nMessage: {message}".format(
+				id=id, state=linphone.RegistrationState.string(state), message=message)))
 
 	def call_state_changed(self, core, call, state, message):
 		logging.warning("[PYTHON] call_state_changed: " + str(state) + ", " + message)
+		id = self.get_call_id(call)
+		self.push_event(Event(Event.Call, "call-state-changed", "Id: {id}\nState: {state}\nMessage: {message}".format(
+			id=id, state=linphone.CallState.string(state), message=message)))
+		if state == linphone.CallState.CallReleased:
+			# The call is not used anymore, forget its id
+			del self.call_ids_map[str(id)]
 
 	def send_response(self, response):
-		print(response)
+		if self.current_client is not None:
+			response.request_id = self.current_request_id
+			self.current_client.send_response(response)
+
+	def push_event(self, event):
+		for client in list(self.clients):
+			client.send_event(event)
 
 	def exec_command(self, command_line):
 		splitted_command_line = command_line.split()
@@ -411,44 +597,93 @@ class Daemon:
 		else:
 			self.send_response(Response(Response.Error, "Unknown command."))
 
-	def interact(self):
-		command_line = raw_input('> ').strip()
-		if command_line != '':
-			self.command_mutex.acquire()
-			self.command_to_execute = command_line
-			self.command_mutex.release()
-			self.command_executed_event.wait()
-			self.command_executed_event.clear()
+	def queue_command(self, client, command_line):
+		# The commands received meanwhile are executed together before the next iteration of the core
+		self.pending_commands.append((client, command_line))
+		if self._execute_handle is None:
+			self._execute_handle = self.loop.call_soon(self.execute_pending_commands)
+
+	def execute_pending_commands(self):
+		self._execute_handle = None
+		while self.pending_commands and not self.quitting:
+			(self.current_client, command_line) = self.pending_commands.popleft()
+			if command_line is None:
+				self.send_response(Response(Response.Error, "Command line too long."))
+				self.current_client = None
+				continue
+			if command_line.startswith('#'):
+				(self.current_request_id, _, command_line) = command_line[1:].partition(' ')
+				command_line = command_line.strip()
+			try:
+				if command_line == '':
+					self.send_response(Response(Response.Error, "Missing command."))
+				else:
+					self.exec_command(command_line)
+			except Exception:
+				logging.exception("[PYTHON] Error executing command '{command}'".format(command=command_line))
+				self.send_response(Response(Response.Error, "Internal error."))
+			finally:
+				self.current_client = None
+				self.current_request_id = None
+		# Let the core process the requests of the commands at once
+		self.scheduler.wakeup()
+
+	async def serve(self, args):
+		if args.unix_socket is not None:
+			self.servers.append(await self.loop.create_unix_server(lambda: CommandProtocol(self), args.unix_socket))
+		if args.tcp_port is not None:
+			self.servers.append(await self.loop.create_server(lambda: CommandProtocol(self), args.tcp_host, args.tcp_port))
+		if not args.no_stdin:
+			mode = os.fstat(sys.stdin.fileno()).st_mode
+			if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode):
+				await self.loop.connect_read_pipe(lambda: StdinCommandProtocol(self), sys.stdin)
+			else:
+				# A regular file can not be watched by the event loop, read it from a thread
+				self._stdin_task = self.loop.create_task(self.read_stdin(StdinCommandProtocol(self)))
+		elif not self.servers:
+			logging.error("[PYTHON] No command input, use --unix-socket or --tcp-port with --no-stdin")
+			return
+		await self._quit_future
+		if self._stdin_task is not None:
+			self._stdin_task.cancel()
+		for server in self.servers:
+			server.close()
+			await server.wait_closed()
+		for client in list(self.clients):
+			client.transport.close()
+
+	async def read_stdin(self, protocol):
+		transport = StdinReaderTransport()
+		protocol.connection_made(transport)
+		while not transport.is_closing():
+			data = await self.loop.run_in_executor(None, sys.stdin.buffer.readline, CommandProtocol.max_line_length + 1)
+			if not data:
+				protocol.eof_received()
+				break
+			protocol.data_received(data)
+		protocol.connection_lost(None)
 
 	def run(self, args):
-		def command_read(daemon):
-			while not daemon.quitting:
-				daemon.interact()
-
-		callbacks = {
-			'global_state_changed':self.global_state_changed,
-			'registration_state_changed':self.registration_state_changed,
-			'call_state_changed':self.call_state_changed
-		}
-
-		# Create a linphone core and iterate every 20 ms
-		self.core = linphone.Core.new(callbacks, args.config, args.factory_config)
-		t = threading.Thread(target=command_read, kwargs={'daemon':self})
-		t.start()
-		while not self.quitting:
-			self.command_mutex.acquire()
-			command_line = self.command_to_execute
-			if command_line is not None:
-				self.exec_command(command_line)
-				self.command_to_execute = None
-				self.command_executed_event.set()
-			self.command_mutex.release()
-			self.core.iterate()
-			time.sleep(0.02)
-		t.join()
+		self.loop = asyncio.get_event_loop()
+		self._quit_future = self.loop.create_future()
+		callbacks = linphone.Factory.get().create_core_cbs()
+		callbacks.global_state_changed = self.global_state_changed
+		callbacks.registration_state_changed = self.registration_state_changed
+		callbacks.call_state_changed = self.call_state_changed
+
+		# Create a linphone core, iterated from the event loop that also reads the commands
+		self.core = linphone.Factory.get().create_core(callbacks, args.config, args.factory_config)
+		self.scheduler = linphone_asyncio.CoreScheduler(self.core, self.loop)
+		self.scheduler.start()
+		try:
+			self.loop.run_until_complete(self.serve(args))
+		finally:
+			self.scheduler.stop()
 
 	def quit(self):
 		self.quitting = True
+		if (self._quit_future is not None) and not self._quit_future.done():
+			self._quit_future.set_result(None)
 
 	def update_proxy_id(self, proxy):
 		id = self._next_proxy_id
@@ -457,8 +692,12 @@ class Daemon:
 		return id
 
 	def find_proxy(self, id):
-		if self.proxy_ids_map.has_key(id):
-			return self.proxy_ids_map[id]
+		return self.proxy_ids_map.get(id)
+
+	def find_proxy_id(self, proxy):
+		for id in self.proxy_ids_map:
+			if self.proxy_ids_map[id] is proxy:
+				return id
 		return None
 
 	def update_call_id(self, call):
@@ -468,10 +707,21 @@ class Daemon:
 		return id
 
 	def find_call(self, id):
-		if self.call_ids_map.has_key(id):
-			return self.call_ids_map[id]
+		return self.call_ids_map.get(id)
+
+	def find_call_id(self, call):
+		for id in self.call_ids_map:
+			if self.call_ids_map[id] is call:
+				return id
 		return None
 
+	def get_call_id(self, call):
+		# The calls get an id at their first state change, before the call command returns for the outgoing ones
+		id = self.find_call_id(call)
+		if id is None:
+			id = self.update_call_id(call)
+		return id
+
 def setup_log_colors():
 	logging.addLevelName(logging.DEBUG, "\033[1;37m%s\033[1;0m" % logging.getLevelName(logging.DEBUG))
 	logging.addLevelName(logging.INFO, "\033[1;36m%s\033[1;0m" % logging.getLevelName(logging.INFO))
@@ -504,6 +754,10 @@ def main(argv = None):
 	argparser.add_argument('--factory_config', default=None, help="Path to the linphonerc factory configuration file to use.")
 	argparser.add_argument('--log', default=None, help="Path to the file used for logging (default is the standard output).")
 	argparser.add_argument('--trace', action='store_true', help="Output linphone Python module tracing logs (for debug purposes).")
+	argparser.add_argument('--unix-socket', default=None, help="Path of a Unix domain socket on which to accept the connections of clients sending commands.")
+	argparser.add_argument('--tcp-port', type=int, default=None, help="TCP port on which to accept the connections of clients sending commands.")
+	argparser.add_argument('--tcp-host', default='127.0.0.1', help="Address on which to listen with --tcp-port (default is 127.0.0.1).")
+	argparser.add_argument('--no-stdin', action='store_true', help="Do not read commands from the standard input.")
 	args = argparser.parse_args()
 	setup_log(args.log, args.trace)
 	linphone.set_log_handler(log_handler)
@@ -0,0 +1,212 @@
+"""Integration of the Linphone library with asyncio.
+
+A CoreScheduler iterates a linphone.Core from an asyncio event loop instead of a loop calling core.iterate() and
+sleeping a fixed time. The core is iterated often while it is active and less and less often while it is idle.
+The scheduler also gives awaitables waiting for the state changes of the calls and of the proxy configs:
+
+	scheduler = linphone_asyncio.CoreScheduler(core)
+	scheduler.start()
+	await scheduler.wait_registered(proxy_cfg)
+	call = core.invite('sip:bob@example.org')
+	await scheduler.wait_for_call_state(call, linphone.CallState.StreamsRunning)
+
+The state changes are notified by the callbacks of a linphone.CoreCbs that the scheduler adds to the core.
+"""
+
+import asyncio
+import linphone
+
+
+class StateError(Exception):
+	"""The object waited for has reached a final state other than the expected ones."""
+
+	def __init__(self, obj, state, message):
+		Exception.__init__(self, message)
+		self.obj = obj
+		self.state = state
+
+
+class CoreScheduler:
+	"""Iterate a linphone.Core from an asyncio event loop.
+
+	The core is iterated every min_interval seconds after anything has happened, and the interval doubles after
+	each iteration without any event up to max_interval. During calls the interval does not go above
+	call_interval.
+	"""
+
+	def __init__(self, core, loop=None, min_interval=0.001, max_interval=0.2, call_interval=0.02):
+		self.core = core
+		self.loop = loop if loop is not None else asyncio.get_event_loop()
+		self.min_interval = min_interval
+		self.max_interval = max_interval
+		self.call_interval = call_interval
+		self.interval = min_interval
+		self.iterations = 0
+		self._handle = None
+		self._active = False
+		self._iterating = False
+		self._call_state_waiters = []
+		self._registration_state_waiters = []
+		self._condition_waiters = []
+		self._cbs = linphone.Factory.get().create_core_cbs()
+		self._cbs.call_state_changed = self._call_state_changed
+		self._cbs.registration_state_changed = self._registration_state_changed
+		self._cbs.global_state_changed = self._activity
+		self._cbs.message_received = self._activity
+		self._cbs.notify_presence_received = self._activity
+		self._cbs.subscription_state_changed = self._activity
+		self._cbs.authentication_requested = self._activity
+
+	@property
+	def running(self):
+		return self._handle is not None
+
+	def start(self):
+		"""Start iterating the core. The scheduler adds its callbacks to the core."""
+		if self._handle is None:
+			self.core.add_callbacks(self._cbs)
+			self.interval = self.min_interval
+			self._handle = self.loop.call_soon(self._iterate)
+
+	def stop(self):
+		"""Stop iterating the core. The pending waits are cancelled."""
+		if self._handle is None:
+			return
+		self._handle.cancel()
+		self._handle = None
+		self.core.remove_callbacks(self._cbs)
+		for waiters in (self._call_state_waiters, self._registration_state_waiters, self._condition_waiters):
+			for waiter in waiters:
+				waiter[-1].cancel()
+			del waiters[:]
+
+	def wakeup(self):
+		"""Iterate the core as soon as possible, for example after a request has been made to it."""
+		self._active = True
+		if self._iterating:
+			# Called from a callback of the core, the next iteration is scheduled at the end of the current one
+			self.interval = self.min_interval
+		elif self._handle is not None:
+			self._handle.cancel()
+			self._handle = self.loop.call_soon(self._iterate)
+
+	def _iterate(self):
+		self._active = False
+		self._iterating = True
+		try:
+			self.core.iterate()
+		finally:
+			self._iterating = False
+		self.iterations += 1
+		self._check_conditions()
+		if self._active:
+			self.interval = self.min_interval
+		else:
+			max_interval = self.max_interval
+			if self.core.calls_nb > 0:
+				max_interval = min(max_interval, self.call_interval)
+			self.interval = min(self.interval * 2, max_interval)
+		if self._handle is not None:
+			# Only one iteration is ever scheduled, even if the scheduler has been restarted meanwhile
+			self._handle.cancel()
+			self._handle = self.loop.call_later(self.interval, self._iterate)
+
+	def _activity(self, *args):
+		self._active = True
+
+	def _call_state_changed(self, core, call, state, message):
+		self._active = True
+		self._notify(self._call_state_waiters, call, state, message,
+			(linphone.CallState.Error, linphone.CallState.End, linphone.CallState.Released))
+
+	def _registration_state_changed(self, core, proxy_cfg, state, message):
+		self._active = True
+		self._notify(self._registration_state_waiters, proxy_cfg, state, message,
+			(linphone.RegistrationState.Failed, linphone.RegistrationState.Cleared))
+
+	def _notify(self, waiters, obj, state, message, final_states):
+		for waiter in list(waiters):
+			(waited_obj, states, future) = waiter
+			if waited_obj is not obj or future.done():
+				continue
+			if state in states:
+				future.set_result(state)
+			elif state in final_states:
+				future.set_exception(StateError(obj, state, "Unexpected state {state}: {message}".format(state=state, message=message)))
+			else:
+				continue
+			waiters.remove(waiter)
+
+	def _check_conditions(self):
+		for waiter in list(self._condition_waiters):
+			(condition, future) = waiter
+			if future.done():
+				self._condition_waiters.remove(waiter)
+				continue
+			try:
+				result = condition()
+			except Exception as e:
+				future.set_exception(e)
+				self._condition_waiters.remove(waiter)
+				continue
+			if result:
+				future.set_result(result)
+				self._condition_waiters.remove(waiter)
+
+	async def _wait(self, waiters, waiter, timeout):
+		waiters.append(waiter)
+		self.wakeup()
+		try:
+			return await asyncio.wait_for(waiter[-1], timeout)
+		finally:
+			if waiter in waiters:
+				waiters.remove(waiter)
+
+	async def wait_for_call_state(self, call, states, timeout=None):
+		"""Wait until a call is in one of the given states.
+
+		:param call: the call
+		:param states: a linphone.CallState value or a sequence of them
+		:param timeout: the maximum time to wait in seconds, or None to wait forever
+		:returns: the state of the call
+		:raises StateError: if the call ends before reaching one of the states
+		:raises asyncio.TimeoutError: if the timeout expires
+		"""
+		if isinstance(states, int):
+			states = (states,)
+		if call.state in states:
+			return call.state
+		return await self._wait(self._call_state_waiters, (call, tuple(states), self.loop.create_future()), timeout)
+
+	async def wait_for_registration_state(self, proxy_cfg, states, timeout=None):
+		"""Wait until a proxy config is in one of the given registration states.
+
+		:param proxy_cfg: the proxy config
+		:param states: a linphone.RegistrationState value or a sequence of them
+		:param timeout: the maximum time to wait in seconds, or None to wait forever
+		:returns: the registration state of the proxy config
+		:raises StateError: if the registration fails or is cleared before reaching one of the states
+		:raises asyncio.TimeoutError: if the timeout expires
+		"""
+		if isinstance(states, int):
+			states = (states,)
+		if proxy_cfg.state in states:
+			return proxy_cfg.state
+		return await self._wait(self._registration_state_waiters, (proxy_cfg, tuple(states), self.loop.create_future()), timeout)
+
+	async def wait_registered(self, proxy_cfg, timeout=None):
+		"""Wait until a proxy config is registered. See wait_for_registration_state()."""
+		return await self.wait_for_registration_state(proxy_cfg, linphone.RegistrationState.Ok, timeout)
+
+	async def wait_for(self, condition, timeout=None):
+		"""Wait until a condition is true. The condition is checked after each iteration of the core.
+
+		:param condition: a callable without arguments
+		:param timeout: the maximum time to wait in seconds, or None to wait forever
+		:returns: the result of the condition
+		:raises asyncio.TimeoutError: if the timeout expires
+		"""
+		result = condition()
+		if result:
+			return result
+		return await self._wait(self._condition_waiters, (condition, self.loop.create_future()), timeout)
@@ -0,0 +1,43 @@
+import argparse
+import sys
+import timeit
+import linphone
+
+
+def benchmark(name, func, repeat, number = 1):
+	best = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+	print("{name}: {best:.6f}s".format(name=name, best=best))
+
+def main(argv = None):
+	if argv is None:
+		argv = sys.argv
+	argparser = argparse.ArgumentParser(description="Measure the conversions between the lists of the Linphone library and Python lists.")
+	argparser.add_argument('-n', '--entries', type=int, default=10000, help="Number of entries of the converted lists.")
+	argparser.add_argument('-r', '--repeat', type=int, default=5, help="Number of measures of each conversion, the best one is printed.")
+	args = argparser.parse_args(argv[1:])
+	factory = linphone.Factory.get()
+	core = factory.create_core(factory.create_core_cbs(), None, None)
+	uris = ['sip:user{0}@example.org'.format(i) for i in range(args.entries)]
+
+	# Lists of strings
+	config = core.config
+	benchmark("Config.set_string_list with {0} strings".format(args.entries), lambda: config.set_string_list('benchmark', 'uris', uris), args.repeat)
+	benchmark("Config.get_string_list with {0} strings".format(args.entries), lambda: config.get_string_list('benchmark', 'uris', None), args.repeat)
+
+	# Lists of objects, converted to a Python list by the getter
+	for i in range(args.entries):
+		core.add_auth_info(factory.create_auth_info('user{0}'.format(i), None, 'secret', None, None, 'example.org'))
+	benchmark("Core.auth_info_list with {0} auth infos".format(args.entries), lambda: core.auth_info_list, args.repeat)
+	# FriendList.friends is a lazy list (see lazy_list_getters in apixml2python.py): this measures the creation of the
+	# elements by list(), not the conversion of the whole list by the getter
+	friend_list = core.default_friend_list
+	for uri in uris:
+		friend_list.add_local_friend(core.create_friend_with_address(uri))
+	benchmark("list(FriendList.friends) with {0} friends (lazy list)".format(args.entries), lambda: list(friend_list.friends), args.repeat)
+	payload_types = core.audio_payload_types
+	number = max(1, args.entries // max(1, len(payload_types)))
+	benchmark("Core.audio_payload_types with {0} codecs".format(len(payload_types)), lambda: core.audio_payload_types, args.repeat, number)
+	benchmark("Core.audio_payload_types assignment with {0} codecs".format(len(payload_types)), lambda: setattr(core, 'audio_payload_types', payload_types), args.repeat, number)
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,10 +1,14 @@
 from datetime import timedelta, datetime
 from nose.tools import assert_equals
-from copy import deepcopy
+from array import array
+from copy import copy
+import atexit
 import linphone
 import logging
 import os
+import shutil
 import sys
+import tempfile
 import time
 import weakref
 
@@ -21,6 +25,51 @@ else:
     # Running unit tests from the linphone sources
     tester_resources_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../tester/"))
 
+# When the tests are run by run_parallel.py, each worker process has its own directory and its own range of ports
+tester_worker_path = os.environ.get('LINPHONE_TESTER_WORKER_DIR')
+tester_port_base = int(os.environ.get('LINPHONE_TESTER_PORT_BASE', 0))
+
+
+def tester_sip_port(offset = 0):
+    """Return the SIP port number to use for a fixed SIP port, the first one being 5070 when the tests are not run in parallel."""
+    if tester_port_base:
+        return tester_port_base + offset
+    return 5070 + offset
+
+def tester_rc_path(rc_file):
+    """Return the path of an rc file. The workers of run_parallel.py use their own copies of the rc files."""
+    rc_path = os.path.join(tester_resources_path, 'rcfiles', rc_file)
+    if tester_worker_path is None:
+        return rc_path
+    worker_rc_path = os.path.join(tester_worker_path, 'rcfiles', rc_file)
+    if not os.path.exists(worker_rc_path):
+        if not os.path.isdir(os.path.dirname(worker_rc_path)):
+            os.makedirs(os.path.dirname(worker_rc_path))
+        shutil.copyfile(rc_path, worker_rc_path)
+    return worker_rc_path
+
+# With LINPHONE_TESTER_LOCAL_SERVER=1, the tests use a local SIP server (see local_sip_server.py) instead of the flexisip
+# server at sip.example.org. run_parallel.py --local-server starts it once and sets LINPHONE_TESTER_LOCAL_SERVER=external.
+tester_local_server = os.environ.get('LINPHONE_TESTER_LOCAL_SERVER')
+tester_hosts_path = os.path.join(tester_resources_path, 'tester_hosts')
+if tester_local_server:
+    import local_sip_server
+    if tester_local_server != 'external':
+        local_sip_server.start_server_process(tester_resources_path)
+    (fd, local_hosts_path) = tempfile.mkstemp(prefix='linphonetester-hosts-', dir=tester_worker_path)
+    os.close(fd)
+    atexit.register(os.remove, local_hosts_path)
+    tester_hosts_path = local_sip_server.write_hosts_file(tester_hosts_path, local_hosts_path)
+
+
+def tester_user_certificates_path():
+    if tester_worker_path is None:
+        return os.getcwd()
+    path = os.path.join(tester_worker_path, 'certificates')
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
 
 def linphonetester_log_handler(level, msg):
     import logging
@@ -38,6 +87,44 @@ linphonetester_logger.addHandler(handler)
 linphone.set_log_handler(linphonetester_log_handler)
 
 
+class StatsSignal:
+    """Count the changes of the CoreManagerStats. They only happen in the callbacks called by iterate() on the thread
+    that waits, so the waits compare the count before and after each iteration instead of waiting for a notification."""
+    def __init__(self):
+        self.generation = 0
+
+    def notify(self):
+        self.generation += 1
+
+stats_signal = StatsSignal()
+
+# Intervals between the iterations of the cores when nothing happens, in seconds
+wait_min_idle_interval = 0.001
+wait_max_idle_interval = 0.02
+
+def wait_for_condition(lcs, func, timeout):
+    """Iterate the cores until func() returns a true value or the timeout (in milliseconds) expires.
+    The cores are iterated again at once while the stats change, and less and less often while nothing happens."""
+    end = datetime.now() + timedelta(milliseconds = timeout)
+    interval = wait_min_idle_interval
+    res = func()
+    while not res and datetime.now() < end:
+        generation = stats_signal.generation
+        for lc in lcs:
+            lc.iterate()
+        res = func()
+        if res:
+            break
+        if stats_signal.generation != generation:
+            interval = wait_min_idle_interval
+            continue
+        remaining = (end - datetime.now()).total_seconds()
+        if remaining > 0:
+            time.sleep(min(interval, remaining))
+        interval = min(interval * 2, wait_max_idle_interval)
+    return res
+
+
 def create_address(domain):
     addr = linphone.Factory.get().create_address(None)
     assert addr != None
@@ -80,15 +167,7 @@ class AccountManager:
 
     @classmethod
     def wait_for_list(cls, lcs, func, timeout):
-        start = datetime.now()
-        end = start + timedelta(milliseconds = timeout)
-        res = func(*lcs)
-        while not res and datetime.now() < end:
-            for lc in lcs:
-                lc.iterate()
-            time.sleep(0.02)
-            res = func(*lcs)
-        return res
+        return wait_for_condition(lcs, lambda: func(*lcs), timeout)
 
     @classmethod
     def account_created_on_server_cb(cls, lc, cfg, state, message):
@@ -170,123 +249,101 @@ class AccountManager:
 account_manager = AccountManager()
 
 
-class CoreManagerStats:
-    def __init__(self):
-        self.reset()
-
-    def reset(self):
-        self.number_of_LinphoneRegistrationNone = 0
-        self.number_of_LinphoneRegistrationProgress = 0
-        self.number_of_LinphoneRegistrationOk = 0
-        self.number_of_LinphoneRegistrationCleared = 0
-        self.number_of_LinphoneRegistrationFailed = 0
-        self.number_of_auth_info_requested = 0
-
-        self.number_of_LinphoneCallIncomingReceived = 0
-        self.number_of_LinphoneCallOutgoingInit = 0
-        self.number_of_LinphoneCallOutgoingProgress = 0
-        self.number_of_LinphoneCallOutgoingRinging = 0
-        self.number_of_LinphoneCallOutgoingEarlyMedia = 0
-        self.number_of_LinphoneCallConnected = 0
-        self.number_of_LinphoneCallStreamsRunning = 0
-        self.number_of_LinphoneCallPausing = 0
-        self.number_of_LinphoneCallPaused = 0
-        self.number_of_LinphoneCallResuming = 0
-        self.number_of_LinphoneCallRefered = 0
-        self.number_of_LinphoneCallError = 0
-        self.number_of_LinphoneCallEnd = 0
-        self.number_of_LinphoneCallPausedByRemote = 0
-        self.number_of_LinphoneCallUpdatedByRemote = 0
-        self.number_of_LinphoneCallIncomingEarlyMedia = 0
-        self.number_of_LinphoneCallUpdating = 0
-        self.number_of_LinphoneCallReleased = 0
-
-        self.number_of_LinphoneTransferCallOutgoingInit = 0
-        self.number_of_LinphoneTransferCallOutgoingProgress = 0
-        self.number_of_LinphoneTransferCallOutgoingRinging = 0
-        self.number_of_LinphoneTransferCallOutgoingEarlyMedia = 0
-        self.number_of_LinphoneTransferCallConnected = 0
-        self.number_of_LinphoneTransferCallStreamsRunning = 0
-        self.number_of_LinphoneTransferCallError = 0
-
-        self.number_of_LinphoneMessageReceived = 0
-        self.number_of_LinphoneMessageReceivedWithFile = 0
-        self.number_of_LinphoneMessageReceivedLegacy = 0
-        self.number_of_LinphoneMessageExtBodyReceived = 0
-        self.number_of_LinphoneMessageInProgress = 0
-        self.number_of_LinphoneMessageDelivered = 0
-        self.number_of_LinphoneMessageNotDelivered = 0
-        self.number_of_LinphoneMessageFileTransferDone = 0
-        self.number_of_LinphoneMessageDeliveredToUser = 0
-        self.number_of_LinphoneMessageDisplayed = 0
-        self.number_of_LinphoneIsComposingActiveReceived = 0
-        self.number_of_LinphoneIsComposingIdleReceived = 0
-        self.number_of_LinphoneFileTransferDownloadSuccessful = 0
-        self.progress_of_LinphoneFileTransfer = 0
+def stats_counters(kind, enum, prefix, names):
+    # An item of names is either the name of a member of enum, or a (attribute suffix, member name) tuple
+    counters = []
+    for name in names:
+        (suffix, member) = name if isinstance(name, tuple) else (name.lstrip('_'), name)
+        counters.append((kind, getattr(enum, member), prefix + suffix))
+    return counters
+
+# The counters of CoreManagerStats, as (kind, value, attribute name). The values of the 'event' kind are names of events that are
+# not states of an enum. The 'presence_status' kind counts the presence models without activity, that are 'Online' when their basic
+# status is open and 'Offline' otherwise.
+stats_counters_table = \
+    stats_counters('registration', linphone.RegistrationState, 'number_of_LinphoneRegistration', ('_None', 'Progress', 'Ok', 'Cleared', 'Failed')) + \
+    stats_counters('call', linphone.CallState, 'number_of_LinphoneCall', ('IncomingReceived', 'OutgoingInit', 'OutgoingProgress', 'OutgoingRinging',
+        'OutgoingEarlyMedia', 'Connected', 'StreamsRunning', 'Pausing', 'Paused', 'Resuming', 'Refered', 'Error', 'End', 'PausedByRemote',
+        'UpdatedByRemote', 'IncomingEarlyMedia', 'Updating', 'Released')) + \
+    stats_counters('transfer', linphone.CallState, 'number_of_LinphoneTransferCall', ('OutgoingInit', 'OutgoingProgress', 'OutgoingRinging',
+        'OutgoingEarlyMedia', 'Connected', 'StreamsRunning', 'Error')) + \
+    stats_counters('message', linphone.ChatMessageState, 'number_of_LinphoneMessage', ('InProgress', 'Delivered', 'NotDelivered', 'FileTransferDone',
+        'DeliveredToUser', 'Displayed')) + \
+    stats_counters('presence_basic', linphone.PresenceBasicStatus, 'number_of_LinphonePresenceBasicStatus', ('Open', 'Closed')) + \
+    stats_counters('presence_activity', linphone.PresenceActivityType, 'number_of_LinphonePresenceActivity', ('Appointment', 'Away', 'Breakfast',
+        'Busy', 'Dinner', 'Holiday', 'InTransit', 'LookingForWork', 'Lunch', 'Meal', 'Meeting', 'OnThePhone', 'Other', 'Performance',
+        'PermanentAbsence', 'Playing', 'Presentation', 'Shopping', 'Sleeping', 'Spectator', 'Steering', 'Travel', 'TV', 'Unknown', 'Vacation',
+        'Working', 'Worship')) + \
+    [('presence_status', name, 'number_of_LinphonePresenceActivity' + name) for name in ('Offline', 'Online')] + \
+    stats_counters('subscription', linphone.SubscriptionState, 'number_of_LinphoneSubscription', ('IncomingReceived', ('OutgoingInit', 'OutgoingProgress'),
+        'Pending', 'Active', 'Terminated', 'Error', 'Expiring')) + \
+    stats_counters('publish', linphone.PublishState, 'number_of_LinphonePublish', ('Progress', 'Ok', 'Expiring', 'Error', 'Cleared')) + \
+    stats_counters('configuring', linphone.ConfiguringState, 'number_of_LinphoneConfiguring', ('Skipped', 'Failed', 'Successful')) + \
+    [('event', name, 'number_of_' + name) for name in ('auth_info_requested', 'LinphoneMessageReceived', 'LinphoneMessageReceivedWithFile',
+        'LinphoneMessageReceivedLegacy', 'LinphoneMessageExtBodyReceived', 'LinphoneIsComposingActiveReceived', 'LinphoneIsComposingIdleReceived',
+        'LinphoneFileTransferDownloadSuccessful', 'IframeDecoded', 'NewSubscriptionRequest', 'NotifyReceived', 'NotifyPresenceReceived',
+        'inforeceived', 'LinphoneCallEncryptedOn', 'LinphoneCallEncryptedOff')]
 
-        self.number_of_IframeDecoded = 0
-
-        self.number_of_NewSubscriptionRequest = 0
-        self.number_of_NotifyReceived = 0
-        self.number_of_NotifyPresenceReceived = 0
-        self.number_of_LinphonePresenceBasicStatusOpen = 0
-        self.number_of_LinphonePresenceBasicStatusClosed = 0
-        self.number_of_LinphonePresenceActivityOffline = 0
-        self.number_of_LinphonePresenceActivityOnline = 0
-        self.number_of_LinphonePresenceActivityAppointment = 0
-        self.number_of_LinphonePresenceActivityAway = 0
-        self.number_of_LinphonePresenceActivityBreakfast = 0
-        self.number_of_LinphonePresenceActivityBusy = 0
-        self.number_of_LinphonePresenceActivityDinner = 0
-        self.number_of_LinphonePresenceActivityHoliday = 0
-        self.number_of_LinphonePresenceActivityInTransit = 0
-        self.number_of_LinphonePresenceActivityLookingForWork = 0
-        self.number_of_LinphonePresenceActivityLunch = 0
-        self.number_of_LinphonePresenceActivityMeal = 0
-        self.number_of_LinphonePresenceActivityMeeting = 0
-        self.number_of_LinphonePresenceActivityOnThePhone = 0
-        self.number_of_LinphonePresenceActivityOther = 0
-        self.number_of_LinphonePresenceActivityPerformance = 0
-        self.number_of_LinphonePresenceActivityPermanentAbsence = 0
-        self.number_of_LinphonePresenceActivityPlaying = 0
-        self.number_of_LinphonePresenceActivityPresentation = 0
-        self.number_of_LinphonePresenceActivityShopping = 0
-        self.number_of_LinphonePresenceActivitySleeping = 0
-        self.number_of_LinphonePresenceActivitySpectator = 0
-        self.number_of_LinphonePresenceActivitySteering = 0
-        self.number_of_LinphonePresenceActivityTravel = 0
-        self.number_of_LinphonePresenceActivityTV = 0
-        self.number_of_LinphonePresenceActivityUnknown = 0
-        self.number_of_LinphonePresenceActivityVacation = 0
-        self.number_of_LinphonePresenceActivityWorking = 0
-        self.number_of_LinphonePresenceActivityWorship = 0
-        self.last_received_presence = None
 
-        self.number_of_inforeceived = 0
+class CoreManagerStats:
+    """Counters of the events received by a CoreManager.
 
-        self.number_of_LinphoneSubscriptionIncomingReceived = 0
-        self.number_of_LinphoneSubscriptionOutgoingInit = 0
-        self.number_of_LinphoneSubscriptionPending = 0
-        self.number_of_LinphoneSubscriptionActive = 0
-        self.number_of_LinphoneSubscriptionTerminated = 0
-        self.number_of_LinphoneSubscriptionError = 0
-        self.number_of_LinphoneSubscriptionExpiring = 0
+    The counters are stored in a single array, indexed either by (kind, value), for example ('call', linphone.CallState.End), or by their
+    attribute name, for example number_of_LinphoneCallEnd."""
 
-        self.number_of_LinphonePublishProgress = 0
-        self.number_of_LinphonePublishOk = 0
-        self.number_of_LinphonePublishExpiring = 0
-        self.number_of_LinphonePublishError = 0
-        self.number_of_LinphonePublishCleared = 0
+    counter_indexes = dict(((kind, value), index) for (index, (kind, value, name)) in enumerate(stats_counters_table))
+    attribute_indexes = dict((name, index) for (index, (kind, value, name)) in enumerate(stats_counters_table))
+    zero_counters = array('l', [0] * len(stats_counters_table))
 
-        self.number_of_LinphoneConfiguringSkipped = 0
-        self.number_of_LinphoneConfiguringFailed = 0
-        self.number_of_LinphoneConfiguringSuccessful = 0
+    def __init__(self):
+        self.reset()
 
-        self.number_of_LinphoneCallEncryptedOn = 0
-        self.number_of_LinphoneCallEncryptedOff = 0
+    def __getattr__(self, name):
+        # Only called for the attributes that are not in __dict__, the counters
+        index = CoreManagerStats.attribute_indexes.get(name)
+        if index is None:
+            raise AttributeError(name)
+        return self.counters[index]
+
+    def __setattr__(self, name, value):
+        index = CoreManagerStats.attribute_indexes.get(name)
+        if index is None:
+            self.__dict__[name] = value
+        else:
+            self.counters[index] = value
+        stats_signal.notify()
 
+    def reset(self):
+        self.counters = array('l', CoreManagerStats.zero_counters)
+        self.progress_of_LinphoneFileTransfer = 0
+        self.last_received_presence = None
         self.last_received_chat_message = None
 
+    def has_counter(self, kind, value):
+        return (kind, value) in CoreManagerStats.counter_indexes
+
+    def get(self, kind, value):
+        return self.counters[CoreManagerStats.counter_indexes[(kind, value)]]
+
+    def increment(self, kind, value):
+        self.counters[CoreManagerStats.counter_indexes[(kind, value)]] += 1
+        stats_signal.notify()
+
+    def snapshot(self):
+        """Return a copy of the stats, to be compared later with diff()."""
+        stats = copy(self)
+        stats.__dict__['counters'] = array('l', self.counters)
+        return stats
+
+    def diff(self, other):
+        """Return a dict of the counters that changed since the other stats, as (kind, value): difference."""
+        result = {}
+        for (index, (kind, value, name)) in enumerate(stats_counters_table):
+            difference = self.counters[index] - other.counters[index]
+            if difference != 0:
+                result[(kind, value)] = difference
+        return result
+
 
 class CoreManager:
 
@@ -297,11 +354,16 @@ class CoreManager:
             filepath = os.path.join(resources_path, rc_path)
             assert_equals(os.path.isfile(filepath), True)
         lc = linphone.Factory.get().create_core(cbs, None, filepath)
-        linphone.testing.set_dns_user_hosts_file(lc, os.path.join(resources_path, 'tester_hosts'))
+        linphone.testing.set_dns_user_hosts_file(lc, tester_hosts_path)
         lc.root_ca = os.path.join(resources_path, 'certificates', 'cn', 'cafile.pem')
         lc.ring = os.path.join(resources_path, 'sounds', 'oldphone.wav')
         lc.ringback = os.path.join(resources_path, 'sounds', 'ringback.wav')
         lc.static_picture = os.path.join(resources_path, 'images', 'nowebcamCIF.jpg')
+        if tester_port_base:
+            # Ports 0 to 9 of the range of the worker are kept for the SIP ports, see tester_sip_port()
+            lc.set_audio_port_range(tester_port_base + 50, tester_port_base + 99)
+            lc.set_video_port_range(tester_port_base + 100, tester_port_base + 149)
+            lc.set_text_port_range(tester_port_base + 150, tester_port_base + 199)
         lc.user_data = weakref.ref(user_data)
         return lc
 
@@ -316,24 +378,21 @@ class CoreManager:
 
     @classmethod
     def wait_for_list(cls, managers, func, timeout):
-        start = datetime.now()
-        end = start + timedelta(milliseconds = timeout)
-        res = func(*managers)
-        while not res and datetime.now() < end:
-            for manager in managers:
-                manager.lc.iterate()
-            time.sleep(0.02)
-            res = func(*managers)
-        return res
+        return wait_for_condition([manager.lc for manager in managers], lambda: func(*managers), timeout)
 
     @classmethod
     def wait_for(cls, manager1, manager2, func):
         return cls.wait_for_until(manager1, manager2, func, 10000)
 
+    def wait_for_counter(self, kind, value, n, timeout = 10000, others = []):
+        """Iterate the cores of this manager and of the other managers until the counter (kind, value) of the stats of this manager reaches n."""
+        managers = [self] + list(others)
+        return wait_for_condition([manager.lc for manager in managers], lambda: self.stats.get(kind, value) >= n, timeout)
+
     @classmethod
     def call(cls, caller_manager, callee_manager, caller_params = None, callee_params = None, build_callee_params = False):
-        initial_caller_stats = deepcopy(caller_manager.stats)
-        initial_callee_stats = deepcopy(callee_manager.stats)
+        initial_caller_stats = caller_manager.stats.snapshot()
+        initial_callee_stats = callee_manager.stats.snapshot()
 
         # Use playfile for callee to avoid locking on capture card
         callee_manager.lc.use_files = True
@@ -350,14 +409,9 @@ class CoreManager:
         assert_equals(callee_manager.lc.is_incoming_invite_pending, True)
         assert_equals(caller_manager.stats.number_of_LinphoneCallOutgoingProgress, initial_caller_stats.number_of_LinphoneCallOutgoingProgress + 1)
 
-        retry = 0
-        while (caller_manager.stats.number_of_LinphoneCallOutgoingRinging != initial_caller_stats.number_of_LinphoneCallOutgoingRinging + 1) and \
-            (caller_manager.stats.number_of_LinphoneCallOutgoingEarlyMedia != initial_caller_stats.number_of_LinphoneCallOutgoingEarlyMedia + 1) and \
-            retry < 20:
-            retry += 1
-            caller_manager.lc.iterate()
-            callee_manager.lc.iterate()
-            time.sleep(0.1)
+        CoreManager.wait_for_until(caller_manager, callee_manager,
+            lambda caller_manager, callee_manager: (caller_manager.stats.number_of_LinphoneCallOutgoingRinging == initial_caller_stats.number_of_LinphoneCallOutgoingRinging + 1) or \
+                (caller_manager.stats.number_of_LinphoneCallOutgoingEarlyMedia == initial_caller_stats.number_of_LinphoneCallOutgoingEarlyMedia + 1), 2000)
         assert ((caller_manager.stats.number_of_LinphoneCallOutgoingRinging == initial_caller_stats.number_of_LinphoneCallOutgoingRinging + 1) or \
             (caller_manager.stats.number_of_LinphoneCallOutgoingEarlyMedia == initial_caller_stats.number_of_LinphoneCallOutgoingEarlyMedia + 1)) == True
 
@@ -407,18 +461,9 @@ class CoreManager:
         manager = lc.user_data()
         linphonetester_logger.info("[TESTER] New registration state {state} for user id [{identity}] at proxy [{addr}]".format(
             state=linphone.RegistrationState.string(state), identity=cfg.identity_address.as_string(), addr=cfg.server_addr))
-        if state == linphone.RegistrationState._None:
-            manager.stats.number_of_LinphoneRegistrationNone += 1
-        elif state == linphone.RegistrationState.Progress:
-            manager.stats.number_of_LinphoneRegistrationProgress += 1
-        elif state == linphone.RegistrationState.Ok:
-            manager.stats.number_of_LinphoneRegistrationOk += 1
-        elif state == linphone.RegistrationState.Cleared:
-            manager.stats.number_of_LinphoneRegistrationCleared += 1
-        elif state == linphone.RegistrationState.Failed:
-            manager.stats.number_of_LinphoneRegistrationFailed += 1
-        else:
+        if not manager.stats.has_counter('registration', state):
             raise Exception("Unexpected registration state")
+        manager.stats.increment('registration', state)
 
     @classmethod
     def authentication_requested(cls, lc, auth_info, method):
@@ -437,44 +482,9 @@ class CoreManager:
             direction = "Incoming"
         linphonetester_logger.info("[TESTER] {direction} call from [{from_address}] to [{to_address}], new state is [{state}]".format(
             direction=direction, from_address=from_address, to_address=to_address, state=linphone.CallState.string(state)))
-        if state == linphone.CallState.IncomingReceived:
-            manager.stats.number_of_LinphoneCallIncomingReceived += 1
-        elif state == linphone.CallState.OutgoingInit:
-            manager.stats.number_of_LinphoneCallOutgoingInit += 1
-        elif state == linphone.CallState.OutgoingProgress:
-            manager.stats.number_of_LinphoneCallOutgoingProgress += 1
-        elif state == linphone.CallState.OutgoingRinging:
-            manager.stats.number_of_LinphoneCallOutgoingRinging += 1
-        elif state == linphone.CallState.OutgoingEarlyMedia:
-            manager.stats.number_of_LinphoneCallOutgoingEarlyMedia += 1
-        elif state == linphone.CallState.Connected:
-            manager.stats.number_of_LinphoneCallConnected += 1
-        elif state == linphone.CallState.StreamsRunning:
-            manager.stats.number_of_LinphoneCallStreamsRunning += 1
-        elif state == linphone.CallState.Pausing:
-            manager.stats.number_of_LinphoneCallPausing += 1
-        elif state == linphone.CallState.Paused:
-            manager.stats.number_of_LinphoneCallPaused += 1
-        elif state == linphone.CallState.Resuming:
-            manager.stats.number_of_LinphoneCallResuming += 1
-        elif state == linphone.CallState.Refered:
-            manager.stats.number_of_LinphoneCallRefered += 1
-        elif state == linphone.CallState.Error:
-            manager.stats.number_of_LinphoneCallError += 1
-        elif state == linphone.CallState.End:
-            manager.stats.number_of_LinphoneCallEnd += 1
-        elif state == linphone.CallState.PausedByRemote:
-            manager.stats.number_of_LinphoneCallPausedByRemote += 1
-        elif state == linphone.CallState.UpdatedByRemote:
-            manager.stats.number_of_LinphoneCallUpdatedByRemote += 1
-        elif state == linphone.CallState.IncomingEarlyMedia:
-            manager.stats.number_of_LinphoneCallIncomingEarlyMedia += 1
-        elif state == linphone.CallState.Updating:
-            manager.stats.number_of_LinphoneCallUpdating += 1
-        elif state == linphone.CallState.Released:
-            manager.stats.number_of_LinphoneCallReleased += 1
-        else:
+        if not manager.stats.has_counter('call', state):
             raise Exception("Unexpected call state")
+        manager.stats.increment('call', state)
 
     @classmethod
     def message_received(cls, lc, room, message):
@@ -505,78 +515,21 @@ class CoreManager:
         linphonetester_logger.info("[TESTER] New notify request: from [{from_str}]".format(
             from_str=lf.address.as_string()))
         manager.stats.number_of_NotifyPresenceReceived += 1
-        manager.stats.last_received_presence = lf.presence_model
-        if manager.stats.last_received_presence.basic_status == linphone.PresenceBasicStatus.Open:
-            manager.stats.number_of_LinphonePresenceBasicStatusOpen += 1
-        elif manager.stats.last_received_presence.basic_status == linphone.PresenceBasicStatus.Closed:
-            manager.stats.number_of_LinphonePresenceBasicStatusClosed += 1
+        presence = lf.presence_model
+        manager.stats.last_received_presence = presence
+        if manager.stats.has_counter('presence_basic', presence.basic_status):
+            manager.stats.increment('presence_basic', presence.basic_status)
         else:
-            linphonetester_logger.error("[TESTER] Unexpected basic status {status}".format(status=manager.status.last_received_presence.basic_status))
-        for i in range(0, manager.stats.last_received_presence.nb_activities):
-            acttype = manager.stats.last_received_presence.get_nth_activity(i).type
-            if acttype == linphone.PresenceActivityType.Offline:
-                manager.stats.number_of_LinphonePresenceActivityOffline += 1
-            elif acttype == linphone.PresenceActivityType.Online:
-                manager.stats.number_of_LinphonePresenceActivityOnline += 1
-            elif acttype == linphone.PresenceActivityType.Appointment:
-                manager.stats.number_of_LinphonePresenceActivityAppointment += 1
-            elif acttype == linphone.PresenceActivityType.Away:
-                manager.stats.number_of_LinphonePresenceActivityAway += 1
-            elif acttype == linphone.PresenceActivityType.Breakfast:
-                manager.stats.number_of_LinphonePresenceActivityBreakfast += 1
-            elif acttype == linphone.PresenceActivityType.Busy:
-                manager.stats.number_of_LinphonePresenceActivityBusy += 1
-            elif acttype == linphone.PresenceActivityType.Dinner:
-                manager.stats.number_of_LinphonePresenceActivityDinner += 1
-            elif acttype == linphone.PresenceActivityType.Holiday:
-                manager.stats.number_of_LinphonePresenceActivityHoliday += 1
-            elif acttype == linphone.PresenceActivityType.InTransit:
-                manager.stats.number_of_LinphonePresenceActivityInTransit += 1
-            elif acttype == linphone.PresenceActivityType.LookingForWork:
-                manager.stats.number_of_LinphonePresenceActivityLookingForWork += 1
-            elif acttype == linphone.PresenceActivityType.Lunch:
-                manager.stats.number_of_LinphonePresenceActivityLunch += 1
-            elif acttype == linphone.PresenceActivityType.Meal:
-                manager.stats.number_of_LinphonePresenceActivityMeal += 1
-            elif acttype == linphone.PresenceActivityType.Meeting:
-                manager.stats.number_of_LinphonePresenceActivityMeeting += 1
-            elif acttype == linphone.PresenceActivityType.OnThePhone:
-                manager.stats.number_of_LinphonePresenceActivityOnThePhone += 1
-            elif acttype == linphone.PresenceActivityType.Other:
-                manager.stats.number_of_LinphonePresenceActivityOther += 1
-            elif acttype == linphone.PresenceActivityType.Performance:
-                manager.stats.number_of_LinphonePresenceActivityPerformance += 1
-            elif acttype == linphone.PresenceActivityType.PermanentAbsence:
-                manager.stats.number_of_LinphonePresenceActivityPermanentAbsence += 1
-            elif acttype == linphone.PresenceActivityType.Playing:
-                manager.stats.number_of_LinphonePresenceActivityPlaying += 1
-            elif acttype == linphone.PresenceActivityType.Presentation:
-                manager.stats.number_of_LinphonePresenceActivityPresentation += 1
-            elif acttype == linphone.PresenceActivityType.Shopping:
-                manager.stats.number_of_LinphonePresenceActivityShopping += 1
-            elif acttype == linphone.PresenceActivityType.Sleeping:
-                manager.stats.number_of_LinphonePresenceActivitySleeping += 1
-            elif acttype == linphone.PresenceActivityType.Spectator:
-                manager.stats.number_of_LinphonePresenceActivitySpectator += 1
-            elif acttype == linphone.PresenceActivityType.Steering:
-                manager.stats.number_of_LinphonePresenceActivitySteering += 1
-            elif acttype == linphone.PresenceActivityType.Travel:
-                manager.stats.number_of_LinphonePresenceActivityTravel += 1
-            elif acttype == linphone.PresenceActivityType.TV:
-                manager.stats.number_of_LinphonePresenceActivityTV += 1
-            elif acttype == linphone.PresenceActivityType.Unknown:
-                manager.stats.number_of_LinphonePresenceActivityUnknown += 1
-            elif acttype == linphone.PresenceActivityType.Vacation:
-                manager.stats.number_of_LinphonePresenceActivityVacation += 1
-            elif acttype == linphone.PresenceActivityType.Working:
-                manager.stats.number_of_LinphonePresenceActivityWorking += 1
-            elif acttype == linphone.PresenceActivityType.Worship:
-                manager.stats.number_of_LinphonePresenceActivityWorship += 1
-        if manager.stats.last_received_presence.nb_activities == 0:
-            if manager.stats.last_received_presence.basic_status == linphone.PresenceBasicStatus.Open:
-                manager.stats.number_of_LinphonePresenceActivityOnline += 1
+            linphonetester_logger.error("[TESTER] Unexpected basic status {status}".format(status=presence.basic_status))
+        for i in range(0, presence.nb_activities):
+            acttype = presence.get_nth_activity(i).type
+            if manager.stats.has_counter('presence_activity', acttype):
+                manager.stats.increment('presence_activity', acttype)
+        if presence.nb_activities == 0:
+            if presence.basic_status == linphone.PresenceBasicStatus.Open:
+                manager.stats.increment('presence_status', 'Online')
             else:
-                manager.stats.number_of_LinphonePresenceActivityOffline += 1
+                manager.stats.increment('presence_status', 'Offline')
 
     def __init__(self, rc_file = None, check_for_proxies = True, additional_cbs = None):
         cbs = linphone.Factory.get().create_core_cbs()
@@ -590,14 +543,14 @@ class CoreManager:
         self.stats = CoreManagerStats()
         rc_path = None
         if rc_file is not None:
-            rc_path = os.path.join('rcfiles', rc_file)
+            rc_path = tester_rc_path(rc_file)
         self.lc = CoreManager.configure_lc_from(cbs, tester_resources_path, rc_path, self)
         if additional_cbs:
             self.lc.add_callbacks(additional_cbs)
         self.check_accounts()
 
         self.lc.play_file = os.path.join(tester_resources_path, 'sounds', 'hello8000.wav')
-        self.lc.user_certificates_path = os.getcwd()
+        self.lc.user_certificates_path = tester_user_certificates_path()
 
         if check_for_proxies:
             proxy_count = len(self.lc.proxy_config_list)
@@ -606,7 +559,7 @@ class CoreManager:
             self.lc.network_reachable = False
         if proxy_count:
             nb_seconds = 20
-            success = CoreManager.wait_for_until(self, None, lambda manager: manager.stats.number_of_LinphoneRegistrationOk == proxy_count, nb_seconds * 1000 * proxy_count)
+            success = self.wait_for_counter('registration', linphone.RegistrationState.Ok, proxy_count, nb_seconds * 1000 * proxy_count)
             if not success:
                 linphonetester_logger.info("[TESTER] Did not register after {nb_seconds} for {proxy_count} proxies".format(nb_seconds=nb_seconds, proxy_count=proxy_count))
         assert_equals(self.stats.number_of_LinphoneRegistrationOk, proxy_count)
@@ -0,0 +1,627 @@
+#!/usr/bin/env python
+
+"""A local SIP registrar and proxy standing in for the flexisip server used by the Python unit tests.
+
+It listens on 127.0.0.1 (UDP and TCP on port 5060, TLS on port 5061) and serves all the domains of the
+tester_hosts file, that are resolved to 127.0.0.1 with the hosts file given by write_hosts_file(). It
+understands what the unit tests need:
+ - REGISTER: bindings of the contacts, digest authentication for the domains of auth_domains, creation of
+   accounts with the X-Create-Account header like flexisip does for the tester;
+ - INVITE, MESSAGE, SUBSCRIBE and in-dialog requests: stateless proxying to the last registered contact of the
+   address of record, through the connection used to register, with record-routing;
+ - PUBLISH: accepted without being processed.
+It does not fork to several contacts, does not store messages and does not act as a presence server.
+"""
+
+import argparse
+import atexit
+import hashlib
+import os
+import random
+import socket
+import ssl
+import subprocess
+import sys
+import threading
+import time
+
+
+local_address = '127.0.0.1'
+auth_domains = ('sip.example.org', 'auth.example.org', 'auth1.example.org', 'auth2.example.org')
+test_accounts = { ('liblinphone_tester', 'sip.example.org'): 'secret', ('liblinphone_tester', 'auth.example.org'): 'secret',
+    ('liblinphone_tester', 'auth1.example.org'): 'secret', ('liblinphone_tester', 'auth2.example.org'): 'secret' }
+
+compact_header_names = { 'v': 'Via', 'f': 'From', 't': 'To', 'i': 'Call-ID', 'm': 'Contact', 'l': 'Content-Length', 'c': 'Content-Type',
+    'k': 'Supported', 'e': 'Content-Encoding', 's': 'Subject', 'o': 'Event', 'u': 'Allow-Events', 'r': 'Refer-To', 'b': 'Referred-By' }
+# Headers whose comma separated values are split into several headers when parsing
+list_header_names = ('via', 'route', 'record-route', 'contact')
+reason_phrases = { 100: 'Trying', 200: 'Ok', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+    480: 'Temporarily Unavailable', 483: 'Too Many Hops', 500: 'Server Internal Error' }
+
+
+def read_hosts_domains(hosts_path):
+    domains = set()
+    with open(hosts_path) as f:
+        for line in f:
+            fields = line.split()
+            domains.update(fields[1:])
+    return domains
+
+def write_hosts_file(hosts_path, path):
+    """Write a hosts file resolving all the domains of the hosts file hosts_path to the address of the local server."""
+    with open(path, 'w') as f:
+        f.write("{address}\t{domains}\n".format(address=local_address, domains=' '.join(sorted(read_hosts_domains(hosts_path)))))
+    return path
+
+def start_server_process(tester_resources_path, verbose = False):
+    """Start the local server in a subprocess, that is terminated when the calling process exits."""
+    cmd = [sys.executable, os.path.abspath(__file__), '--hosts', os.path.join(tester_resources_path, 'tester_hosts'),
+        '--certificate', os.path.join(tester_resources_path, 'certificates', 'cn', 'agent.pem')]
+    if verbose:
+        cmd.append('--verbose')
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    line = process.stdout.readline()
+    if not line.startswith(b'Listening'):
+        process.terminate()
+        raise RuntimeError("The local SIP server could not be started")
+    atexit.register(process.terminate)
+    return process
+
+
+def split_header_values(value):
+    values = []
+    start = 0
+    quoted = False
+    in_brackets = False
+    for (i, c) in enumerate(value):
+        if c == '"':
+            quoted = not quoted
+        elif not quoted and c == '<':
+            in_brackets = True
+        elif not quoted and c == '>':
+            in_brackets = False
+        elif not quoted and not in_brackets and c == ',':
+            values.append(value[start:i].strip())
+            start = i + 1
+    values.append(value[start:].strip())
+    return [v for v in values if v]
+
+def parse_params(text):
+    params = {}
+    for param in text.split(';'):
+        param = param.strip()
+        if param:
+            (name, sep, value) = param.partition('=')
+            params[name.lower()] = value.strip('"') if sep else None
+    return params
+
+def header_params(value):
+    """Return the parameters of a name-addr or addr-spec header value, not the ones of its URI."""
+    if '<' in value:
+        return parse_params(value.partition('>')[2])
+    return parse_params(value.partition(';')[2])
+
+def header_uri(value):
+    """Return the URI of a name-addr or addr-spec header value (From, To, Contact, Route...)."""
+    start = value.find('<')
+    if start >= 0:
+        return value[start + 1:value.index('>', start)]
+    return value.split(';', 1)[0].strip()
+
+
+class SipUri:
+    def __init__(self, text):
+        self.text = text
+        (self.scheme, sep, rest) = text.partition(':')
+        self.scheme = self.scheme.lower()
+        (rest, sep, self.headers) = rest.partition('?')
+        parts = rest.split(';', 1)
+        self.params = parse_params(parts[1]) if len(parts) > 1 else {}
+        (userinfo, sep, hostport) = parts[0].rpartition('@')
+        (self.user, sep, self.password) = userinfo.partition(':')
+        if hostport.startswith('['):
+            end = hostport.index(']')
+            (self.host, port) = (hostport[:end + 1], hostport[end + 2:])
+        else:
+            (self.host, sep, port) = hostport.partition(':')
+        self.host = self.host.lower()
+        self.port = int(port) if port else None
+
+    @property
+    def transport(self):
+        if self.scheme == 'sips':
+            return 'tls'
+        return (self.params.get('transport') or 'udp').lower()
+
+    @property
+    def aor(self):
+        return (self.user, self.host)
+
+
+class SipMessage:
+    def __init__(self):
+        self.method = None
+        self.uri = None
+        self.status = None
+        self.reason = None
+        self.headers = []
+        self.body = b''
+
+    @classmethod
+    def parse(cls, data):
+        (head, sep, body) = data.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        msg = SipMessage()
+        start_line = lines[0].split(' ', 2)
+        if len(start_line) != 3:
+            raise ValueError("Invalid start line")
+        if start_line[0].startswith('SIP/'):
+            msg.status = int(start_line[1])
+            msg.reason = start_line[2]
+        elif start_line[2].startswith('SIP/'):
+            (msg.method, msg.uri) = start_line[0:2]
+        else:
+            raise ValueError("Invalid start line")
+        for line in lines[1:]:
+            if line[:1] in (' ', '\t') and msg.headers: # Folded header
+                msg.headers[-1][1] += ' ' + line.strip()
+                continue
+            (name, sep, value) = line.partition(':')
+            if not sep:
+                raise ValueError("Invalid header line")
+            name = name.strip()
+            name = compact_header_names.get(name.lower(), name) if len(name) == 1 else name
+            if name.lower() in list_header_names:
+                for v in split_header_values(value):
+                    msg.headers.append([name, v])
+            else:
+                msg.headers.append([name, value.strip()])
+        msg.body = body
+        return msg
+
+    @property
+    def is_request(self):
+        return self.method is not None
+
+    def header(self, name):
+        for (n, v) in self.headers:
+            if n.lower() == name.lower():
+                return v
+        return None
+
+    def header_values(self, name):
+        return [v for (n, v) in self.headers if n.lower() == name.lower()]
+
+    def remove_header(self, name, first_only = False):
+        for (i, (n, v)) in enumerate(self.headers):
+            if n.lower() == name.lower():
+                del self.headers[i]
+                if first_only:
+                    return
+                self.remove_header(name)
+                return
+
+    def set_header(self, name, value):
+        self.remove_header(name)
+        self.headers.append([name, value])
+
+    def add_header_on_top(self, name, value):
+        for (i, (n, v)) in enumerate(self.headers):
+            if n.lower() == name.lower():
+                self.headers.insert(i, [name, value])
+                return
+        self.headers.append([name, value])
+
+    def to_bytes(self):
+        if self.is_request:
+            lines = ["{method} {uri} SIP/2.0".format(method=self.method, uri=self.uri)]
+        else:
+            lines = ["SIP/2.0 {status} {reason}".format(status=self.status, reason=self.reason)]
+        lines += ["{name}: {value}".format(name=n, value=v) for (n, v) in self.headers if n.lower() != 'content-length']
+        lines.append("Content-Length: {length}".format(length=len(self.body)))
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + self.body
+
+
+class Flow:
+    """A path to a SIP agent: a UDP address or a TCP or TLS connection."""
+    def __init__(self, server, transport, remote):
+        self.server = server
+        self.transport = transport
+        self.remote = remote
+        self.closed = False
+
+
+class UdpFlow(Flow):
+    def __init__(self, server, sock, remote):
+        Flow.__init__(self, server, 'udp', remote)
+        self.sock = sock
+
+    def send(self, data):
+        self.sock.sendto(data, self.remote)
+
+
+class StreamFlow(Flow):
+    def __init__(self, server, transport, sock, remote):
+        Flow.__init__(self, server, transport, remote)
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+
+    def send(self, data):
+        with self.send_lock:
+            try:
+                self.sock.sendall(data)
+            except (socket.error, ssl.SSLError):
+                self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self.sock.close()
+            except socket.error:
+                pass
+            self.server.flow_closed(self)
+
+    def run(self):
+        data = b''
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+                while True:
+                    if data.startswith(b'\r\n\r\n'): # Keep-alive ping, answer with a pong
+                        self.send(b'\r\n')
+                        data = data[4:]
+                        continue
+                    data = data.lstrip(b'\r\n')
+                    if data and not data[:1].isalpha():
+                        raise ValueError("Not a SIP message") # For example a TLS handshake on the TCP port
+                    end = data.find(b'\r\n\r\n')
+                    if end < 0:
+                        break
+                    length = 0
+                    for line in data[:end].split(b'\r\n')[1:]:
+                        (name, sep, value) = line.partition(b':')
+                        if name.strip().lower() in (b'content-length', b'l'):
+                            length = int(value.strip())
+                    if len(data) < end + 4 + length:
+                        break
+                    self.server.handle(SipMessage.parse(data[:end + 4 + length]), self)
+                    data = data[end + 4 + length:]
+        except (socket.error, ssl.SSLError, ValueError, IndexError):
+            pass
+        self.close()
+
+
+class Binding:
+    def __init__(self, contact, flow, expires):
+        self.contact = contact
+        self.flow = flow
+        self.expiry = time.time() + expires
+
+    @property
+    def expires(self):
+        return max(0, int(self.expiry - time.time()))
+
+
+class SipServer:
+    def __init__(self, domains, port = 5060, tls_port = 5061, certificate = None, verbose = False):
+        self.domains = set(domains) | set([local_address, 'localhost'])
+        self.port = port
+        self.tls_port = tls_port
+        self.certificate = certificate
+        self.verbose = verbose
+        self.lock = threading.RLock()
+        self.accounts = dict(test_accounts)
+        self.bindings = {}
+        self.contact_flows = {}
+        self.transactions = {}
+        self.udp_flows = {}
+
+    def log(self, message):
+        if self.verbose:
+            sys.stderr.write("{time:.3f} {message}\n".format(time=time.time(), message=message))
+            sys.stderr.flush()
+
+    def start(self):
+        self.udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_sock.bind((local_address, self.port))
+        self.start_thread(self.udp_loop)
+        self.start_thread(self.accept_loop, self.listen(self.port), 'tcp', None)
+        if self.certificate is not None and os.path.exists(self.certificate):
+            context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+            try:
+                # The key of the certificate of the tester is too small for the default security level of recent OpenSSL versions
+                context.set_ciphers('DEFAULT:@SECLEVEL=0')
+            except ssl.SSLError:
+                pass
+            try:
+                context.load_cert_chain(self.certificate)
+            except ssl.SSLError as e:
+                sys.stderr.write("TLS disabled, the certificate could not be loaded: {error}\n".format(error=e))
+                return
+            self.start_thread(self.accept_loop, self.listen(self.tls_port), 'tls', context)
+
+    def start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+
+    def listen(self, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((local_address, port))
+        sock.listen(64)
+        return sock
+
+    def accept_loop(self, sock, transport, context):
+        while True:
+            (conn, remote) = sock.accept()
+            if context is None:
+                StreamFlow(self, transport, conn, remote)
+            else:
+                self.start_thread(self.tls_handshake, context, conn, remote)
+
+    def tls_handshake(self, context, conn, remote):
+        try:
+            conn.settimeout(10)
+            conn = context.wrap_socket(conn, server_side=True)
+            conn.settimeout(None)
+        except (socket.error, ssl.SSLError):
+            conn.close()
+            return
+        StreamFlow(self, 'tls', conn, remote)
+
+    def udp_loop(self):
+        while True:
+            (data, remote) = self.udp_sock.recvfrom(65536)
+            if len(data.strip()) == 0: # Keep-alive
+                continue
+            flow = self.udp_flows.get(remote)
+            if flow is None:
+                flow = self.udp_flows[remote] = UdpFlow(self, self.udp_sock, remote)
+            try:
+                msg = SipMessage.parse(data)
+            except (ValueError, IndexError):
+                continue
+            self.handle(msg, flow)
+
+    def flow_closed(self, flow):
+        with self.lock:
+            for (aor, bindings) in self.bindings.items():
+                bindings[:] = [b for b in bindings if b.flow is not flow]
+            for (key, f) in list(self.contact_flows.items()):
+                if f is flow:
+                    del self.contact_flows[key]
+
+    def connect(self, uri):
+        """Return a flow to the host and port of a URI, connecting to it if needed."""
+        address = (uri.host.strip('[]'), uri.port or (5061 if uri.transport == 'tls' else 5060))
+        flow = self.contact_flows.get(address)
+        if flow is not None and not flow.closed:
+            return flow
+        if uri.transport == 'udp':
+            return UdpFlow(self, self.udp_sock, address)
+        try:
+            sock = socket.create_connection(address, 5)
+            if uri.transport == 'tls':
+                sock = ssl._create_unverified_context().wrap_socket(sock)
+        except (socket.error, ssl.SSLError):
+            return None
+        flow = StreamFlow(self, uri.transport, sock, address)
+        self.contact_flows[address] = flow
+        return flow
+
+    def is_local(self, uri):
+        return uri.host in self.domains and uri.port in (None, self.port, self.tls_port)
+
+    def handle(self, msg, flow):
+        with self.lock:
+            self.log("Received from {remote} ({transport}):\n{msg}".format(remote=flow.remote, transport=flow.transport, msg=msg.to_bytes().decode('latin-1')))
+            try:
+                if msg.is_request:
+                    self.handle_request(msg, flow)
+                else:
+                    self.handle_response(msg)
+            except Exception as e:
+                # A malformed message must not stop the thread reading the flow
+                self.log("Error while handling message: {error!r}".format(error=e))
+                if msg.is_request and msg.method != 'ACK':
+                    self.reply(msg, flow, 500)
+
+    def send(self, msg, flow):
+        self.log("Sending to {remote} ({transport}):\n{msg}".format(remote=flow.remote, transport=flow.transport, msg=msg.to_bytes().decode('latin-1')))
+        flow.send(msg.to_bytes())
+
+    def reply(self, request, flow, status, reason = None, headers = []):
+        response = SipMessage()
+        response.status = status
+        response.reason = reason or reason_phrases.get(status, 'Unknown')
+        for name in ('Via', 'From', 'To', 'Call-ID', 'CSeq'):
+            for value in request.header_values(name):
+                response.headers.append([name, value])
+        if status > 100 and 'tag' not in header_params(request.header('To')):
+            response.set_header('To', request.header('To') + ';tag=' + self.random_token())
+        for (name, value) in headers:
+            response.headers.append([name, value])
+        self.send(response, flow)
+
+    def random_token(self):
+        return '%08x' % random.getrandbits(32)
+
+    def handle_request(self, msg, flow):
+        (sent_by, sep, via_params) = msg.header('Via').partition(';')
+        if 'rport' in parse_params(via_params):
+            via_params = [p for p in via_params.split(';') if p.partition('=')[0].strip() not in ('rport', 'received')]
+            via_params += ['received=' + flow.remote[0], 'rport=' + str(flow.remote[1])]
+            msg.remove_header('Via', first_only=True)
+            msg.add_header_on_top('Via', sent_by + ';' + ';'.join(via_params))
+        for contact in msg.header_values('Contact'):
+            if contact != '*':
+                uri = SipUri(header_uri(contact))
+                self.contact_flows[(uri.host.strip('[]'), uri.port or 5060)] = flow
+        max_forwards = int(msg.header('Max-Forwards') or 70)
+        if max_forwards <= 0:
+            if msg.method != 'ACK':
+                self.reply(msg, flow, 483)
+            return
+        msg.set_header('Max-Forwards', str(max_forwards - 1))
+        while msg.header('Route') is not None and self.is_local(SipUri(header_uri(msg.header('Route')))):
+            msg.remove_header('Route', first_only=True)
+        uri = SipUri(msg.uri)
+        if msg.method == 'REGISTER':
+            self.handle_register(msg, flow)
+        elif msg.method == 'PUBLISH':
+            self.reply(msg, flow, 200, headers=[('SIP-ETag', self.random_token()), ('Expires', msg.header('Expires') or '3600')])
+        elif self.is_local(uri):
+            if not uri.user:
+                if msg.method == 'OPTIONS':
+                    self.reply(msg, flow, 200)
+                elif msg.method != 'ACK':
+                    self.reply(msg, flow, 404)
+                return
+            binding = self.find_binding(uri.aor)
+            if binding is None:
+                if msg.method != 'ACK':
+                    self.reply(msg, flow, 480)
+                return
+            msg.uri = binding.contact
+            self.forward_request(msg, flow, binding.flow)
+        else:
+            target = uri
+            if msg.header('Route') is not None:
+                target = SipUri(header_uri(msg.header('Route')))
+            out_flow = self.connect(target)
+            if out_flow is None:
+                if msg.method != 'ACK':
+                    self.reply(msg, flow, 480)
+                return
+            self.forward_request(msg, flow, out_flow)
+
+    def handle_register(self, msg, flow):
+        to_uri = SipUri(header_uri(msg.header('To')))
+        from_uri = SipUri(header_uri(msg.header('From')))
+        aor = to_uri.aor
+        create_account = (msg.header('X-Create-Account') or '').lower() == 'yes' or 'x-create-account=yes' in (to_uri.headers + from_uri.headers).lower()
+        reason = None
+        if create_account:
+            self.accounts[aor] = to_uri.password or from_uri.password or ''
+            reason = 'Test account created'
+        elif aor[1] in auth_domains and not self.check_authorization(msg, aor[1]):
+            self.reply(msg, flow, 401, headers=[('WWW-Authenticate', 'Digest realm="{realm}", nonce="{nonce}", algorithm=MD5'.format(realm=aor[1], nonce=self.random_token()))])
+            return
+        bindings = [b for b in self.bindings.get(aor, []) if b.expires > 0]
+        default_expires = int(msg.header('Expires') or 3600)
+        for contact in msg.header_values('Contact'):
+            if contact == '*':
+                bindings = []
+                continue
+            uri = header_uri(contact)
+            expires = int(header_params(contact).get('expires') or default_expires)
+            bindings = [b for b in bindings if b.contact != uri]
+            if expires > 0:
+                bindings.append(Binding(uri, flow, expires))
+        self.bindings[aor] = bindings
+        self.reply(msg, flow, 200, reason, [('Contact', '<{contact}>;expires={expires}'.format(contact=b.contact, expires=b.expires)) for b in bindings])
+
+    def check_authorization(self, msg, realm):
+        authorization = msg.header('Authorization')
+        if authorization is None or not authorization.lower().startswith('digest'):
+            return False
+        # The values may be quoted and contain commas or semicolons, such as the uri parameter
+        params = {}
+        for param in split_header_values(authorization[6:]):
+            (name, sep, value) = param.partition('=')
+            params[name.strip().lower()] = value.strip().strip('"') if sep else None
+        password = self.accounts.get((params.get('username'), realm))
+        if password is None or params.get('realm') != realm or params.get('nonce') is None:
+            return False
+        if params.get('qop') and (params.get('nc') is None or params.get('cnonce') is None):
+            return False
+        md5 = lambda text: hashlib.md5(text.encode('utf-8')).hexdigest()
+        ha1 = md5("{username}:{realm}:{password}".format(username=params['username'], realm=realm, password=password))
+        ha2 = md5("{method}:{uri}".format(method=msg.method, uri=params.get('uri')))
+        if params.get('qop'):
+            expected = md5(':'.join([ha1, params.get('nonce'), params.get('nc'), params.get('cnonce'), params.get('qop'), ha2]))
+        else:
+            expected = md5(':'.join([ha1, params.get('nonce'), ha2]))
+        return params.get('response') == expected
+
+    def find_binding(self, aor):
+        bindings = [b for b in self.bindings.get(aor, []) if b.expires > 0 and not b.flow.closed]
+        if len(bindings) == 0:
+            return None
+        return bindings[-1]
+
+    def record_route(self, flow):
+        if flow.transport == 'tls':
+            return '<sip:{address}:{port};transport=tls;lr>'.format(address=local_address, port=self.tls_port)
+        if flow.transport == 'tcp':
+            return '<sip:{address}:{port};transport=tcp;lr>'.format(address=local_address, port=self.port)
+        return '<sip:{address}:{port};lr>'.format(address=local_address, port=self.port)
+
+    def forward_request(self, msg, in_flow, out_flow):
+        # The branch is derived from the one of the incoming request, so that the CANCEL and the ACK of a non 2xx
+        # response get the same branch as the INVITE they relate to
+        in_branch = parse_params(msg.header('Via').partition(';')[2]).get('branch') or ''
+        branch = 'z9hG4bK' + hashlib.md5((in_branch + msg.header('Call-ID') + out_flow.transport).encode('latin-1')).hexdigest()[:16]
+        if msg.method in ('INVITE', 'SUBSCRIBE', 'REFER') and 'tag' not in header_params(msg.header('To')):
+            msg.add_header_on_top('Record-Route', self.record_route(in_flow))
+            msg.add_header_on_top('Record-Route', self.record_route(out_flow))
+        port = self.tls_port if out_flow.transport == 'tls' else self.port
+        msg.add_header_on_top('Via', 'SIP/2.0/{transport} {address}:{port};branch={branch};rport'.format(transport=out_flow.transport.upper(), address=local_address, port=port, branch=branch))
+        if msg.method != 'ACK':
+            self.transactions[branch] = (in_flow, time.time())
+            self.purge_transactions()
+        self.send(msg, out_flow)
+
+    def purge_transactions(self):
+        now = time.time()
+        for (branch, (flow, timestamp)) in list(self.transactions.items()):
+            if now - timestamp > 300:
+                del self.transactions[branch]
+
+    def handle_response(self, msg):
+        branch = parse_params(msg.header('Via').partition(';')[2]).get('branch')
+        msg.remove_header('Via', first_only=True)
+        if msg.header('Via') is None:
+            return
+        transaction = self.transactions.get(branch)
+        if transaction is not None and not transaction[0].closed:
+            self.send(msg, transaction[0])
+        elif msg.header('Via').upper().startswith('SIP/2.0/UDP'):
+            # Unknown transaction, send the response where the Via header tells
+            (sent_by, sep, via_params) = msg.header('Via').partition(';')
+            via_params = parse_params(via_params)
+            (host, sep, port) = sent_by.split()[1].partition(':')
+            address = (via_params.get('received') or host, int(via_params.get('rport') or port or 5060))
+            self.send(msg, UdpFlow(self, self.udp_sock, address))
+
+
+def main(argv = None):
+    argparser = argparse.ArgumentParser(description="Local SIP registrar and proxy for the Linphone Python unit tests.")
+    argparser.add_argument('--hosts', required=True, help="Hosts file of the tester, giving the domains served.")
+    argparser.add_argument('--port', type=int, default=5060, help="UDP and TCP port.")
+    argparser.add_argument('--tls-port', type=int, default=5061, help="TLS port.")
+    argparser.add_argument('--certificate', help="PEM file containing the certificate and the private key used for TLS.")
+    argparser.add_argument('-v', '--verbose', action='store_true', help="Print the SIP messages on stderr.")
+    args = argparser.parse_args(argv)
+    server = SipServer(read_hosts_domains(args.hosts), args.port, args.tls_port, args.certificate, args.verbose)
+    server.start()
+    print("Listening on {address}:{port}".format(address=local_address, port=args.port))
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""Run the Linphone Python unit tests in several processes at the same time.
+
+Each worker runs the tests one at a time with nose, in its own temporary directory and with its own range of
+ports. linphonetester reads them from the environment: the cores of a worker use copies of the rc files and
+the certificates directory in the directory of the worker, and bind SIP and RTP ports only in the port range
+of the worker. The results of all the tests are aggregated at the end.
+"""
+
+import argparse
+import ast
+import glob
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+# Must match the layout of the port range of a worker in linphonetester
+worker_port_range_size = 200
+worker_port_range_min = 20000
+worker_port_range_max = 32000 # Keep the ports below the ephemeral ports used by the random SIP ports of the rc files
+
+
+def tester_resources_path(unittests_path):
+    # Same lookup as in linphonetester, that can not be imported here as it imports linphone
+    if os.path.isdir(os.path.join(unittests_path, "rcfiles")):
+        return unittests_path
+    return os.path.abspath(os.path.join(unittests_path, "../../../tester/"))
+
+def collect_tests(test_files):
+    """Find the test methods of the test classes without importing the test files."""
+    tests = []
+    for test_file in test_files:
+        with open(test_file) as f:
+            tree = ast.parse(f.read(), test_file)
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name.startswith('Test'):
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and item.name.startswith('test_'):
+                        tests.append("{file}:{cls}.{method}".format(file=test_file, cls=node.name, method=item.name))
+    return tests
+
+
+class TestResult:
+    def __init__(self, test, status, duration, message = None):
+        self.test = test
+        self.status = status
+        self.duration = duration
+        self.message = message
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, port_base, base_dir, jobs, results, args):
+        threading.Thread.__init__(self)
+        self.index = index
+        self.port_base = port_base
+        self.path = os.path.join(base_dir, "worker{index}".format(index=index))
+        self.jobs = jobs
+        self.results = results
+        self.args = args
+        os.mkdir(self.path)
+
+    def run(self):
+        env = dict(os.environ)
+        env['LINPHONE_TESTER_WORKER_DIR'] = self.path
+        env['LINPHONE_TESTER_PORT_BASE'] = str(self.port_base)
+        while True:
+            try:
+                (number, test) = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            self.results.put(self.run_test(number, test, env))
+
+    def run_test(self, number, test, env):
+        xunit_file = os.path.join(self.path, "{number}.xml".format(number=number))
+        log_file = os.path.join(self.path, "{number}.log".format(number=number))
+        cmd = [sys.executable, '-m', 'nose', '-v', '--nologcapture', '--with-xunit', '--xunit-file=' + xunit_file, test]
+        start = time.time()
+        with open(log_file, 'w') as log:
+            log.write(' '.join(cmd) + '\n')
+            log.flush()
+            try:
+                returncode = subprocess.call(cmd, cwd=self.path, env=env, stdout=log, stderr=subprocess.STDOUT, timeout=self.args.timeout)
+            except TypeError: # Python 2 has no timeout for subprocess.call()
+                returncode = subprocess.call(cmd, cwd=self.path, env=env, stdout=log, stderr=subprocess.STDOUT)
+            except subprocess.TimeoutExpired:
+                return TestResult(test, 'error', time.time() - start, "Timeout after {timeout} seconds, see {log}".format(timeout=self.args.timeout, log=log_file))
+        duration = time.time() - start
+        result = self.parse_xunit_file(test, xunit_file, duration)
+        if result is None:
+            result = TestResult(test, 'error', duration, "nose exited with code {code} without results, see {log}".format(code=returncode, log=log_file))
+        elif result.status != 'ok':
+            result.message = "{message}\nSee {log}".format(message=result.message, log=log_file)
+        return result
+
+    def parse_xunit_file(self, test, xunit_file, duration):
+        if not os.path.exists(xunit_file):
+            return None
+        try:
+            testcases = ET.parse(xunit_file).getroot().findall('testcase')
+        except ET.ParseError:
+            return None
+        if len(testcases) == 0:
+            return None
+        for status in ('error', 'failure', 'skipped'):
+            for testcase in testcases:
+                element = testcase.find(status)
+                if element is not None:
+                    return TestResult(test, status, duration, element.get('message') or element.text)
+        return TestResult(test, 'ok', duration)
+
+
+def main(argv = None):
+    argparser = argparse.ArgumentParser(description="Run the Linphone Python unit tests in parallel.")
+    argparser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help="Number of tests run at the same time. Defaults to the number of CPUs.")
+    argparser.add_argument('-t', '--timeout', type=int, default=600, help="Maximum duration of a test in seconds.")
+    argparser.add_argument('-k', '--keep', action='store_true', help="Keep the directories of the workers, including the logs of the tests that passed.")
+    argparser.add_argument('-l', '--local-server', action='store_true', help="Use a local SIP server instead of the flexisip server at sip.example.org, see local_sip_server.py.")
+    argparser.add_argument('test_files', metavar='test_file', nargs='*', help="Test files to run. Defaults to all the test_*.py files.")
+    args = argparser.parse_args(argv)
+
+    unittests_path = os.path.abspath(os.path.dirname(__file__))
+    # The local server listens on fixed ports, so it is started once here and not by each worker
+    local_server = os.environ.get('LINPHONE_TESTER_LOCAL_SERVER')
+    if args.local_server or (local_server and local_server != 'external'):
+        sys.path.insert(0, unittests_path)
+        import local_sip_server
+        local_sip_server.start_server_process(tester_resources_path(unittests_path))
+        os.environ['LINPHONE_TESTER_LOCAL_SERVER'] = 'external'
+    test_files = args.test_files
+    if len(test_files) == 0:
+        test_files = sorted(glob.glob(os.path.join(unittests_path, 'test_*.py')))
+    tests = collect_tests([os.path.abspath(test_file) for test_file in test_files])
+    if len(tests) == 0:
+        print("No tests found.")
+        return 1
+
+    nb_workers = max(1, min(args.jobs, len(tests)))
+    nb_ranges = (worker_port_range_max - worker_port_range_min) // worker_port_range_size
+    if nb_workers > nb_ranges:
+        nb_workers = nb_ranges
+    first_range = random.randint(0, nb_ranges - nb_workers)
+    jobs = queue.Queue()
+    for (number, test) in enumerate(tests):
+        jobs.put((number, test))
+    results = queue.Queue()
+    base_dir = tempfile.mkdtemp(prefix='linphonetester-')
+    workers = [Worker(index, worker_port_range_min + (first_range + index) * worker_port_range_size, base_dir, jobs, results, args) for index in range(nb_workers)]
+    print("Running {nb_tests} tests with {nb_workers} workers in {path}".format(nb_tests=len(tests), nb_workers=nb_workers, path=base_dir))
+    start = time.time()
+    for worker in workers:
+        worker.start()
+
+    counts = { 'ok': 0, 'failure': 0, 'error': 0, 'skipped': 0 }
+    failed = []
+    for i in range(len(tests)):
+        result = results.get()
+        counts[result.status] += 1
+        print("{test} ... {status} ({duration:.1f}s)".format(test=os.path.relpath(result.test, unittests_path), status=result.status, duration=result.duration))
+        sys.stdout.flush()
+        if result.status in ('failure', 'error'):
+            failed.append(result)
+    for worker in workers:
+        worker.join()
+
+    print('')
+    for result in failed:
+        print("{status}: {test}\n{message}\n".format(status=result.status.upper(), test=os.path.relpath(result.test, unittests_path), message=result.message))
+    print("Ran {nb_tests} tests in {duration:.1f}s: {ok} ok, {failure} failures, {error} errors, {skipped} skipped".format(
+        nb_tests=len(tests), duration=time.time() - start, **counts))
+    if len(failed) == 0 and not args.keep:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    if len(failed) > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,7 +56,7 @@ class TestMessage:
         f.seek(offset, 0)
         if (send_filesize - offset) < size:
             size = send_filesize - offset
-        lb = linphone.Buffer.new_from_data(bytearray(f.read(size)))
+        lb = linphone.Buffer.new_from_data(f.read(size))
         f.close()
         return lb
 
@@ -68,10 +68,10 @@ class TestMessage:
             stats.number_of_LinphoneFileTransferDownloadSuccessful += 1
         else: # Store content
             f = open(receive_filepath, 'ab')
-            f.write(buf.content)
+            f.write(memoryview(buf))
             f.close()
 
-    def create_message_from_sintel_trailer(self, chat_room):
+    def create_message_from_sintel_trailer(self, chat_room, use_mmap = False):
         send_filepath = os.path.join(tester_resources_path, 'sounds', 'sintel_trailer_opus_h264.mkv')
         content = chat_room.core.create_content()
         content.type = 'video'
@@ -82,7 +82,10 @@ class TestMessage:
         content.name = 'sintel_trailer_opus_h264.mkv'
         message = chat_room.create_file_transfer_message(content)
         message.callbacks.msg_state_changed = TestMessage.msg_state_changed
-        message.callbacks.file_transfer_send = TestMessage.file_transfer_send
+        if use_mmap:
+            message.attach_file_mmap(send_filepath)
+        else:
+            message.callbacks.file_transfer_send = TestMessage.file_transfer_send
         message.callbacks.file_transfer_progress_indication = TestMessage.file_transfer_progress_indication
         message.user_data = send_filepath
         return message
@@ -124,7 +127,7 @@ class TestMessage:
         assert marie.lc.get_chat_room(pauline.identity) is not None
         CoreManager.end_call(marie, pauline)
 
-    def test_transfer_message(self):
+    def transfer_message_base(self, use_mmap):
         marie = CoreManager('marie_rc')
         pauline = CoreManager('pauline_tcp_rc')
         send_filepath = os.path.join(tester_resources_path, 'sounds', 'sintel_trailer_opus_h264.mkv')
@@ -134,7 +137,7 @@ class TestMessage:
         pauline.lc.file_transfer_server = "https://www.linphone.org:444/lft.php"
         self.wait_for_server_to_purge_messages(marie, pauline)
         chat_room = pauline.lc.get_chat_room(marie.identity)
-        message = self.create_message_from_sintel_trailer(chat_room)
+        message = self.create_message_from_sintel_trailer(chat_room, use_mmap)
         chat_room.send_chat_message_2(message)
         assert_equals(CoreManager.wait_for_until(pauline, marie, lambda pauline, marie: marie.stats.number_of_LinphoneMessageReceivedWithFile == 1, 60000), True)
         if marie.stats.last_received_chat_message is not None:
@@ -151,6 +154,12 @@ class TestMessage:
         if os.path.exists(receive_filepath):
             os.remove(receive_filepath)
 
+    def test_transfer_message(self):
+        self.transfer_message_base(False)
+
+    def test_transfer_message_mmap(self):
+        self.transfer_message_base(True)
+
     def test_transfer_message_upload_cancelled(self):
         marie = CoreManager('marie_rc')
         pauline = CoreManager('pauline_tcp_rc')
@@ -21,7 +21,7 @@ class RegisterCoreManager(CoreManager):
     def __del__(self):
         linphonetester_logger.info("deleting" + str(self))
 
-    def register_with_refresh_base(self, refresh, domain, route, late_auth_info = False, transport = linphone.SipTransports(5070, 5070, 5071, 0), expected_final_state = linphone.RegistrationState.Ok):
+    def register_with_refresh_base(self, refresh, domain, route, late_auth_info = False, transport = linphone.SipTransports(tester_sip_port(), tester_sip_port(), tester_sip_port(1), 0), expected_final_state = linphone.RegistrationState.Ok):
         assert self.lc is not None
         self.stats.reset()
         self.lc.sip_transports = transport
@@ -39,25 +39,24 @@ class RegisterCoreManager(CoreManager):
         self.lc.add_proxy_config(proxy_cfg)
         self.lc.default_proxy_config = proxy_cfg
 
-        retry = 0
         expected_count = 1
         if refresh:
             expected_count += 1
-        max_retry = 110
+        timeout = 11000
         if expected_final_state == linphone.RegistrationState.Progress:
-            max_retry += 200
-        while self.stats.number_of_LinphoneRegistrationOk < expected_count and retry < max_retry:
-            retry += 1
-            self.lc.iterate()
+            timeout += 20000
+
+        def registration_done(manager):
+            if self.stats.number_of_LinphoneRegistrationOk >= expected_count:
+                return True
             if self.stats.number_of_auth_info_requested > 0 and proxy_cfg.state == linphone.RegistrationState.Failed and late_auth_info:
                 if len(self.lc.auth_info_list) == 0:
                     assert_equals(proxy_cfg.error, linphone.Reason.Unauthorized)
                     info = linphone.Factory.get().create_auth_info(test_username, None, test_password, None, None, None) # Create authentication structure from identity
                     self.lc.add_auth_info(info)
-            if proxy_cfg.error == linphone.Reason.Forbidden or \
-                (self.stats.number_of_auth_info_requested > 2 and proxy_cfg.error == linphone.Reason.Unauthorized):
-                break
-            time.sleep(0.1)
+            return proxy_cfg.error == linphone.Reason.Forbidden or \
+                (self.stats.number_of_auth_info_requested > 2 and proxy_cfg.error == linphone.Reason.Unauthorized)
+        CoreManager.wait_for_until(self, None, registration_done, timeout)
 
         assert_equals(proxy_cfg.state, expected_final_state)
         assert_equals(self.stats.number_of_LinphoneRegistrationNone, 0)
@@ -71,7 +70,7 @@ class RegisterCoreManager(CoreManager):
         else:
             assert_equals(self.stats.number_of_LinphoneRegistrationCleared, 0)
 
-    def register_with_refresh(self, refresh, domain, route, late_auth_info = False, transport = linphone.SipTransports(5070, 5070, 5071, 0), expected_final_state = linphone.RegistrationState.Ok):
+    def register_with_refresh(self, refresh, domain, route, late_auth_info = False, transport = linphone.SipTransports(tester_sip_port(), tester_sip_port(), tester_sip_port(1), 0), expected_final_state = linphone.RegistrationState.Ok):
         self.register_with_refresh_base(refresh, domain, route, late_auth_info, expected_final_state = expected_final_state)
         # Not testable as the callbacks can not be called once the core destruction has started
         #assert_equals(self.stats.number_of_LinphoneRegistrationCleared, 1)
@@ -105,7 +104,7 @@ class TestRegister:
 
     def test_simple_tcp_register_compatibility_mode(self):
         cm = RegisterCoreManager()
-        cm.register_with_refresh(False, test_domain, "sip:{route}".format(route=test_route), transport=linphone.SipTransports(0, 5070, 0, 0))
+        cm.register_with_refresh(False, test_domain, "sip:{route}".format(route=test_route), transport=linphone.SipTransports(0, tester_sip_port(), 0, 0))
 
     def test_simple_tls_register(self):
         cm = RegisterCoreManager()
@@ -165,7 +164,7 @@ class TestRegister:
 
     def test_authenticated_register_with_late_credentials(self):
         cm = RegisterCoreManager()
-        cm.register_with_refresh(False, auth_domain, "sip:{route}".format(route=test_route), True, linphone.SipTransports(5070, 5070, 5071, 0))
+        cm.register_with_refresh(False, auth_domain, "sip:{route}".format(route=test_route), True, linphone.SipTransports(tester_sip_port(), tester_sip_port(), tester_sip_port(1), 0))
         assert_equals(cm.stats.number_of_auth_info_requested, 1)
 
     def test_simple_register_with_refresh(self):
@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import genapixml as CApi
+
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genapixml')
+xml_dir = os.path.join(data_dir, 'xml')
+
+
+def canonical_tree(node):
+	# Attribute order differs between Python versions, so compare attributes as sorted lists
+	return (node.tag, sorted(node.attrib.items()), node.text, node.tail, [canonical_tree(child) for child in node])
+
+def generate_api(jobs = 1, cache_dir = None):
+	project = CApi.Project()
+	project.jobs = jobs
+	project.cacheDir = cache_dir
+	project.initFromDir(xml_dir)
+	output = io.BytesIO()
+	output.name = 'api.xml'
+	CApi.Generator(output).generate(project)
+	return ET.fromstring(output.getvalue())
+
+
+class TestGenApiXml:
+
+	def test_api_xml_unchanged(self):
+		# api.xml has been generated from the Doxygen XML files of xml_dir before class discovery was indexed
+		expected = ET.parse(os.path.join(data_dir, 'api.xml')).getroot()
+		assert canonical_tree(generate_api()) == canonical_tree(expected)
+
+	def test_parallel_parsing(self):
+		assert canonical_tree(generate_api(jobs = 2)) == canonical_tree(generate_api())
+
+	def test_parse_cache(self):
+		cache_dir = tempfile.mkdtemp()
+		try:
+			expected = canonical_tree(generate_api())
+			assert canonical_tree(generate_api(cache_dir = cache_dir)) == expected
+			entries_dir = CApi.CParseCache(cache_dir).path
+			entries = os.listdir(entries_dir)
+			assert len(entries) == len(os.listdir(xml_dir))
+			assert canonical_tree(generate_api(cache_dir = cache_dir)) == expected
+			assert sorted(os.listdir(entries_dir)) == sorted(entries)
+		finally:
+			shutil.rmtree(cache_dir)
+
+	def test_parse_cache_pruning(self):
+		cache_dir = tempfile.mkdtemp()
+		try:
+			entries_dir = CApi.CParseCache(cache_dir).path
+			other_parser_dir = os.path.join(cache_dir, '0' * 40)
+			os.makedirs(entries_dir)
+			os.makedirs(other_parser_dir)
+			for path in [os.path.join(entries_dir, '1' * 40 + '.pickle'), os.path.join(other_parser_dir, '2' * 40 + '.pickle'), os.path.join(cache_dir, '3' * 40 + '.pickle')]:
+				open(path, 'wb').close()
+			generate_api(cache_dir = cache_dir)
+			assert os.listdir(cache_dir) == [os.path.relpath(os.path.dirname(entries_dir), cache_dir)]
+			assert len(os.listdir(entries_dir)) == len(os.listdir(xml_dir))
+		finally:
+			shutil.rmtree(cache_dir)
+
+	def test_longest_prefix_wins(self):
+		project = CApi.Project()
+		project.initFromDir(xml_dir)
+		classes = dict((c.name, c) for c in project.classes)
+		assert 'linphone_call_log_get_duration' not in classes['LinphoneCall'].instanceMethods
+		assert 'duration' in classes['LinphoneCallLog'].properties
+		assert 'video_enabled' in classes['LinphoneCallParams'].properties
+		assert 'LinphoneCallCbsStateChangedCb' in classes['LinphoneCallCbs'].events
+		assert 'LinphoneCallCbsStateChangedCb' not in classes['LinphoneCall'].events
@@ -17,7 +17,6 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 
-import pystache
 import re
 import argparse
 import os
@@ -29,6 +28,7 @@ import genapixml as CApi
 import abstractapi as AbsApi
 import metadoc
 import metaname
+import cachedrenderer
 
 
 class CppTranslator(object):
@@ -447,20 +447,16 @@ class ClassImpl(object):
 		self.namespace = 'linphone'
 
 class GenWrapper(object):
-	def __init__(self, includedir, srcdir, xmldir):
+	def __init__(self, includedir, srcdir, parser):
 		self.includedir = includedir
 		self.srcdir = srcdir
-
-		project = CApi.Project()
-		project.initFromDir(xmldir)
-		project.check()
-		
-		self.parser = AbsApi.CParser(project)
-		self.parser.parse_all()
+		self.parser = parser
 		self.translator = CppTranslator()
-		self.renderer = pystache.Renderer()
+		self.renderer = cachedrenderer.CachedRenderer()
 		self.mainHeader = MainHeader()
 		self.impl = ClassImpl()
+		self.writtenFiles = 0
+		self.skippedFiles = 0
 
 	def render_all(self):
 		header = EnumsHeader(self.translator)
@@ -480,17 +476,20 @@ class GenWrapper(object):
 		
 		self.render(self.mainHeader, self.includedir + '/linphone.hh')
 		self.render(self.impl, self.srcdir + '/linphone++.cc')
+		print('{0} file(s) written, {1} file(s) unchanged'.format(self.writtenFiles, self.skippedFiles))
 
 	def render(self, item, path):
-		tmppath = path + '.tmp'
-		content = ''
-		with open(tmppath, mode='w') as f:
-			f.write(self.renderer.render(item))
-		with open(tmppath, mode='rU') as f:
-			content = f.read()
+		# Newlines are normalized as if the content was written and read back in universal newlines mode
+		content = self.renderer.render(item).replace('\r\n', '\n').replace('\r', '\n')
+		# Leave unchanged files untouched so that their modification time does not trigger a rebuild
+		if os.path.isfile(path):
+			with open(path, mode='r') as f:
+				if f.read() == content:
+					self.skippedFiles += 1
+					return
 		with open(path, mode='w') as f:
 			f.write(content)
-		os.unlink(tmppath)
+		self.writtenFiles += 1
 
 	def render_header(self, _class):
 		if _class is not None:
@@ -506,14 +505,9 @@ class GenWrapper(object):
 			except AbsApi.Error as e:
 				print('Could not translate {0}: {1}'.format(_class.name.to_camel_case(fullName=True), e.args[0]))
 
-def main():
-	argparser = argparse.ArgumentParser(description='Generate source files for the C++ wrapper')
-	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed')
-	argparser.add_argument('-o --output', type=str, help='the directory where to generate the source files', dest='outputdir', default='.')
-	args = argparser.parse_args()
-	
-	includedir = args.outputdir + '/include/linphone++'
-	srcdir = args.outputdir + '/src'
+def generate(parser, outputdir):
+	includedir = outputdir + '/include/linphone++'
+	srcdir = outputdir + '/src'
 	
 	try:
 		os.makedirs(includedir)
@@ -529,9 +523,31 @@ def main():
 			print("Cannot create '{0}' directory: {1}".format(srcdir, e.strerror))
 			sys.exit(1)
 	
-	genwrapper = GenWrapper(includedir, srcdir, args.xmldir)
+	genwrapper = GenWrapper(includedir, srcdir, parser)
 	genwrapper.render_all()
 
+def main():
+	argparser = argparse.ArgumentParser(description='Generate source files for the C++ wrapper')
+	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed')
+	argparser.add_argument('-o --output', type=str, help='the directory where to generate the source files', dest='outputdir', default='.')
+	argparser.add_argument('--cache-dir', type=str, help='the directory where the parsed XML files are cached between runs', dest='cachedir', default=None)
+	argparser.add_argument('--template-cache-dir', type=str, help='the directory where the parsed templates are cached between runs', dest='templatecachedir', default=None)
+	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
+	args = argparser.parse_args()
+	
+	cachedrenderer.defaultCache.directory = args.templatecachedir
+	
+	project = CApi.Project()
+	project.cacheDir = args.cachedir
+	project.initFromDir(args.xmldir)
+	project.check()
+	
+	parser = AbsApi.CParser(project)
+	parser.parse_all()
+	generate(parser, args.outputdir)
+	if args.verbose:
+		print(cachedrenderer.defaultCache.report())
+
 
 if __name__ == '__main__':
 	main()
@@ -19,13 +19,13 @@
 import argparse
 import os
 import sys
-import pystache
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
 import genapixml as CApi
 import abstractapi as AbsApi
 import metadoc
 import metaname
+import cachedrenderer
 
 class CsharpTranslator(object):
 	def __init__(self):
@@ -459,38 +459,27 @@ class WrapperImpl(object):
 ###########################################################################################################################################
 
 def render(renderer, item, path):
-	tmppath = path + '.tmp'
-	content = ''
-	with open(tmppath, mode='w') as f:
-		f.write(renderer.render(item))
-	with open(tmppath, mode='rU') as f:
-		content = f.read()
+	# Newlines are normalized as if the content was written and read back in universal newlines mode
+	content = renderer.render(item).replace('\r\n', '\n').replace('\r', '\n')
+	# Leave an unchanged file untouched so that its modification time does not trigger a rebuild
+	if os.path.isfile(path):
+		with open(path, mode='r') as f:
+			if f.read() == content:
+				return False
 	with open(path, mode='w') as f:
 		f.write(content)
-	os.unlink(tmppath)
+	return True
 
-def main():
-	argparser = argparse.ArgumentParser(description='Generate source files for the C++ wrapper')
-	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed')
-	argparser.add_argument('-o --output', type=str, help='the directory where to generate the source files', dest='outputdir', default='.')
-	argparser.add_argument('-n --name', type=str, help='the name of the genarated source file', dest='outputfile', default='LinphoneWrapper.cs')
-	args = argparser.parse_args()
-
-	entries = os.listdir(args.outputdir)
-
-	project = CApi.Project()
-	project.initFromDir(args.xmldir)
-	project.check()
-
-	parser = AbsApi.CParser(project)
+def configure_parser(parser):
 	parser.functionBl = \
 		['linphone_vcard_get_belcard',\
 		'linphone_core_get_current_vtable']
 	parser.classBl += 'LinphoneCoreVTable'
 	parser.methodBl.remove('getCurrentCallbacks')
-	parser.parse_all()
+
+def generate(parser, outputdir, outputfile='LinphoneWrapper.cs'):
 	translator = CsharpTranslator()
-	renderer = pystache.Renderer()
+	renderer = cachedrenderer.CachedRenderer()
 
 	enums = []
 	for item in parser.enumsIndex.items():
@@ -516,7 +505,36 @@ def main():
 					print('Could not translate {0}: {1}'.format(_class.name.to_c(), e.args[0]))
 
 	wrapper = WrapperImpl(enums, interfaces, classes)
-	render(renderer, wrapper, args.outputdir + "/" + args.outputfile)
+	if render(renderer, wrapper, outputdir + "/" + outputfile):
+		print('{0} written'.format(outputfile))
+	else:
+		print('{0} unchanged'.format(outputfile))
+
+def main():
+	argparser = argparse.ArgumentParser(description='Generate source files for the C++ wrapper')
+	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed')
+	argparser.add_argument('-o --output', type=str, help='the directory where to generate the source files', dest='outputdir', default='.')
+	argparser.add_argument('-n --name', type=str, help='the name of the genarated source file', dest='outputfile', default='LinphoneWrapper.cs')
+	argparser.add_argument('--cache-dir', type=str, help='the directory where the parsed XML files are cached between runs', dest='cachedir', default=None)
+	argparser.add_argument('--template-cache-dir', type=str, help='the directory where the parsed templates are cached between runs', dest='templatecachedir', default=None)
+	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
+	args = argparser.parse_args()
+
+	cachedrenderer.defaultCache.directory = args.templatecachedir
+
+	entries = os.listdir(args.outputdir)
+
+	project = CApi.Project()
+	project.cacheDir = args.cachedir
+	project.initFromDir(args.xmldir)
+	project.check()
+
+	parser = AbsApi.CParser(project)
+	configure_parser(parser)
+	parser.parse_all()
+	generate(parser, args.outputdir, args.outputfile)
+	if args.verbose:
+		print(cachedrenderer.defaultCache.report())
 
 if __name__ == '__main__':
 	main()